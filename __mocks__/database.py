@@ -0,0 +1,124 @@
+# Тестовая БД: SQLite в памяти со схемой, построенной по моделям.
+
+from typing import Any, List, Tuple
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+from main import app
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import StaticPool
+
+from configs.database import (
+    create_db_connection,
+    get_db_connection,
+)
+from models import *
+from models.base_model import BaseModel
+from services.task_cache import (
+    MemoryCacheBackend,
+    TaskCache,
+    get_task_cache,
+)
+
+
+async def create_test_engine() -> AsyncEngine:
+    """
+    Создать движок SQLite в памяти с актуальной схемой.
+    """
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=StaticPool
+    )
+    async with engine.begin() as connection:
+        await connection.run_sync(
+            BaseModel.metadata.create_all
+        )
+    return engine
+
+
+def create_test_db_connection(engine: AsyncEngine):
+    """
+    Зависимость FastAPI, заменяющая get_db_connection
+    сессией тестовой БД.
+    """
+    return create_db_connection(
+        async_sessionmaker(
+            bind=engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    )
+
+
+class RouterTestCase(IsolatedAsyncioTestCase):
+    """
+    Тесты эндпоинтов приложения на тестовой БД engine: сессии БД
+    и кэш выборок task_cache подменены, запросы отправляет client.
+    """
+
+    engine: AsyncEngine
+    task_cache: TaskCache
+    client: httpx.AsyncClient
+
+    async def asyncSetUp(self):
+        self.engine = await create_test_engine()
+        self.task_cache = TaskCache(
+            MemoryCacheBackend(max_entries=16, ttl=60)
+        )
+        app.dependency_overrides[get_db_connection] = (
+            create_test_db_connection(self.engine)
+        )
+        app.dependency_overrides[get_task_cache] = lambda: (
+            self.task_cache
+        )
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        app.dependency_overrides.clear()
+        await self.engine.dispose()
+
+
+class StatementRecorder:
+    """
+    Записывает SQL-выражения, отправленные драйверу БД.
+    """
+
+    statements: List[Tuple[str, Any]]
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.__engine = engine.sync_engine
+        self.statements = []
+
+    def __enter__(self) -> "StatementRecorder":
+        event.listen(
+            self.__engine,
+            "before_cursor_execute",
+            self.__record,
+        )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(
+            self.__engine,
+            "before_cursor_execute",
+            self.__record,
+        )
+
+    def __record(
+        self,
+        connection,
+        cursor,
+        statement,
+        parameters,
+        context,
+        executemany,
+    ) -> None:
+        self.statements.append((statement, parameters))
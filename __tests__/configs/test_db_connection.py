@@ -0,0 +1,249 @@
+import asyncio
+import gc
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from main import app
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
+from sqlalchemy.orm.session import _sessions
+
+from configs import settings
+from configs.database import (
+    after_commit,
+    create_db_connection,
+    create_db_engine,
+    get_db_connection,
+)
+from models import Task
+from models.base_model import BaseModel
+from services.task_cache import TaskCache, get_task_cache
+
+
+async def create_file_engine(directory: str) -> AsyncEngine:
+    engine = create_db_engine(
+        "sqlite+aiosqlite:///"
+        + os.path.join(directory, "test.sqlite")
+    )
+    async with engine.begin() as connection:
+        await connection.run_sync(
+            BaseModel.metadata.create_all
+        )
+    return engine
+
+
+def open_sessions(engine: AsyncEngine) -> list:
+    gc.collect()
+    return [
+        session
+        for session in list(_sessions.values())
+        if session.bind is engine.sync_engine
+        and session.in_transaction()
+    ]
+
+
+class TestDbConnectionTransaction(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__engine = await create_file_engine(
+            self.__directory.name
+        )
+        get_db = create_db_connection(
+            async_sessionmaker(
+                bind=self.__engine, expire_on_commit=False
+            )
+        )
+        self.__callbacks = []
+        self.__app = FastAPI()
+
+        async def callback():
+            self.__callbacks.append("after_commit")
+
+        @self.__app.post("/ok")
+        async def create_ok(
+            db: AsyncSession = Depends(
+                get_db, scope="function"
+            ),
+        ):
+            await db.execute(
+                insert(Task).values(
+                    title="title", due_date=date.today()
+                )
+            )
+            after_commit(db, callback)
+
+        @self.__app.post("/error")
+        async def create_error(
+            db: AsyncSession = Depends(
+                get_db, scope="function"
+            ),
+        ):
+            await db.execute(
+                insert(Task).values(
+                    title="title", due_date=date.today()
+                )
+            )
+            after_commit(db, callback)
+            raise HTTPException(status_code=409)
+
+        @self.__app.get("/read")
+        async def read(
+            db: AsyncSession = Depends(
+                get_db, scope="function"
+            ),
+        ):
+            return {
+                "count": await db.scalar(
+                    select(func.count(Task.id))
+                )
+            }
+
+        self.__client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.__app),
+            base_url="http://test",
+        )
+
+    async def asyncTearDown(self):
+        await self.__client.aclose()
+        await self.__engine.dispose()
+        self.__directory.cleanup()
+
+    async def count_tasks(self) -> int:
+        async with self.__engine.connect() as connection:
+            return await connection.scalar(
+                select(func.count(Task.id))
+            )
+
+    async def test_success__should_commit_before_response(
+        self,
+    ):
+        # act
+        response = await self.__client.post("/ok")
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await self.count_tasks(), 1)
+        self.assertEqual(self.__callbacks, ["after_commit"])
+
+    async def test_error__should_rollback(self):
+        # act
+        response = await self.__client.post("/error")
+
+        # assert - изменения и callback отменены
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(await self.count_tasks(), 0)
+        self.assertEqual(self.__callbacks, [])
+
+    async def test_get__should_read_without_commit(self):
+        # arrange
+        await self.__client.post("/ok")
+
+        # act
+        response = await self.__client.get("/read")
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 1)
+        self.assertEqual(open_sessions(self.__engine), [])
+        self.assertEqual(
+            self.__engine.sync_engine.pool.checkedout(), 0
+        )
+
+
+class TestDbConnectionLeaks(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        # Конкурентные транзакции записи ждут блокировку SQLite,
+        # а не завершаются "database is locked".
+        with patch.object(
+            settings, "db_sqlite_busy_timeout", 60000
+        ):
+            self.__engine = await create_file_engine(
+                self.__directory.name
+            )
+        app.dependency_overrides[get_db_connection] = (
+            create_db_connection(
+                async_sessionmaker(
+                    bind=self.__engine,
+                    autoflush=False,
+                    expire_on_commit=False,
+                )
+            )
+        )
+        # без кэша каждый GET обращается к БД
+        app.dependency_overrides[get_task_cache] = lambda: (
+            self.__task_cache
+        )
+        self.__task_cache = TaskCache(None)
+        self.__client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        )
+
+    async def asyncTearDown(self):
+        await self.__client.aclose()
+        app.dependency_overrides.clear()
+        await self.__engine.dispose()
+        self.__directory.cleanup()
+
+    async def test_concurrent_requests__should_release_sessions(
+        self,
+    ):
+        # arrange
+        today = date.today()
+
+        async def client(number: int) -> None:
+            due_date = (
+                today + timedelta(days=number % 7)
+            ).isoformat()
+            response = await self.__client.post(
+                "/v1/tasks/",
+                json={
+                    "title": "title",
+                    "due_date": due_date,
+                },
+            )
+            task_id = response.json()["id"]
+            await self.__client.get(
+                "/v1/tasks/", params={"date": due_date}
+            )
+            await self.__client.get(
+                "/v1/tasks/",
+                params={"date": due_date, "stream": True},
+            )
+            # ошибки откатывают транзакцию запроса
+            await self.__client.put(
+                "/v1/tasks/0", json={"title": "title"}
+            )
+            await self.__client.get(
+                "/v1/tasks/", params={"date": "не дата"}
+            )
+            if number % 2:
+                await self.__client.delete(
+                    f"/v1/tasks/{task_id}"
+                )
+
+        # act
+        await asyncio.gather(*map(client, range(20)))
+
+        # assert
+        self.assertEqual(open_sessions(self.__engine), [])
+        self.assertEqual(
+            self.__engine.sync_engine.pool.checkedout(), 0
+        )
+        async with self.__engine.connect() as connection:
+            self.assertEqual(
+                await connection.scalar(
+                    select(func.count(Task.id))
+                ),
+                10,
+            )
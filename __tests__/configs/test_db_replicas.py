@@ -0,0 +1,267 @@
+import os
+import tempfile
+from datetime import date
+from typing import Optional
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+import httpx
+from main import app
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+)
+
+from configs.database import (
+    ReplicaSet,
+    create_db_connection,
+    create_db_engine,
+    get_db_connection,
+)
+from models import Task
+from models.base_model import BaseModel
+from services.task_cache import (
+    MemoryCacheBackend,
+    TaskCache,
+    get_task_cache,
+)
+
+
+async def create_sqlite_engine(
+    path: str, title: str
+) -> AsyncEngine:
+    """
+    Создать БД SQLite с одной задачей title, по которой видно,
+    из какой БД прочитан ответ.
+    """
+    engine = create_db_engine("sqlite+aiosqlite:///" + path)
+    async with engine.begin() as connection:
+        await connection.run_sync(
+            BaseModel.metadata.create_all
+        )
+        await connection.execute(
+            insert(Task).values(
+                title=title, due_date=date(2030, 1, 1)
+            )
+        )
+    return engine
+
+
+class TestReplicaSet(TestCase):
+    def test_choose__should_round_robin(self):
+        # arrange
+        engines = [object(), object(), object()]
+        replica_set = ReplicaSet(engines, retry_interval=60)
+
+        # act
+        chosen = [replica_set.choose() for _ in range(6)]
+
+        # assert
+        self.assertEqual(chosen, engines * 2)
+
+    def test_choose__failed__should_skip(self):
+        # arrange
+        engines = [object(), object()]
+        replica_set = ReplicaSet(engines, retry_interval=60)
+        replica_set.mark_failed(engines[0])
+
+        # act
+        chosen = [replica_set.choose() for _ in range(3)]
+
+        # assert
+        self.assertEqual(chosen, [engines[1]] * 3)
+
+    def test_choose__all_failed__should_none(self):
+        # arrange
+        engines = [object()]
+        replica_set = ReplicaSet(engines, retry_interval=60)
+        replica_set.mark_failed(engines[0])
+
+        # act & assert
+        self.assertIsNone(replica_set.choose())
+
+    def test_choose__retry_interval_passed__should_return(
+        self,
+    ):
+        # arrange
+        engines = [object()]
+        replica_set = ReplicaSet(engines, retry_interval=0)
+        replica_set.mark_failed(engines[0])
+
+        # act & assert
+        self.assertIs(replica_set.choose(), engines[0])
+
+
+class TestReplicaRouting(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__primary = await create_sqlite_engine(
+            os.path.join(
+                self.__directory.name, "primary.sqlite"
+            ),
+            "primary",
+        )
+        self.__replicas = [
+            await create_sqlite_engine(
+                os.path.join(
+                    self.__directory.name,
+                    f"replica{i}.sqlite",
+                ),
+                f"replica {i}",
+            )
+            for i in (1, 2)
+        ]
+        self.__task_cache = TaskCache(None)
+        app.dependency_overrides[get_task_cache] = lambda: (
+            self.__task_cache
+        )
+
+    async def asyncTearDown(self):
+        await self.__client.aclose()
+        app.dependency_overrides.clear()
+        for engine in [self.__primary, *self.__replicas]:
+            await engine.dispose()
+        self.__directory.cleanup()
+
+    def use_replicas(
+        self, replicas: list, sticky_window: float = 0
+    ) -> None:
+        app.dependency_overrides[get_db_connection] = (
+            create_db_connection(
+                async_sessionmaker(
+                    bind=self.__primary,
+                    autoflush=False,
+                    expire_on_commit=False,
+                ),
+                ReplicaSet(replicas, retry_interval=60),
+                sticky_window,
+            )
+        )
+        self.__client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(
+                app=app, raise_app_exceptions=False
+            ),
+            base_url="http://test",
+        )
+
+    async def get_titles(
+        self, client: Optional[httpx.AsyncClient] = None
+    ) -> list:
+        response = await (client or self.__client).get(
+            "/v1/tasks/", params={"date": "2030-01-01"}
+        )
+        if response.status_code != 200:
+            return [response.status_code]
+        return [task["title"] for task in response.json()]
+
+    async def test_get__should_round_robin_replicas(self):
+        # arrange
+        self.use_replicas(self.__replicas)
+
+        # act
+        titles = [await self.get_titles() for _ in range(4)]
+
+        # assert
+        self.assertEqual(
+            titles,
+            [["replica 1"], ["replica 2"]] * 2,
+        )
+
+    async def test_post__should_write_primary(self):
+        # arrange
+        self.use_replicas(self.__replicas)
+
+        # act
+        response = await self.__client.post(
+            "/v1/tasks/",
+            json={"title": "new", "due_date": "2030-01-01"},
+        )
+
+        # assert - запись в основную БД, реплики не изменились
+        self.assertEqual(response.status_code, 201)
+        self.__client.cookies.clear()
+        self.assertEqual(
+            await self.get_titles(), ["replica 1"]
+        )
+        self.assertEqual(
+            await self.get_titles(), ["replica 2"]
+        )
+
+    async def test_get__after_post__should_read_primary(
+        self,
+    ):
+        # arrange
+        self.use_replicas(self.__replicas, sticky_window=60)
+
+        # act
+        await self.__client.post(
+            "/v1/tasks/",
+            json={"title": "new", "due_date": "2030-01-01"},
+        )
+        titles = await self.get_titles()
+
+        # assert - клиент видит собственную запись
+        self.assertEqual(titles, ["primary", "new"])
+
+    async def test_get__after_post__should_bypass_stale_cache(
+        self,
+    ):
+        # arrange - реплика отстает: новой задачи в ней нет
+        self.__task_cache = TaskCache(
+            MemoryCacheBackend(max_entries=100, ttl=60)
+        )
+        self.use_replicas(
+            self.__replicas[:1], sticky_window=60
+        )
+        await self.__client.post(
+            "/v1/tasks/",
+            json={"title": "new", "due_date": "2030-01-01"},
+        )
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        ) as other:
+            # Другой клиент заполняет кэш выборкой из реплики
+            stale = await other.get(
+                "/v1/tasks/", params={"date": "2030-01-01"}
+            )
+
+        # act
+        titles = await self.get_titles()
+        response = await self.__client.get(
+            "/v1/tasks/",
+            params={"date": "2030-01-01"},
+            headers={
+                "If-None-Match": stale.headers["ETag"]
+            },
+        )
+
+        # assert - клиент видит собственную запись
+        self.assertEqual(
+            [task["title"] for task in stale.json()],
+            ["replica 1"],
+        )
+        self.assertEqual(titles, ["primary", "new"])
+        self.assertEqual(response.status_code, 200)
+
+    async def test_get__failed_replica__should_evict(self):
+        # arrange
+        failed = create_db_engine(
+            "sqlite+aiosqlite:///"
+            + os.path.join(
+                self.__directory.name,
+                "missing",
+                "db.sqlite",
+            )
+        )
+        self.use_replicas([failed, self.__replicas[0]])
+
+        # act
+        titles = [await self.get_titles() for _ in range(3)]
+        await failed.dispose()
+
+        # assert - после первой ошибки реплика исключена
+        self.assertEqual(
+            titles,
+            [[500], ["replica 1"], ["replica 1"]],
+        )
@@ -0,0 +1,55 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from main import app
+
+from configs import settings
+from configs.openapi import (
+    dump_openapi_schema,
+    load_openapi_schema,
+)
+
+
+class TestOpenApiSchema(TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = os.path.join(
+            self.__directory.name, "openapi.json"
+        )
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def test_load__dumped_schema__should_equal_app_schema(
+        self,
+    ):
+        # arrange
+        dump_openapi_schema(app, self.__path)
+
+        # act
+        schema = load_openapi_schema(self.__path)
+
+        # assert
+        self.assertEqual(schema, app.openapi())
+
+    def test_load__other_api_version__should_none(self):
+        # arrange - схема собрана для прежней версии API
+        dump_openapi_schema(app, self.__path)
+
+        # act
+        with patch.object(settings, "api_version", "0.0.1"):
+            schema = load_openapi_schema(self.__path)
+
+        # assert
+        self.assertIsNone(schema)
+
+    def test_load__missing_file__should_none(self):
+        # arrange
+
+        # act
+        schema = load_openapi_schema(self.__path)
+
+        # assert
+        self.assertIsNone(schema)
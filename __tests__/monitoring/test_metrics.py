@@ -0,0 +1,233 @@
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+import httpx
+from __mocks__.database import (
+    create_test_db_connection,
+    create_test_engine,
+)
+from main import app
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from configs.database import (
+    create_db_engine,
+    get_db_connection,
+)
+from monitoring.metrics import (
+    Gauge,
+    Histogram,
+    db_pool_checkout_duration,
+    db_query_duration,
+    db_request_queries,
+    http_request_duration,
+    request_statements,
+)
+from services.task_cache import TaskCache, get_task_cache
+
+
+def count(histogram: Histogram, *label_values: str) -> int:
+    series = histogram.series.get(label_values)
+    return sum(series[:-1]) if series else 0
+
+
+class TestHistogram(TestCase):
+    def test_render__should_cumulative_buckets(self):
+        # arrange
+        histogram = Histogram(
+            "test_seconds", "Тест.", ("route",), (0.1, 1.0)
+        )
+
+        # act
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value, '/a"b')
+        lines = histogram.render()
+
+        # assert
+        self.assertEqual(
+            lines,
+            [
+                "# HELP test_seconds Тест.",
+                "# TYPE test_seconds histogram",
+                'test_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+                'test_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+                'test_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+                'test_seconds_sum{route="/a\\"b"} 5.65',
+                'test_seconds_count{route="/a\\"b"} 4',
+            ],
+        )
+
+
+class TestGauge(TestCase):
+    def test_render__should_last_value(self):
+        # arrange
+        gauge = Gauge("test_pending", "Тест.")
+
+        # act
+        gauge.inc(5)
+        gauge.set(2.0)
+        lines = gauge.render()
+
+        # assert
+        self.assertEqual(
+            lines,
+            [
+                "# HELP test_pending Тест.",
+                "# TYPE test_pending gauge",
+                "test_pending 2.0",
+            ],
+        )
+
+
+class TestMetricsMiddleware(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.__engine = await create_test_engine()
+        app.dependency_overrides[get_db_connection] = (
+            create_test_db_connection(self.__engine)
+        )
+        app.dependency_overrides[get_task_cache] = lambda: (
+            TaskCache(None)
+        )
+        self.__client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+        )
+
+    async def asyncTearDown(self):
+        await self.__client.aclose()
+        app.dependency_overrides.clear()
+        await self.__engine.dispose()
+
+    async def test_request__should_observe_route_template(
+        self,
+    ):
+        # arrange
+        before = count(
+            http_request_duration,
+            "PUT",
+            "/v1/tasks/{task_id}",
+            "404",
+        )
+
+        # act
+        await self.__client.put(
+            "/v1/tasks/999", json={"title": "title"}
+        )
+
+        # assert
+        self.assertEqual(
+            count(
+                http_request_duration,
+                "PUT",
+                "/v1/tasks/{task_id}",
+                "404",
+            ),
+            before + 1,
+        )
+
+    async def test_request__should_observe_db_queries(self):
+        # arrange
+        before_requests = count(
+            db_request_queries, "GET", "/v1/tasks/"
+        )
+        before_queries = count(
+            db_query_duration,
+            "TaskRepository.get_rows_by_period",
+        )
+
+        # act
+        await self.__client.get(
+            "/v1/tasks/", params={"week": "true"}
+        )
+
+        # assert - один запрос выборки, учтенный по методу
+        self.assertEqual(
+            count(db_request_queries, "GET", "/v1/tasks/"),
+            before_requests + 1,
+        )
+        self.assertEqual(
+            count(
+                db_query_duration,
+                "TaskRepository.get_rows_by_period",
+            ),
+            before_queries + 1,
+        )
+
+    async def test_get_metrics__should_prometheus_text(
+        self,
+    ):
+        # arrange
+        await self.__client.get("/v1/tasks/")
+
+        # act
+        response = await self.__client.get("/metrics")
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers["content-type"].startswith(
+                "text/plain; version=0.0.4"
+            )
+        )
+        self.assertIn(
+            "# TYPE todo_api_http_request_duration_seconds"
+            " histogram",
+            response.text,
+        )
+
+
+class TestPoolMetrics(IsolatedAsyncioTestCase):
+    async def test_checkout__should_observe_wait(self):
+        # arrange
+        before = count(db_pool_checkout_duration)
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_db_engine(
+                "sqlite+aiosqlite:///"
+                + os.path.join(directory, "test.sqlite")
+            )
+
+            # act
+            try:
+                async with engine.connect() as connection:
+                    await connection.execute(
+                        text("SELECT 1")
+                    )
+            finally:
+                await engine.dispose()
+
+        # assert
+        self.assertEqual(
+            count(db_pool_checkout_duration), before + 1
+        )
+
+
+class TestQueryMetrics(IsolatedAsyncioTestCase):
+    async def test_failed_statement__should_not_shift_durations(
+        self,
+    ):
+        # arrange
+        engine = await create_test_engine()
+        statements = []
+        token = request_statements.set(statements)
+
+        # act
+        try:
+            async with engine.connect() as connection:
+                with self.assertRaises(OperationalError):
+                    await connection.execute(
+                        text("SELECT * FROM missing")
+                    )
+                await asyncio.sleep(0.2)
+                await connection.execute(text("SELECT 1"))
+        finally:
+            request_statements.reset(token)
+            await engine.dispose()
+
+        # assert - учтен только успешный запрос, и его время
+        # отсчитывается от его начала
+        [(statement, duration)] = statements
+        self.assertEqual(statement, "SELECT 1")
+        self.assertLess(duration, 0.1)
@@ -0,0 +1,229 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+import httpx
+from __mocks__.database import (
+    create_test_db_connection,
+    create_test_engine,
+)
+from main import app
+
+from configs import settings
+from configs.database import get_db_connection
+from monitoring.profiler import (
+    ProfilerMiddleware,
+    ProfileStore,
+    get_profile_store,
+)
+from services.task_cache import TaskCache, get_task_cache
+
+
+class TestProfilerMiddleware(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.__engine = await create_test_engine()
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__store = ProfileStore(
+            self.__directory.name, max_reports=3
+        )
+        app.dependency_overrides[get_db_connection] = (
+            create_test_db_connection(self.__engine)
+        )
+        app.dependency_overrides[get_task_cache] = lambda: (
+            TaskCache(None)
+        )
+        app.dependency_overrides[get_profile_store] = (
+            lambda: (self.__store)
+        )
+
+    async def asyncTearDown(self):
+        app.dependency_overrides.clear()
+        await self.__engine.dispose()
+        self.__directory.cleanup()
+
+    def client(self, **options) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(
+                app=ProfilerMiddleware(
+                    app, store=self.__store, **options
+                )
+            ),
+            base_url="http://test",
+        )
+
+    async def test_slow_request__should_save_report(self):
+        # arrange
+        async with self.client(
+            enabled=True, sample_rate=1.0, slow_threshold=0
+        ) as client:
+            # act
+            await client.get(
+                "/v1/tasks/", params={"week": "true"}
+            )
+
+        # assert - профиль и SQL-запросы выборки
+        [summary] = self.__store.list()
+        report = self.__store.load(summary["id"])
+        self.assertEqual(report["path"], "/v1/tasks/")
+        self.assertEqual(report["status"], 200)
+        self.assertTrue(report["profiled"])
+        self.assertIn("task_service.py", report["profile"])
+        self.assertEqual(len(report["statements"]), 1)
+        self.assertTrue(
+            report["statements"][0]["sql"].startswith(
+                "SELECT"
+            )
+        )
+
+    async def test_fast_request__should_not_save(self):
+        # arrange
+        async with self.client(
+            enabled=True, sample_rate=1.0, slow_threshold=60
+        ) as client:
+            # act
+            await client.get("/v1/tasks/")
+
+        # assert
+        self.assertEqual(self.__store.list(), [])
+
+    async def test_reports__should_keep_last(self):
+        # arrange
+        async with self.client(
+            enabled=True, sample_rate=0, slow_threshold=0
+        ) as client:
+            # act
+            for _ in range(5):
+                await client.get("/v1/tasks/")
+
+        # assert - кольцевой буфер из трех отчетов
+        reports = self.__store.list()
+        self.assertEqual(len(reports), 3)
+        self.assertFalse(reports[0]["profiled"])
+
+    async def test_disabled__header__should_profile(self):
+        # arrange
+        async with self.client(
+            enabled=False, slow_threshold=60, token="secret"
+        ) as client:
+            # act
+            await client.get("/v1/tasks/")
+            await client.get(
+                "/v1/tasks/", headers={"X-Profile": "wrong"}
+            )
+            await client.get(
+                "/v1/tasks/",
+                headers={"X-Profile": "secret"},
+            )
+
+        # assert - только запрос с верным токеном
+        [report] = self.__store.list()
+        self.assertTrue(report["profiled"])
+
+    async def test_non_ascii_header__should_not_profile(
+        self,
+    ):
+        # arrange
+        async with self.client(
+            enabled=False, slow_threshold=60, token="secret"
+        ) as client:
+            # act
+            response = await client.get(
+                "/v1/tasks/",
+                headers=[
+                    (b"X-Profile", "é".encode("latin-1"))
+                ],
+            )
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.__store.list(), [])
+
+    async def test_admin__non_ascii_token__should_403(self):
+        # act
+        with patch.object(
+            settings, "profiling_token", "secret"
+        ):
+            async with self.client(enabled=False) as client:
+                response = await client.get(
+                    "/v1/admin/profiles/",
+                    headers=[
+                        (
+                            b"X-Admin-Token",
+                            "é".encode("latin-1"),
+                        )
+                    ],
+                )
+
+        # assert
+        self.assertEqual(response.status_code, 403)
+
+    async def test_admin__should_list_and_download(self):
+        # arrange
+        async with self.client(
+            enabled=True, sample_rate=0, slow_threshold=0
+        ) as client:
+            await client.get("/v1/tasks/")
+
+        # act
+        with patch.object(
+            settings, "profiling_token", "secret"
+        ):
+            async with self.client(enabled=False) as client:
+                forbidden = await client.get(
+                    "/v1/admin/profiles/"
+                )
+                listing = await client.get(
+                    "/v1/admin/profiles/",
+                    headers={"X-Admin-Token": "secret"},
+                )
+                report_id = listing.json()[0]["id"]
+                download = await client.get(
+                    f"/v1/admin/profiles/{report_id}",
+                    headers={"X-Admin-Token": "secret"},
+                )
+                missing = await client.get(
+                    "/v1/admin/profiles/../../etc",
+                    headers={"X-Admin-Token": "secret"},
+                )
+
+        # assert
+        self.assertEqual(forbidden.status_code, 403)
+        self.assertEqual(listing.status_code, 200)
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download.json()["id"], report_id)
+        self.assertEqual(missing.status_code, 404)
+
+
+class TestProfilerSettings(TestCase):
+    def test_import_main__profiling_enabled__should_add_middleware(
+        self,
+    ):
+        # arrange
+        code = (
+            "import main;"
+            "print([m.cls.__name__ for m in main.app.user_middleware])"
+        )
+
+        # act
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(
+                os.path.dirname(
+                    os.path.dirname(
+                        os.path.abspath(__file__)
+                    )
+                )
+            ),
+            env={**os.environ, "TODO_API_PROFILING": "1"},
+            capture_output=True,
+            text=True,
+        )
+
+        # assert
+        self.assertEqual(
+            result.returncode, 0, result.stderr
+        )
+        self.assertIn("ProfilerMiddleware", result.stdout)
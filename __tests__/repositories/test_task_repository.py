@@ -1,52 +1,92 @@
 from datetime import date
-from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
 from unittest.mock import create_autospec, patch
 
-from sqlalchemy.orm import Session
+from sqlalchemy import ScalarResult
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import Task
-from repositories.task_repository import TaskRepository
+from repositories.task_repository import (
+    TaskNotFoundException,
+    TaskRepository,
+)
 
 
-class TestTaskRepository(TestCase):
-    __session: Session
+class TestTaskRepository(IsolatedAsyncioTestCase):
+    __session: AsyncSession
     __task_repository: TaskRepository
 
     def setUp(self):
         super().setUp()
-        self.__session = create_autospec(Session)
+        self.__session = create_autospec(AsyncSession)
         self.__task_repository = TaskRepository(
-            self.__session
+            self.__session, owner_id=1
         )
 
     @patch("models.task_model.Task", autospec=True)
-    def test_create(self, Task):
+    async def test_create(self, Task):
         # arrange
         task = Task(title="title")
 
         # act
-        self.__task_repository.create(task)
+        await self.__task_repository.create(task)
 
         # assert - должен вызваться метод add в Session с переданным task
         self.__session.add.assert_called_once_with(task)
+        self.__session.flush.assert_awaited_once()
+        # транзакцию фиксирует зависимость get_db_connection
+        self.__session.commit.assert_not_awaited()
 
     @patch("models.task_model.Task", autospec=True)
-    def test_delete__should_get_called(self, mock_task):
+    async def test_delete__should_get_called(
+        self, mock_task
+    ):
         # arrange
         task_id = 1
         task = mock_task(id=task_id)
+        self.__session.scalar.return_value = task
 
         # act
-        self.__task_repository.delete(task_id)
+        result = await self.__task_repository.delete(
+            task_id
+        )
 
-        # assert
-        self.__session.query(
-            Task
-        ).get.assert_called_once_with(task_id)
-        self.__session.delete.assert_called_once()
+        # assert - удаление одним выражением DELETE ... RETURNING
+        self.__session.scalar.assert_awaited_once()
+        self.__session.get.assert_not_called()
+        self.__session.commit.assert_not_awaited()
+        self.assertEqual(result, task)
+
+    async def test_delete__not_found__should_exception(
+        self,
+    ):
+        # arrange
+        self.__session.scalar.return_value = None
+
+        # act & assert
+        with self.assertRaises(TaskNotFoundException):
+            await self.__task_repository.delete(1)
+        self.__session.commit.assert_not_awaited()
+
+    async def test_update__not_found__should_exception(
+        self,
+    ):
+        # arrange
+        self.__session.scalar.return_value = None
+
+        # act & assert
+        with self.assertRaises(TaskNotFoundException):
+            await self.__task_repository.update(
+                Task(
+                    id=1,
+                    title="title",
+                    due_date=date.today(),
+                )
+            )
+        self.__session.commit.assert_not_awaited()
 
     @patch("models.task_model.Task", autospec=True)
-    def test_get_by_period(self, mock_task):
+    async def test_get_by_period(self, mock_task):
         # arrange
         start_date = date(2023, 1, 1)
         end_date = date(2023, 1, 31)
@@ -64,15 +104,17 @@ class TestTaskRepository(TestCase):
                 due_date=date(2023, 1, 20),
             ),
         ]
-        self.__session.query.return_value.filter.return_value.all.return_value = (
-            tasks
+        result = create_autospec(
+            ScalarResult, instance=True
         )
+        result.all.return_value = tasks
+        self.__session.scalars.return_value = result
 
         # act
-        result = self.__task_repository.get_by_period(
+        result = await self.__task_repository.get_by_period(
             start_date, end_date
         )
 
         # assert
-        self.__session.query.assert_called_once_with(Task)
+        self.__session.scalars.assert_awaited_once()
         self.assertEqual(result, tasks)
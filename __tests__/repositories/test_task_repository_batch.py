@@ -0,0 +1,165 @@
+from datetime import date
+from unittest import IsolatedAsyncioTestCase
+
+from __mocks__.database import (
+    StatementRecorder,
+    create_test_engine,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from models import Task
+from repositories.task_repository import (
+    TaskRepository,
+    TaskVersionConflictException,
+)
+
+
+class TestTaskRepositoryBatch(IsolatedAsyncioTestCase):
+    __engine: AsyncEngine
+    __session: AsyncSession
+    __task_repository: TaskRepository
+
+    async def asyncSetUp(self):
+        self.__engine = await create_test_engine()
+        self.__session = AsyncSession(
+            self.__engine, expire_on_commit=False
+        )
+        self.__task_repository = TaskRepository(
+            self.__session, owner_id=1
+        )
+
+    async def asyncTearDown(self):
+        await self.__session.close()
+        await self.__engine.dispose()
+
+    async def test_create_many__should_single_insert(self):
+        # arrange
+        tasks = [
+            Task(
+                title=f"Задача {i}",
+                due_date=date(2030, 1, 1),
+            )
+            for i in range(100)
+        ]
+
+        # act
+        with StatementRecorder(self.__engine) as recorder:
+            created = (
+                await self.__task_repository.create_many(
+                    tasks
+                )
+            )
+
+        # assert - один INSERT, идентификаторы в порядке передачи
+        inserts = [
+            statement
+            for statement, _ in recorder.statements
+            if statement.startswith("INSERT")
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            [task.title for task in created],
+            [task.title for task in tasks],
+        )
+        self.assertEqual(
+            [task.id for task in created],
+            list(range(1, 101)),
+        )
+
+    async def test_update_many__should_skip_unknown_ids(
+        self,
+    ):
+        # arrange
+        await self.__task_repository.create_many(
+            [
+                Task(
+                    title="Задача",
+                    due_date=date(2030, 1, 1),
+                )
+            ]
+        )
+
+        # act
+        updated = await self.__task_repository.update_many(
+            [
+                Task(
+                    id=1,
+                    title="Новая задача",
+                    due_date=date(2030, 1, 2),
+                ),
+                Task(
+                    id=2,
+                    title="Несуществующая задача",
+                    due_date=date(2030, 1, 2),
+                ),
+            ]
+        )
+        tasks = await self.__task_repository.get_by_period(
+            date(2030, 1, 1), date(2030, 1, 31)
+        )
+
+        # assert
+        self.assertEqual(updated, {1})
+        self.assertEqual(
+            [(task.id, task.title) for task in tasks],
+            [(1, "Новая задача")],
+        )
+
+    async def test_update_many__should_increment_version(
+        self,
+    ):
+        # arrange
+        await self.__task_repository.create_many(
+            [
+                Task(
+                    title="Задача",
+                    due_date=date(2030, 1, 1),
+                )
+            ]
+        )
+
+        # act
+        await self.__task_repository.update_many(
+            [
+                Task(
+                    id=1,
+                    title="Новая задача",
+                    due_date=date(2030, 1, 1),
+                )
+            ]
+        )
+
+        # assert - версия задачи из пакета проверяется If-Match
+        with self.assertRaises(
+            TaskVersionConflictException
+        ):
+            await self.__task_repository.update(
+                Task(
+                    id=1,
+                    title="Задача",
+                    due_date=date(2030, 1, 1),
+                ),
+                versions={1},
+            )
+
+    async def test_delete_many__should_return_deleted_ids(
+        self,
+    ):
+        # arrange
+        await self.__task_repository.create_many(
+            [
+                Task(
+                    title="Задача",
+                    due_date=date(2030, 1, 1),
+                )
+                for _ in range(3)
+            ]
+        )
+
+        # act
+        deleted = await self.__task_repository.delete_many(
+            [1, 3, 5]
+        )
+
+        # assert
+        self.assertEqual(deleted, {1, 3})
@@ -0,0 +1,124 @@
+from datetime import date
+from unittest import IsolatedAsyncioTestCase
+
+from __mocks__.database import (
+    StatementRecorder,
+    create_test_engine,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from repositories.task_repository import TaskRepository
+
+
+class TestTaskRepositoryQueryPlan(IsolatedAsyncioTestCase):
+    __engine: AsyncEngine
+    __session: AsyncSession
+
+    async def asyncSetUp(self):
+        self.__engine = await create_test_engine()
+        self.__session = AsyncSession(self.__engine)
+
+    async def asyncTearDown(self):
+        await self.__session.close()
+        await self.__engine.dispose()
+
+    async def test_get_by_period__should_search_by_due_date_index(
+        self,
+    ):
+        # arrange
+        task_repository = TaskRepository(
+            self.__session, owner_id=1
+        )
+
+        # act
+        with StatementRecorder(self.__engine) as recorder:
+            await task_repository.get_by_period(
+                date(2023, 1, 1), date(2023, 1, 31)
+            )
+        statement, parameters = recorder.statements[-1]
+        async with self.__engine.connect() as connection:
+            plan = await connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}",
+                parameters,
+            )
+            details = [row[-1] for row in plan]
+
+        # assert - выборка по индексу, а не полный просмотр таблицы
+        self.assertTrue(
+            any(
+                "ix_task_owner_due_date_id" in d
+                for d in details
+            ),
+            details,
+        )
+        self.assertFalse(
+            any(d.startswith("SCAN") for d in details),
+            details,
+        )
+
+    async def test_count_by_day__should_use_covering_index(
+        self,
+    ):
+        # arrange
+        task_repository = TaskRepository(
+            self.__session, owner_id=1
+        )
+
+        # act
+        with StatementRecorder(self.__engine) as recorder:
+            await task_repository.count_by_day(
+                date(2023, 1, 1), date(2023, 1, 31)
+            )
+        statement, parameters = recorder.statements[-1]
+        async with self.__engine.connect() as connection:
+            plan = await connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}",
+                parameters,
+            )
+            details = [row[-1] for row in plan]
+
+        # assert - группировка по индексу без чтения таблицы
+        # и без временного B-дерева для GROUP BY
+        self.assertTrue(
+            any(
+                "COVERING INDEX ix_task_owner_due_date_id"
+                in d
+                for d in details
+            ),
+            details,
+        )
+        self.assertFalse(
+            any("TEMP B-TREE" in d for d in details),
+            details,
+        )
+
+    async def test_search__should_use_fts_index(self):
+        # arrange
+        task_repository = TaskRepository(
+            self.__session, owner_id=1
+        )
+
+        # act
+        with StatementRecorder(self.__engine) as recorder:
+            await task_repository.search(
+                "молоко", None, None, 10
+            )
+        statement, parameters = recorder.statements[-1]
+        async with self.__engine.connect() as connection:
+            plan = await connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}",
+                parameters,
+            )
+            details = [row[-1] for row in plan]
+
+        # assert - поиск по FTS5, задачи читаются по первичному ключу
+        self.assertTrue(
+            any(
+                "VIRTUAL TABLE INDEX" in d for d in details
+            ),
+            details,
+        )
+        self.assertFalse(
+            any(d == "SCAN task" for d in details),
+            details,
+        )
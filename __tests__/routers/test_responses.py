@@ -0,0 +1,55 @@
+from datetime import date
+from unittest import TestCase
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from models.task_model import Task
+from repositories.task_repository import task_columns
+from routers.responses import ORJSONResponse, dumps
+
+
+class TestResponses(TestCase):
+    def test_dumps_row(self):
+        # arrange
+        engine = create_engine("sqlite://")
+        Task.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.execute(
+                Task.__table__.insert(),
+                [
+                    {
+                        "id": 1,
+                        "title": "Задача",
+                        "description": "Описание",
+                        "due_date": date(2024, 1, 1),
+                    }
+                ],
+            )
+            row = session.execute(
+                select(*task_columns)
+            ).one()
+
+        # act
+        content = dumps([row])
+
+        # assert
+        self.assertEqual(
+            content,
+            '[{"id":1,"title":"Задача","description":"Описание",'
+            '"due_date":"2024-01-01"}]'.encode(),
+        )
+
+    def test_render_bytes_as_is(self):
+        # arrange
+        payload = b'[{"id":1}]'
+
+        # act
+        response = ORJSONResponse(payload)
+
+        # assert
+        self.assertEqual(response.body, payload)
+        self.assertEqual(
+            response.headers["content-type"],
+            "application/json",
+        )
@@ -0,0 +1,990 @@
+import asyncio
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+from __mocks__.database import (
+    RouterTestCase,
+    StatementRecorder,
+)
+from main import app
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models import Task
+from services.task_cache import TaskCache
+from services.task_write_queue import (
+    TaskJournal,
+    TaskWriteQueue,
+    get_task_write_queue,
+)
+
+
+class TestTaskRouterStatements(RouterTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        response = await self.client.post(
+            "/v1/tasks/",
+            json={
+                "title": "title",
+                "description": "description",
+            },
+        )
+        self.__task_id = response.json()["id"]
+
+    async def test_update__should_single_statement(self):
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            response = await self.client.put(
+                f"/v1/tasks/{self.__task_id}",
+                json={"title": "new title"},
+            )
+
+        # assert - только UPDATE ... RETURNING
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["title"], "new title"
+        )
+        self.assertEqual(len(recorder.statements), 1)
+        self.assertTrue(
+            recorder.statements[0][0].startswith("UPDATE")
+        )
+
+    async def test_update__not_found__should_404_single_statement(
+        self,
+    ):
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            response = await self.client.put(
+                "/v1/tasks/999", json={"title": "new title"}
+            )
+
+        # assert
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(recorder.statements), 1)
+
+    async def test_delete__should_single_statement(self):
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            response = await self.client.delete(
+                f"/v1/tasks/{self.__task_id}"
+            )
+
+        # assert - только DELETE ... RETURNING
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(recorder.statements), 1)
+        self.assertTrue(
+            recorder.statements[0][0].startswith("DELETE")
+        )
+
+    async def test_delete__not_found__should_404_single_statement(
+        self,
+    ):
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            response = await self.client.delete(
+                "/v1/tasks/999"
+            )
+
+        # assert
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            response.json(),
+            {
+                "msg": "Задача по идентификатору '999' не найдена"
+            },
+        )
+        self.assertEqual(len(recorder.statements), 1)
+
+    async def test_update__if_match__should_single_statement(
+        self,
+    ):
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            response = await self.client.put(
+                f"/v1/tasks/{self.__task_id}",
+                json={"title": "new title"},
+                headers={"If-Match": '"1"'},
+            )
+
+        # assert - условный UPDATE ... RETURNING, новая версия
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], '"2"')
+        self.assertEqual(len(recorder.statements), 1)
+        self.assertTrue(
+            recorder.statements[0][0].startswith("UPDATE")
+        )
+
+    async def test_update__stale_if_match__should_412(self):
+        # arrange - задачу изменил другой клиент
+        await self.client.put(
+            f"/v1/tasks/{self.__task_id}",
+            json={"title": "first"},
+            headers={"If-Match": '"1"'},
+        )
+
+        # act
+        response = await self.client.put(
+            f"/v1/tasks/{self.__task_id}",
+            json={"title": "second"},
+            headers={"If-Match": '"1"'},
+        )
+        tasks = await self.client.get(
+            "/v1/tasks/",
+            params={"date": date.today().isoformat()},
+        )
+
+        # assert - изменение первого клиента сохранилось
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.headers["ETag"], '"2"')
+        self.assertEqual(tasks.json()[0]["title"], "first")
+
+    async def test_delete__stale_if_match__should_412(self):
+        # arrange
+        await self.client.put(
+            f"/v1/tasks/{self.__task_id}",
+            json={"title": "new title"},
+        )
+
+        # act
+        stale = await self.client.delete(
+            f"/v1/tasks/{self.__task_id}",
+            headers={"If-Match": '"1"'},
+        )
+        current = await self.client.delete(
+            f"/v1/tasks/{self.__task_id}",
+            headers={"If-Match": stale.headers["ETag"]},
+        )
+
+        # assert
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(current.status_code, 200)
+
+    async def test_get_tasks__should_single_statement(self):
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            response = await self.client.get(
+                "/v1/tasks/",
+                params={"date": date.today().isoformat()},
+            )
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(recorder.statements), 1)
+
+
+class TestTaskRouterCache(RouterTestCase):
+    async def __get_week(self, week_start: date) -> list:
+        response = await self.client.get(
+            "/v1/tasks/",
+            params={
+                "week": "true",
+                "date": week_start.isoformat(),
+            },
+        )
+        return [task["title"] for task in response.json()]
+
+    async def test_get_tasks__repeated__should_not_query_db(
+        self,
+    ):
+        # arrange
+        week_start = date.today()
+        await self.__get_week(week_start)
+
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            titles = await self.__get_week(week_start)
+
+        # assert
+        self.assertEqual(titles, [])
+        self.assertEqual(recorder.statements, [])
+
+    async def test_get_tasks__concurrent_cold__should_single_query(
+        self,
+    ):
+        # arrange
+        week_start = date.today()
+
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            results = await asyncio.gather(
+                *(
+                    self.__get_week(week_start)
+                    for _ in range(100)
+                )
+            )
+
+        # assert - одна загрузка выборки на всех клиентов
+        self.assertEqual(results, [[]] * 100)
+        self.assertEqual(len(recorder.statements), 1)
+
+    async def test_update__moved_task__should_refresh_both_weeks(
+        self,
+    ):
+        # arrange
+        first_week = date.today()
+        second_week = first_week + timedelta(days=7)
+        response = await self.client.post(
+            "/v1/tasks/",
+            json={
+                "title": "title",
+                "due_date": first_week.isoformat(),
+            },
+        )
+        task_id = response.json()["id"]
+        self.assertEqual(
+            await self.__get_week(first_week), ["title"]
+        )
+        self.assertEqual(
+            await self.__get_week(second_week), []
+        )
+
+        # act
+        await self.client.put(
+            f"/v1/tasks/{task_id}",
+            json={
+                "title": "moved",
+                "due_date": second_week.isoformat(),
+            },
+        )
+
+        # assert
+        self.assertEqual(
+            await self.__get_week(first_week), []
+        )
+        self.assertEqual(
+            await self.__get_week(second_week), ["moved"]
+        )
+
+
+class TestTaskRouterDates(RouterTestCase):
+    async def test_get_tasks__basic_or_week_date__should_422(
+        self,
+    ):
+        for date_str in ("20240101", "2024-W01-1"):
+            with self.subTest(date_str=date_str):
+                # act
+                response = await self.client.get(
+                    "/v1/tasks/", params={"date": date_str}
+                )
+
+                # assert
+                self.assertEqual(response.status_code, 422)
+
+
+class TestTaskRouterCompression(RouterTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.__today = date.today()
+        async with self.engine.begin() as connection:
+            await connection.execute(
+                insert(Task),
+                [
+                    {
+                        "title": f"задача {i}",
+                        "description": "описание " * 10,
+                        "due_date": self.__today,
+                        "owner_id": 0,
+                    }
+                    for i in range(20)
+                ],
+            )
+
+    async def __get(
+        self, accept_encoding: str, **params
+    ) -> httpx.Response:
+        return await self.client.get(
+            "/v1/tasks/",
+            params=params,
+            headers={"Accept-Encoding": accept_encoding},
+        )
+
+    async def test_get_tasks__cached__should_reuse_compressed(
+        self,
+    ):
+        # arrange
+        await self.__get(
+            "gzip", date=self.__today.isoformat()
+        )
+
+        # act
+        with patch(
+            "services.task_cache.compress"
+        ) as compress:
+            response = await self.__get(
+                "gzip", date=self.__today.isoformat()
+            )
+
+        # assert
+        compress.assert_not_called()
+        self.assertEqual(
+            response.headers["Content-Encoding"], "gzip"
+        )
+        self.assertEqual(
+            response.headers["Vary"], "Accept-Encoding"
+        )
+        self.assertEqual(len(response.json()), 20)
+
+    async def test_get_tasks__identity_or_small__should_not_compress(
+        self,
+    ):
+        # arrange
+
+        # act
+        identity = await self.__get(
+            "identity", date=self.__today.isoformat()
+        )
+        small = await self.__get(
+            "gzip",
+            date=(self.__today + timedelta(1)).isoformat(),
+        )
+
+        # assert
+        self.assertNotIn(
+            "Content-Encoding", identity.headers
+        )
+        self.assertEqual(
+            identity.headers["Vary"], "Accept-Encoding"
+        )
+        self.assertEqual(len(identity.json()), 20)
+        # Vary не зависит от размера, как у ответа 304
+        self.assertNotIn("Content-Encoding", small.headers)
+        self.assertEqual(
+            small.headers["Vary"], "Accept-Encoding"
+        )
+
+    async def test_get_tasks_page__should_compress_in_middleware(
+        self,
+    ):
+        # arrange
+
+        # act
+        response = await self.__get(
+            "gzip",
+            date=self.__today.isoformat(),
+            limit=20,
+        )
+
+        # assert
+        self.assertEqual(
+            response.headers["Content-Encoding"], "gzip"
+        )
+        self.assertLess(
+            response.num_bytes_downloaded,
+            len(response.content),
+        )
+        self.assertEqual(len(response.json()["items"]), 20)
+
+
+class TestTaskRouterConditionalGet(RouterTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        response = await self.client.post(
+            "/v1/tasks/", json={"title": "title"}
+        )
+        self.__task_id = response.json()["id"]
+
+    async def __get_tasks(
+        self, etag=None
+    ) -> httpx.Response:
+        return await self.client.get(
+            "/v1/tasks/",
+            params={"week": "true"},
+            headers={"If-None-Match": etag} if etag else {},
+        )
+
+    async def test_get_tasks__matching_etag__should_304(
+        self,
+    ):
+        # arrange
+        etag = (await self.__get_tasks()).headers["ETag"]
+
+        # act
+        response = await self.__get_tasks(etag)
+
+        # assert - Vary совпадает с ответом 200
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(
+            response.headers["Vary"], "Accept-Encoding"
+        )
+
+    async def test_get_tasks__not_cached__should_304_without_loading_tasks(
+        self,
+    ):
+        # arrange
+        response = await self.__get_tasks()
+        self.assertIn("Last-Modified", response.headers)
+        etag = response.headers["ETag"]
+        self.task_cache = TaskCache(None)
+
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            response = await self.__get_tasks(etag)
+
+        # assert - ETag из агрегатного запроса совпадает с ETag выборки
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(recorder.statements), 1)
+        self.assertIn("count(", recorder.statements[0][0])
+
+    async def test_get_tasks__after_update__should_new_etag(
+        self,
+    ):
+        # arrange
+        etag = (await self.__get_tasks()).headers["ETag"]
+        await self.client.put(
+            f"/v1/tasks/{self.__task_id}",
+            json={"title": "new title"},
+        )
+
+        # act
+        response = await self.__get_tasks(etag)
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(
+            response.json()[0]["title"], "new title"
+        )
+
+    async def test_get_tasks__after_delete__should_new_etag(
+        self,
+    ):
+        # arrange
+        etag = (await self.__get_tasks()).headers["ETag"]
+        await self.client.delete(
+            f"/v1/tasks/{self.__task_id}"
+        )
+
+        # act
+        response = await self.__get_tasks(etag)
+
+        # assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+
+class TestTaskRouterSummary(RouterTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # 2030-01-06 - воскресенье, 2030-01-07 - понедельник
+        async with self.engine.begin() as connection:
+            await connection.execute(
+                insert(Task),
+                [
+                    {"title": "title", "due_date": due_date}
+                    for due_date in (
+                        date(2029, 12, 31),
+                        date(2030, 1, 6),
+                        date(2030, 1, 6),
+                        date(2030, 1, 7),
+                        date(2030, 2, 1),
+                        date(2030, 3, 1),
+                    )
+                ],
+            )
+
+    async def __get_summary(self, granularity: str):
+        return await self.client.get(
+            "/v1/tasks/summary",
+            params={
+                "start_date": "2030-01-01",
+                "end_date": "2030-02-28",
+                "granularity": granularity,
+            },
+        )
+
+    async def test_summary__day__should_single_statement(
+        self,
+    ):
+        # act
+        with StatementRecorder(self.engine) as recorder:
+            response = await self.__get_summary("day")
+
+        # assert - задачи вне периода не учитываются
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "granularity": "day",
+                "counts": {
+                    "2030-01-06": 2,
+                    "2030-01-07": 1,
+                    "2030-02-01": 1,
+                },
+            },
+        )
+        self.assertEqual(len(recorder.statements), 1)
+        self.assertIn("GROUP BY", recorder.statements[0][0])
+
+    async def test_summary__week__should_group_from_monday(
+        self,
+    ):
+        # act
+        response = await self.__get_summary("week")
+
+        # assert
+        self.assertEqual(
+            response.json()["counts"],
+            {
+                "2029-12-31": 2,
+                "2030-01-07": 1,
+                "2030-01-28": 1,
+            },
+        )
+
+    async def test_summary__month__should_group_by_month(
+        self,
+    ):
+        # act
+        response = await self.__get_summary("month")
+
+        # assert
+        self.assertEqual(
+            response.json()["counts"],
+            {"2030-01-01": 3, "2030-02-01": 1},
+        )
+
+    async def test_summary__invalid_granularity__should_422(
+        self,
+    ):
+        # act
+        response = await self.__get_summary("year")
+
+        # assert
+        self.assertEqual(response.status_code, 422)
+
+    async def test_summary__start_after_end__should_422(
+        self,
+    ):
+        # act
+        response = await self.client.get(
+            "/v1/tasks/summary",
+            params={
+                "start_date": "2030-02-01",
+                "end_date": "2030-01-01",
+            },
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 422)
+
+
+class TestTaskRouterSearch(RouterTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.__today = date.today()
+        self.__ids = {}
+        for days, title, description in (
+            (0, "Купить молоко", "и хлеб"),
+            (1, "Молоко", "молоко, снова молоко"),
+            (2, "Позвонить", "маме про молоко"),
+            (3, "Позвонить", "в банк"),
+        ):
+            response = await self.client.post(
+                "/v1/tasks/",
+                json={
+                    "title": title,
+                    "description": description,
+                    "due_date": (
+                        self.__today + timedelta(days=days)
+                    ).isoformat(),
+                },
+            )
+            self.__ids[days] = response.json()["id"]
+
+    async def __search(self, **params) -> httpx.Response:
+        return await self.client.get(
+            "/v1/tasks/search", params=params
+        )
+
+    async def test_search__should_rank_matches(self):
+        # act
+        response = await self.__search(q="МОЛОКО")
+
+        # assert - регистр не важен, чаще упоминающие выше
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                task["id"]
+                for task in response.json()["items"]
+            ],
+            [self.__ids[1], self.__ids[0], self.__ids[2]],
+        )
+        self.assertIsNone(response.json()["next_cursor"])
+
+    async def test_search__all_words__should_match_both(
+        self,
+    ):
+        # act
+        response = await self.__search(q="позвонить маме")
+
+        # assert
+        self.assertEqual(
+            [
+                task["id"]
+                for task in response.json()["items"]
+            ],
+            [self.__ids[2]],
+        )
+
+    async def test_search__pages__should_follow_cursor(
+        self,
+    ):
+        # act
+        ids = []
+        cursor = None
+        while True:
+            params = {"q": "молоко", "limit": 1}
+            if cursor:
+                params["cursor"] = cursor
+            page = (await self.__search(**params)).json()
+            ids += [task["id"] for task in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        # assert
+        self.assertEqual(
+            ids,
+            [self.__ids[1], self.__ids[0], self.__ids[2]],
+        )
+
+    async def test_search__period__should_filter_due_date(
+        self,
+    ):
+        # act
+        response = await self.__search(
+            q="молоко",
+            start_date=(
+                self.__today + timedelta(days=1)
+            ).isoformat(),
+            end_date=(
+                self.__today + timedelta(days=3)
+            ).isoformat(),
+        )
+
+        # assert
+        self.assertEqual(
+            [
+                task["id"]
+                for task in response.json()["items"]
+            ],
+            [self.__ids[1], self.__ids[2]],
+        )
+
+    async def test_search__after_update_and_delete__should_sync_index(
+        self,
+    ):
+        # arrange
+        await self.client.put(
+            f"/v1/tasks/{self.__ids[3]}",
+            json={"title": "Купить молоко"},
+        )
+        await self.client.delete(
+            f"/v1/tasks/{self.__ids[1]}"
+        )
+
+        # act
+        response = await self.__search(q="молоко")
+
+        # assert
+        self.assertEqual(
+            {
+                task["id"]
+                for task in response.json()["items"]
+            },
+            {self.__ids[0], self.__ids[2], self.__ids[3]},
+        )
+
+    async def test_search__operators__should_match_as_words(
+        self,
+    ):
+        # act
+        response = await self.__search(q='молоко" OR *(')
+
+        # assert - синтаксис FTS5 из запроса не интерпретируется
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"], [])
+
+    async def test_search__invalid_cursor__should_422(self):
+        # act
+        response = await self.__search(
+            q="молоко", cursor="не курсор"
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 422)
+
+    async def test_search__only_start_date__should_422(
+        self,
+    ):
+        # act
+        response = await self.__search(
+            q="молоко", start_date="2030-01-01"
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 422)
+
+
+class TestTaskRouterOwners(RouterTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.__today = date.today().isoformat()
+        response = await self.client.post(
+            "/v1/tasks/",
+            json={"title": "Задача владельца 1"},
+            headers={"X-Owner-Id": "1"},
+        )
+        self.__task_id = response.json()["id"]
+
+    async def __get_titles(self, owner_id: str) -> list:
+        response = await self.client.get(
+            "/v1/tasks/",
+            params={"date": self.__today},
+            headers={"X-Owner-Id": owner_id},
+        )
+        return [task["title"] for task in response.json()]
+
+    async def test_get_tasks__other_owner__should_not_see(
+        self,
+    ):
+        # act - выборки одного периода кэшируются раздельно
+        owner_titles = await self.__get_titles("1")
+        other_titles = await self.__get_titles("2")
+
+        # assert
+        self.assertEqual(
+            owner_titles, ["Задача владельца 1"]
+        )
+        self.assertEqual(other_titles, [])
+
+    async def test_update_delete__other_owner__should_404(
+        self,
+    ):
+        # act
+        update_response = await self.client.put(
+            f"/v1/tasks/{self.__task_id}",
+            json={"title": "чужая"},
+            headers={"X-Owner-Id": "2"},
+        )
+        delete_response = await self.client.delete(
+            f"/v1/tasks/{self.__task_id}",
+            headers={"X-Owner-Id": "2"},
+        )
+
+        # assert - задача владельца не изменилась
+        self.assertEqual(update_response.status_code, 404)
+        self.assertEqual(delete_response.status_code, 404)
+        self.assertEqual(
+            await self.__get_titles("1"),
+            ["Задача владельца 1"],
+        )
+
+    async def test_search_summary__other_owner__should_empty(
+        self,
+    ):
+        # act
+        search = await self.client.get(
+            "/v1/tasks/search",
+            params={"q": "задача"},
+            headers={"X-Owner-Id": "2"},
+        )
+        summary = await self.client.get(
+            "/v1/tasks/summary",
+            params={
+                "start_date": self.__today,
+                "end_date": self.__today,
+            },
+            headers={"X-Owner-Id": "2"},
+        )
+
+        # assert
+        self.assertEqual(search.json()["items"], [])
+        self.assertEqual(summary.json()["counts"], {})
+
+    async def test_create__no_owner_header__should_default_owner(
+        self,
+    ):
+        # act
+        await self.client.post(
+            "/v1/tasks/", json={"title": "Без владельца"}
+        )
+
+        # assert
+        self.assertEqual(
+            await self.__get_titles("0"), ["Без владельца"]
+        )
+
+    async def test_get_tasks__negative_owner__should_single_422(
+        self,
+    ):
+        # act
+        response = await self.client.get(
+            "/v1/tasks/",
+            params={"date": self.__today},
+            headers={"X-Owner-Id": "-1"},
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(
+            [
+                error["loc"]
+                for error in response.json()["detail"]
+            ],
+            [["header", "X-Owner-Id"]],
+        )
+
+    @patch("configs.settings.owner_required", True)
+    async def test_get_tasks__owner_required_no_header__should_401(
+        self,
+    ):
+        # act
+        response = await self.client.get("/v1/tasks/")
+
+        # assert
+        self.assertEqual(response.status_code, 401)
+
+
+class TestTaskRouterWriteBehind(RouterTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__task_write_queue = TaskWriteQueue(
+            async_sessionmaker(
+                bind=self.engine, expire_on_commit=False
+            ),
+            TaskJournal(self.__directory.name),
+            self.task_cache,
+            max_pending=2,
+        )
+        app.dependency_overrides[get_task_write_queue] = (
+            lambda: self.__task_write_queue
+        )
+        self.__today = date.today().isoformat()
+
+    async def asyncTearDown(self):
+        await self.__task_write_queue.stop()
+        await super().asyncTearDown()
+        self.__directory.cleanup()
+
+    async def __create_async(self, title: str):
+        return await self.client.post(
+            "/v1/tasks/",
+            json={"title": title},
+            headers={
+                "Prefer": "respond-async",
+                "X-Owner-Id": "1",
+            },
+        )
+
+    async def test_create__prefer_async__should_202_and_visible(
+        self,
+    ):
+        # arrange - выборка периода уже в кэше
+        await self.client.get(
+            "/v1/tasks/",
+            params={"date": self.__today},
+            headers={"X-Owner-Id": "1"},
+        )
+
+        # act
+        response = await self.__create_async("отложенная")
+        tasks = await self.client.get(
+            "/v1/tasks/",
+            params={"date": self.__today},
+            headers={"X-Owner-Id": "1"},
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 202)
+        ticket = response.json()["ticket"]
+        self.assertEqual(
+            response.headers["Location"],
+            f"/v1/tasks/pending/{ticket}",
+        )
+        self.assertEqual(
+            tasks.json(),
+            [
+                {
+                    "id": None,
+                    "ticket": ticket,
+                    "title": "отложенная",
+                    "description": None,
+                    "due_date": self.__today,
+                }
+            ],
+        )
+
+    async def test_get_pending__after_flush__should_created(
+        self,
+    ):
+        # arrange
+        ticket = (
+            await self.__create_async("отложенная")
+        ).json()["ticket"]
+
+        # act
+        pending = await self.client.get(
+            f"/v1/tasks/pending/{ticket}",
+            headers={"X-Owner-Id": "1"},
+        )
+        await self.__task_write_queue.flush()
+        created = await self.client.get(
+            f"/v1/tasks/pending/{ticket}",
+            headers={"X-Owner-Id": "1"},
+        )
+        other = await self.client.get(
+            f"/v1/tasks/pending/{ticket}",
+            headers={"X-Owner-Id": "2"},
+        )
+        tasks = await self.client.get(
+            "/v1/tasks/",
+            params={"date": self.__today},
+            headers={"X-Owner-Id": "1"},
+        )
+
+        # assert
+        self.assertEqual(
+            pending.json(),
+            {
+                "ticket": ticket,
+                "status": "pending",
+                "id": None,
+            },
+        )
+        self.assertEqual(
+            created.json()["status"], "created"
+        )
+        self.assertEqual(
+            [task["id"] for task in tasks.json()],
+            [created.json()["id"]],
+        )
+        self.assertEqual(other.status_code, 404)
+
+    async def test_create__queue_full__should_503(self):
+        # arrange
+        for title in ("first", "second"):
+            await self.__create_async(title)
+
+        # act
+        response = await self.__create_async("third")
+
+        # assert
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+
+    async def test_create__without_prefer__should_201(self):
+        # act
+        response = await self.client.post(
+            "/v1/tasks/", json={"title": "сразу"}
+        )
+
+        # assert
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.json()["id"])
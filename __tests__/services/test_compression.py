@@ -0,0 +1,84 @@
+import gzip
+from unittest import TestCase
+from unittest.mock import patch
+
+from configs import settings
+from services.compression import choose_encoding, compress
+
+
+class TestChooseEncoding(TestCase):
+    def setUp(self):
+        # br и zstd доступны не везде: проверяется выбор среди
+        # gzip и заглушки второй кодировки.
+        self.__compressors = patch.dict(
+            "services.compression.compressors",
+            {"br": lambda data: data},
+        )
+        self.__compressors.start()
+        self.__encodings = patch.object(
+            settings,
+            "compression_encodings",
+            ("br", "gzip"),
+        )
+        self.__encodings.start()
+
+    def tearDown(self):
+        self.__encodings.stop()
+        self.__compressors.stop()
+
+    def test_choose__equal_weights__should_server_order(
+        self,
+    ):
+        # arrange
+
+        # act
+        encoding = choose_encoding("gzip, deflate, br")
+
+        # assert
+        self.assertEqual(encoding, "br")
+
+    def test_choose__weights__should_highest_q(self):
+        # arrange
+
+        # act
+        encoding = choose_encoding("br;q=0.5, gzip;q=0.8")
+
+        # assert
+        self.assertEqual(encoding, "gzip")
+
+    def test_choose__wildcard_and_excluded__should_respect_q(
+        self,
+    ):
+        # arrange
+
+        # act
+        encoding = choose_encoding("*, br;q=0")
+
+        # assert
+        self.assertEqual(encoding, "gzip")
+
+    def test_choose__unsupported_or_missing__should_none(
+        self,
+    ):
+        # arrange
+
+        # act
+        encodings = [
+            choose_encoding(None),
+            choose_encoding("identity"),
+            choose_encoding("deflate, gzip;q=0"),
+        ]
+
+        # assert
+        self.assertEqual(encodings, [None, None, None])
+
+    def test_compress__gzip__should_roundtrip(self):
+        # arrange
+        data = b'[{"id": 1}]' * 100
+
+        # act
+        compressed = compress(data, "gzip")
+
+        # assert
+        self.assertLess(len(compressed), len(data))
+        self.assertEqual(gzip.decompress(compressed), data)
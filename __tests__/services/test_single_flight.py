@@ -0,0 +1,101 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from services.single_flight import SingleFlight
+
+
+class TestSingleFlight(IsolatedAsyncioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.__single_flight = SingleFlight()
+        self.__calls = 0
+
+    async def __load(self) -> int:
+        self.__calls += 1
+        await asyncio.sleep(0.01)
+        return self.__calls
+
+    async def test_run__same_key__should_load_once(self):
+        # act
+        results = await asyncio.gather(
+            *(
+                self.__single_flight.run("key", self.__load)
+                for _ in range(10)
+            )
+        )
+
+        # assert
+        self.assertEqual(results, [1] * 10)
+        self.assertEqual(
+            self.__single_flight.stats(),
+            {"in_flight": 0, "coalesced": 9},
+        )
+
+    async def test_run__different_keys__should_load_each(
+        self,
+    ):
+        # act
+        await asyncio.gather(
+            self.__single_flight.run("a", self.__load),
+            self.__single_flight.run("b", self.__load),
+        )
+
+        # assert
+        self.assertEqual(self.__calls, 2)
+        self.assertEqual(self.__single_flight.coalesced, 0)
+
+    async def test_run__after_completion__should_load_again(
+        self,
+    ):
+        # act
+        first = await self.__single_flight.run(
+            "key", self.__load
+        )
+        second = await self.__single_flight.run(
+            "key", self.__load
+        )
+
+        # assert
+        self.assertEqual((first, second), (1, 2))
+
+    async def test_run__error__should_raise_for_all(self):
+        # arrange
+        async def load():
+            await asyncio.sleep(0.01)
+            raise ValueError()
+
+        # act
+        results = await asyncio.gather(
+            *(
+                self.__single_flight.run("key", load)
+                for _ in range(3)
+            ),
+            return_exceptions=True,
+        )
+
+        # assert
+        self.assertTrue(
+            all(isinstance(r, ValueError) for r in results)
+        )
+        self.assertEqual(
+            self.__single_flight.stats()["in_flight"], 0
+        )
+
+    async def test_run__waiter_cancelled__should_not_cancel_load(
+        self,
+    ):
+        # arrange
+        first = asyncio.ensure_future(
+            self.__single_flight.run("key", self.__load)
+        )
+        second = asyncio.ensure_future(
+            self.__single_flight.run("key", self.__load)
+        )
+        await asyncio.sleep(0)
+
+        # act
+        first.cancel()
+
+        # assert
+        self.assertEqual(await second, 1)
+        self.assertEqual(self.__calls, 1)
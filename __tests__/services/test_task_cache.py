@@ -0,0 +1,239 @@
+from datetime import date
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from services.task_cache import (
+    MemoryCacheBackend,
+    TaskCache,
+    TaskCacheEntry,
+)
+
+
+def make_entry(*task_ids: int) -> TaskCacheEntry:
+    return TaskCacheEntry(
+        payload=b"[]",
+        etag='W/"etag"',
+        last_modified=None,
+        task_ids=frozenset(task_ids),
+    )
+
+
+class TestTaskCache(IsolatedAsyncioTestCase):
+    __task_cache: TaskCache
+
+    def setUp(self):
+        super().setUp()
+        self.__task_cache = TaskCache(
+            MemoryCacheBackend(max_entries=2, ttl=60)
+        )
+
+    async def test_get_or_load__second_call__should_hit(
+        self,
+    ):
+        # arrange
+        load = AsyncMock(return_value=make_entry())
+
+        # act
+        for _ in range(2):
+            entry = await self.__task_cache.get_or_load(
+                1, date(2020, 1, 1), date(2020, 1, 7), load
+            )
+
+        # assert
+        load.assert_awaited_once()
+        self.assertEqual(entry, make_entry())
+        self.assertEqual(
+            self.__task_cache.stats(),
+            {
+                "hits": 1,
+                "misses": 1,
+                "evictions": 0,
+                "invalidations": 0,
+            },
+        )
+
+    async def test_get_or_load__over_capacity__should_evict_lru(
+        self,
+    ):
+        # arrange
+        load = AsyncMock(return_value=make_entry())
+        for day in (1, 2, 3):
+            await self.__task_cache.get_or_load(
+                1,
+                date(2020, 1, day),
+                date(2020, 1, day),
+                load,
+            )
+
+        # act - самая старая запись вытеснена
+        await self.__task_cache.get_or_load(
+            1, date(2020, 1, 1), date(2020, 1, 1), load
+        )
+
+        # assert
+        self.assertEqual(load.await_count, 4)
+        self.assertEqual(
+            self.__task_cache.stats()["evictions"], 2
+        )
+
+    async def test_get_or_load__expired__should_reload(
+        self,
+    ):
+        # arrange
+        task_cache = TaskCache(
+            MemoryCacheBackend(max_entries=2, ttl=0)
+        )
+        load = AsyncMock(return_value=make_entry())
+
+        # act
+        for _ in range(2):
+            await task_cache.get_or_load(
+                1, date(2020, 1, 1), date(2020, 1, 1), load
+            )
+
+        # assert
+        self.assertEqual(load.await_count, 2)
+
+    async def test_invalidate__due_date__should_drop_only_containing_ranges(
+        self,
+    ):
+        # arrange
+        week = (date(2020, 1, 1), date(2020, 1, 7))
+        other_week = (date(2020, 1, 8), date(2020, 1, 14))
+        load = AsyncMock(return_value=make_entry())
+        await self.__task_cache.get_or_load(1, *week, load)
+        await self.__task_cache.get_or_load(
+            1, *other_week, load
+        )
+
+        # act
+        await self.__task_cache.invalidate(
+            1, [], [date(2020, 1, 3)]
+        )
+        await self.__task_cache.get_or_load(1, *week, load)
+        await self.__task_cache.get_or_load(
+            1, *other_week, load
+        )
+
+        # assert - перезагружена только неделя с due_date
+        self.assertEqual(load.await_count, 3)
+        self.assertEqual(
+            self.__task_cache.stats()["invalidations"], 1
+        )
+
+    async def test_invalidate__task_id__should_drop_ranges_with_task(
+        self,
+    ):
+        # arrange - задача 7 была в первой неделе (прежняя due_date)
+        week = (date(2020, 1, 1), date(2020, 1, 7))
+        load = AsyncMock(return_value=make_entry(7))
+        await self.__task_cache.get_or_load(1, *week, load)
+
+        # act - задача перенесена на другую неделю
+        await self.__task_cache.invalidate(
+            1, [7], [date(2020, 2, 1)]
+        )
+        await self.__task_cache.get_or_load(1, *week, load)
+
+        # assert
+        self.assertEqual(load.await_count, 2)
+
+    async def test_get_or_load__invalidated_during_load__should_not_store(
+        self,
+    ):
+        # arrange
+        period = (date(2020, 1, 1), date(2020, 1, 7))
+
+        async def load_with_concurrent_write():
+            await self.__task_cache.invalidate(
+                1, [], [date(2020, 1, 2)]
+            )
+            return make_entry()
+
+        load = AsyncMock(return_value=make_entry())
+
+        # act
+        await self.__task_cache.get_or_load(
+            1, *period, load_with_concurrent_write
+        )
+        await self.__task_cache.get_or_load(
+            1, *period, load
+        )
+
+        # assert - устаревший результат не был закэширован
+        load.assert_awaited_once()
+
+    async def test_invalidate__other_owner__should_keep(
+        self,
+    ):
+        # arrange
+        load = AsyncMock(return_value=make_entry(7))
+        week = (date(2020, 1, 1), date(2020, 1, 7))
+        await self.__task_cache.get_or_load(1, *week, load)
+
+        # act
+        await self.__task_cache.invalidate(
+            2, [], [date(2020, 1, 3)]
+        )
+        await self.__task_cache.get_or_load(1, *week, load)
+
+        # assert
+        load.assert_awaited_once()
+
+    async def test_get_encoded__second_call__should_not_recompress(
+        self,
+    ):
+        # arrange
+        week = (date(2020, 1, 1), date(2020, 1, 7))
+        entry = await self.__task_cache.get_or_load(
+            1, *week, AsyncMock(return_value=make_entry())
+        )
+
+        # act
+        with patch(
+            "services.task_cache.compress",
+            return_value=b"gzip",
+        ) as compress:
+            for _ in range(2):
+                data = await self.__task_cache.get_encoded(
+                    1, *week, entry, "gzip"
+                )
+
+        # assert
+        self.assertEqual(data, b"gzip")
+        compress.assert_called_once_with(b"[]", "gzip")
+
+    async def test_get_encoded__replaced_entry__should_not_store(
+        self,
+    ):
+        # arrange - запись заменена, пока прежняя сжималась
+        week = (date(2020, 1, 1), date(2020, 1, 7))
+        entry = make_entry()
+        await self.__task_cache.get_or_load(
+            1,
+            *week,
+            AsyncMock(
+                return_value=entry._replace(etag='W/"new"')
+            ),
+        )
+
+        # act
+        with patch(
+            "services.task_cache.compress",
+            side_effect=[b"old", b"old", b"new"],
+        ):
+            await self.__task_cache.get_encoded(
+                1, *week, entry, "gzip"
+            )
+            await self.__task_cache.get_encoded(
+                1, *week, entry, "gzip"
+            )
+            data = await self.__task_cache.get_encoded(
+                1,
+                *week,
+                entry._replace(etag='W/"new"'),
+                "gzip",
+            )
+
+        # assert - сжатый JSON прежней записи не отдан для новой
+        self.assertEqual(data, b"new")
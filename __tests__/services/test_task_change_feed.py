@@ -0,0 +1,191 @@
+from datetime import date
+from typing import List, Sequence
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from __mocks__.database import create_test_engine
+from sqlalchemy import Row, insert
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+)
+
+from models import Task, TaskChange
+from repositories.task_repository import TaskRepository
+from services.task_cache import (
+    MemoryCacheBackend,
+    TaskCache,
+    TaskCacheEntry,
+)
+from services.task_change_feed import (
+    TaskChangeFeed,
+    TaskChangeListener,
+)
+
+
+class RecordingListener(TaskChangeListener):
+    def __init__(self) -> None:
+        self.task_ids: List[int] = []
+        self.resets = 0
+
+    async def apply_changes(
+        self, changes: Sequence[Row]
+    ) -> None:
+        self.task_ids.extend(
+            change.task_id for change in changes
+        )
+
+    async def reset(self) -> None:
+        self.resets += 1
+
+
+async def load_entry() -> TaskCacheEntry:
+    return TaskCacheEntry(
+        payload=b"[]",
+        etag='W/"etag"',
+        last_modified=None,
+        task_ids=frozenset(),
+    )
+
+
+class TestTaskChangeFeed(IsolatedAsyncioTestCase):
+    __engine: AsyncEngine
+
+    async def asyncSetUp(self):
+        self.__feed = patch(
+            "configs.settings.tasks_change_feed_enabled",
+            True,
+        )
+        self.__feed.start()
+        self.__engine = await create_test_engine()
+        self.__session_maker = async_sessionmaker(
+            bind=self.__engine, expire_on_commit=False
+        )
+        self.__task_cache = TaskCache(
+            MemoryCacheBackend(max_entries=16, ttl=60)
+        )
+        self.__listener = RecordingListener()
+
+    async def asyncTearDown(self):
+        await self.__engine.dispose()
+        self.__feed.stop()
+
+    async def __create_feed(
+        self, **kwargs
+    ) -> TaskChangeFeed:
+        task_change_feed = TaskChangeFeed(
+            self.__session_maker,
+            self.__task_cache,
+            **{"sync_interval": 0, **kwargs},
+        )
+        task_change_feed.add_listener(self.__listener)
+        await task_change_feed.start()
+        return task_change_feed
+
+    async def __add_changes(self, *seqs: int) -> None:
+        async with self.__session_maker.begin() as session:
+            await session.execute(
+                insert(TaskChange),
+                [
+                    {
+                        "seq": seq,
+                        "task_id": seq,
+                        "owner_id": 1,
+                        "due_date": date(2030, 1, 1),
+                    }
+                    for seq in seqs
+                ],
+            )
+
+    async def test_sync__other_worker_write__should_invalidate_cache(
+        self,
+    ):
+        # arrange - выборка закэширована этим воркером
+        task_change_feed = await self.__create_feed()
+        await self.__task_cache.get_or_load(
+            1,
+            date(2030, 1, 1),
+            date(2030, 1, 7),
+            load_entry,
+        )
+
+        # act - другой воркер создает задачу в этом периоде
+        async with self.__session_maker.begin() as session:
+            task = await TaskRepository(session, 1).create(
+                Task(
+                    title="задача",
+                    due_date=date(2030, 1, 3),
+                )
+            )
+        await task_change_feed.sync()
+
+        # assert
+        self.assertIsNone(
+            await self.__task_cache.peek(
+                1, date(2030, 1, 1), date(2030, 1, 7)
+            )
+        )
+        self.assertEqual(
+            self.__listener.task_ids, [task.id]
+        )
+
+    async def test_sync__gap__should_reread_until_timeout(
+        self,
+    ):
+        # arrange - запись 1 еще не зафиксирована
+        task_change_feed = await self.__create_feed(
+            gap_timeout=3600
+        )
+        await self.__add_changes(2)
+
+        # act
+        await task_change_feed.sync()
+        await self.__add_changes(1)
+        await task_change_feed.sync()
+        await task_change_feed.sync()
+
+        # assert - запись 2 прочитана повторно вместе с 1,
+        # после заполнения пропуска - больше не читается
+        self.assertEqual(
+            self.__listener.task_ids, [2, 1, 2]
+        )
+
+    async def test_sync__gap_timeout__should_skip_gap(self):
+        # arrange - запись 1 откачена и не появится
+        task_change_feed = await self.__create_feed(
+            gap_timeout=0
+        )
+        await self.__add_changes(2)
+
+        # act
+        await task_change_feed.sync()
+        await task_change_feed.sync()
+
+        # assert
+        self.assertEqual(self.__listener.task_ids, [2])
+
+    async def test_sync__after_retention__should_reset(
+        self,
+    ):
+        # arrange - лента могла быть очищена, пока воркер ее
+        # не читал
+        task_change_feed = await self.__create_feed(
+            retention=0
+        )
+        await self.__task_cache.get_or_load(
+            1,
+            date(2030, 1, 1),
+            date(2030, 1, 7),
+            load_entry,
+        )
+
+        # act
+        await task_change_feed.sync()
+
+        # assert
+        self.assertEqual(self.__listener.resets, 1)
+        self.assertIsNone(
+            await self.__task_cache.peek(
+                1, date(2030, 1, 1), date(2030, 1, 7)
+            )
+        )
@@ -0,0 +1,229 @@
+from datetime import date, timedelta
+from typing import Tuple
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from __mocks__.database import (
+    StatementRecorder,
+    create_test_engine,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+)
+
+from models import Task
+from repositories.task_repository import TaskRepository
+from services.single_flight import SingleFlight
+from services.task_cache import (
+    MemoryCacheBackend,
+    TaskCache,
+    TaskCacheEntry,
+)
+from services.task_change_feed import TaskChangeFeed
+from services.task_day_index import TaskDayIndex
+from services.task_service import TaskService
+
+
+class TestTaskDayIndex(IsolatedAsyncioTestCase):
+    __engine: AsyncEngine
+
+    async def asyncSetUp(self):
+        # Лента task_change ведется только при включенной ленте.
+        self.__feed = patch(
+            "configs.settings.tasks_change_feed_enabled",
+            True,
+        )
+        self.__feed.start()
+        self.__engine = await create_test_engine()
+        self.__session_maker = async_sessionmaker(
+            bind=self.__engine, expire_on_commit=False
+        )
+        self.__task_cache = TaskCache(
+            MemoryCacheBackend(max_entries=16, ttl=60)
+        )
+        self.__today = date.today()
+        self.__task_ids = await self.__create(
+            (1, "сегодня", self.__today),
+            (2, "чужая", self.__today),
+            (1, "через 3 дня", self.__today + timedelta(3)),
+            (1, "через год", self.__today + timedelta(365)),
+        )
+
+    async def asyncTearDown(self):
+        await self.__engine.dispose()
+        self.__feed.stop()
+
+    async def __create(self, *tasks):
+        """
+        Создать задачи (владелец, название, дата) так, как их
+        создает другой воркер.
+        """
+        task_ids = []
+        for owner_id, title, due_date in tasks:
+            async with self.__session_maker.begin() as session:
+                task = await TaskRepository(
+                    session, owner_id
+                ).create(
+                    Task(title=title, due_date=due_date)
+                )
+                task_ids.append(task.id)
+        return task_ids
+
+    async def __create_index(
+        self, **kwargs
+    ) -> Tuple[TaskChangeFeed, TaskDayIndex]:
+        task_change_feed = TaskChangeFeed(
+            self.__session_maker,
+            self.__task_cache,
+            sync_interval=0,
+        )
+        task_day_index = TaskDayIndex(
+            self.__session_maker,
+            **{"window_days": 60, **kwargs},
+        )
+        task_change_feed.add_listener(task_day_index)
+        await task_change_feed.start()
+        await task_day_index.warm()
+        return task_change_feed, task_day_index
+
+    def __get_titles(self, task_day_index, owner_id, days):
+        rows = task_day_index.get_rows(
+            owner_id,
+            self.__today,
+            self.__today + timedelta(days),
+        )
+        return (
+            None
+            if rows is None
+            else [row.title for row in rows]
+        )
+
+    async def test_get_rows__after_warm__should_owner_days(
+        self,
+    ):
+        # arrange
+
+        # act
+        _, task_day_index = await self.__create_index()
+
+        # assert
+        self.assertEqual(
+            self.__get_titles(task_day_index, 1, 6),
+            ["сегодня", "через 3 дня"],
+        )
+        self.assertEqual(
+            self.__get_titles(task_day_index, 2, 6),
+            ["чужая"],
+        )
+        # Период вне окна индекса читается из БД.
+        self.assertIsNone(
+            self.__get_titles(task_day_index, 1, 365)
+        )
+
+    async def test_sync__other_worker_changes__should_apply(
+        self,
+    ):
+        # arrange
+        task_change_feed, task_day_index = (
+            await self.__create_index()
+        )
+        today_id, _, later_id, _ = self.__task_ids
+        await self.__task_cache.get_or_load(
+            1,
+            self.__today,
+            self.__today,
+            lambda: self.__load_entry(),
+        )
+
+        # act - другой воркер создает, переносит и удаляет задачи
+        await self.__create((1, "новая", self.__today))
+        async with self.__session_maker.begin() as session:
+            task_repository = TaskRepository(session, 1)
+            await task_repository.update(
+                Task(
+                    id=later_id,
+                    title="перенесена",
+                    due_date=self.__today + timedelta(1),
+                )
+            )
+            await task_repository.delete(today_id)
+        await task_change_feed.sync()
+
+        # assert
+        self.assertEqual(
+            self.__get_titles(task_day_index, 1, 6),
+            ["новая", "перенесена"],
+        )
+        self.assertIsNone(
+            await self.__task_cache.peek(
+                1, self.__today, self.__today
+            )
+        )
+
+    async def test_warm__over_budget__should_shrink_window(
+        self,
+    ):
+        # arrange - бюджет меньше трех задач
+
+        # act
+        _, task_day_index = await self.__create_index(
+            max_bytes=1000
+        )
+
+        # assert - дальний день вне окна, сегодняшний в нем
+        start, end = task_day_index.window
+        self.assertLess(end, self.__today + timedelta(3))
+        self.assertLessEqual(start, self.__today)
+        self.assertEqual(
+            self.__get_titles(task_day_index, 1, 0),
+            ["сегодня"],
+        )
+        self.assertIsNone(
+            self.__get_titles(task_day_index, 1, 6)
+        )
+
+    async def test_get_tasks_entry__in_window__should_not_select_tasks(
+        self,
+    ):
+        # arrange
+        task_change_feed, task_day_index = (
+            await self.__create_index()
+        )
+        async with self.__session_maker() as session:
+            task_service = TaskService(
+                TaskRepository(session, 1),
+                self.__task_cache,
+                SingleFlight(),
+                owner_id=1,
+                task_change_feed=task_change_feed,
+                task_day_index=task_day_index,
+            )
+
+            # act
+            with StatementRecorder(
+                self.__engine
+            ) as recorder:
+                etag = await task_service.get_tasks_etag(
+                    self.__today,
+                    self.__today + timedelta(6),
+                )
+                entry = await task_service.get_tasks_entry(
+                    self.__today,
+                    self.__today + timedelta(6),
+                )
+
+        # assert - только чтение ленты task_change
+        self.assertEqual(entry.etag, etag)
+        self.assertEqual(len(entry.task_ids), 2)
+        self.assertTrue(recorder.statements)
+        for statement, _ in recorder.statements:
+            self.assertIn("FROM task_change", statement)
+
+    async def __load_entry(self) -> TaskCacheEntry:
+        return TaskCacheEntry(
+            payload=b"[]",
+            etag='W/"etag"',
+            last_modified=None,
+            task_ids=frozenset(self.__task_ids[:1]),
+        )
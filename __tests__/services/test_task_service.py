@@ -1,19 +1,36 @@
+import asyncio
 from datetime import date, timedelta
 from unittest import IsolatedAsyncioTestCase, TestCase
 from unittest.mock import create_autospec, patch
 
 import pytest
+from __mocks__.database import create_test_engine
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import Task
 from pydantic import ValidationError
 from repositories.task_repository import TaskRepository
 from schemas.pydantic.task_schema import (
+    TaskBatchPutRequestSchema,
+    TaskBatchResultSchema,
     TaskPostRequestSchema,
 )
-from services.task_service import TaskService, parse_date
+from services.single_flight import SingleFlight
+from services.task_cache import TaskCache
+from services.task_service import (
+    InvalidCursorException,
+    TaskService,
+    decode_cursor,
+    encode_cursor,
+    get_date_period,
+    get_period,
+    get_week_period,
+    parse_date,
+)
 
 
-class TestTaskService(TestCase):
+class TestTaskService(IsolatedAsyncioTestCase):
     __task_repository: TaskRepository
     __task_service: TaskService
 
@@ -22,15 +39,23 @@ class TestTaskService(TestCase):
         self.__task_repository = create_autospec(
             TaskRepository
         )
+        self.__task_cache = create_autospec(
+            TaskCache, instance=True
+        )
         self.__task_service = TaskService(
-            self.__task_repository
+            self.__task_repository,
+            self.__task_cache,
+            SingleFlight(),
+            owner_id=1,
+            task_change_feed=None,
+            task_day_index=None,
         )
 
     @patch(
         "schemas.pydantic.task_schema.TaskPostRequestSchema",
         autospec=True,
     )
-    def test_create(self, TaskPostRequestSchema):
+    async def test_create(self, TaskPostRequestSchema):
         # arrange
         task = TaskPostRequestSchema()
         task.title = "title"
@@ -38,16 +63,16 @@ class TestTaskService(TestCase):
         task.due_date = date.today()
 
         # act
-        self.__task_service.create(task)
+        await self.__task_service.create(task)
 
         # assert - должно инициализироваться создание task репозиторием
-        self.__task_repository.create.assert_called_once()
+        self.__task_repository.create.assert_awaited_once()
 
     @patch(
         "schemas.pydantic.task_schema.TaskPostRequestSchema",
         autospec=True,
     )
-    def test_update(self, TaskPostRequestSchema):
+    async def test_update(self, TaskPostRequestSchema):
         # arrange
         task = TaskPostRequestSchema()
         task.title = "title"
@@ -55,10 +80,74 @@ class TestTaskService(TestCase):
         task.due_date = date.today()
 
         # act
-        self.__task_service.update(1, task)
+        await self.__task_service.update(1, task)
 
         # assert - должно инициализироваться создание task репозиторием
-        self.__task_repository.update.assert_called_once()
+        self.__task_repository.update.assert_awaited_once()
+
+    async def test_update_many__unknown_id__should_not_found(
+        self,
+    ):
+        # arrange
+        tasks = [
+            TaskBatchPutRequestSchema(
+                id=1, title="title 1"
+            ),
+            TaskBatchPutRequestSchema(
+                id=2, title="title 2"
+            ),
+        ]
+        self.__task_repository.update_many.return_value = {
+            1
+        }
+
+        # act
+        result = await self.__task_service.update_many(
+            tasks
+        )
+
+        # assert - результат по каждой задаче в порядке запроса
+        self.__task_repository.update_many.assert_awaited_once()
+        self.assertEqual(
+            result,
+            [
+                TaskBatchResultSchema(
+                    id=1, status="updated"
+                ),
+                TaskBatchResultSchema(
+                    id=2, status="not_found"
+                ),
+            ],
+        )
+
+    async def test_delete_many__unknown_id__should_not_found(
+        self,
+    ):
+        # arrange
+        self.__task_repository.delete_many.return_value = {
+            2
+        }
+
+        # act
+        result = await self.__task_service.delete_many(
+            [1, 2]
+        )
+
+        # assert
+        self.__task_repository.delete_many.assert_awaited_once_with(
+            [1, 2]
+        )
+        self.assertEqual(
+            result,
+            [
+                TaskBatchResultSchema(
+                    id=1, status="not_found"
+                ),
+                TaskBatchResultSchema(
+                    id=2, status="deleted"
+                ),
+            ],
+        )
 
     def test_update__no_title__should_validation_error(
         self,
@@ -109,12 +198,12 @@ class TestTaskService(TestCase):
         with pytest.raises(ValidationError):
             TaskPostRequestSchema(title=123)
 
-    def test_create__no_due_date__should_today(self):
+    async def test_create__no_due_date__should_today(self):
         # arrange
         task = TaskPostRequestSchema(title="title")
 
         # act
-        self.__task_service.create(task)
+        await self.__task_service.create(task)
 
         # assert - due_date = today по умолчанию
         assert task.due_date == date.today()
@@ -140,19 +229,19 @@ class TestTaskService(TestCase):
                 title="title", due_date=123
             )
 
-    def test_create__no_description__should_none_description(
+    async def test_create__no_description__should_none_description(
         self,
     ):
         # arrange
         task = TaskPostRequestSchema(title="title")
 
         # act
-        self.__task_service.create(task)
+        await self.__task_service.create(task)
 
         # assert
         assert task.description == None
 
-    def test_create__empty_description__should_empty_description(
+    async def test_create__empty_description__should_empty_description(
         self,
     ):
         # arrange
@@ -161,7 +250,7 @@ class TestTaskService(TestCase):
         )
 
         # act
-        self.__task_service.create(task)
+        await self.__task_service.create(task)
 
         # assert
         assert task.description == ""
@@ -181,275 +270,360 @@ class TestTaskGetService(IsolatedAsyncioTestCase):
         self.task_repository = create_autospec(
             TaskRepository, instance=True
         )
+        self.task_cache = create_autospec(
+            TaskCache, instance=True
+        )
+        self.task_repository.reads_own_writes.return_value = (
+            False
+        )
+        self.task_queries = SingleFlight()
         self.task_service = TaskService(
-            task_repository=self.task_repository
+            task_repository=self.task_repository,
+            task_cache=self.task_cache,
+            task_queries=self.task_queries,
+            owner_id=1,
+            task_change_feed=None,
+            task_day_index=None,
         )
 
-    async def test_get_tasks_by_period_valid(self):
+    async def test_get_tasks_entry__concurrent__should_load_once(
+        self,
+    ):
         # arrange
-        start_date = "2020-01-01"
-        end_date = "2020-01-31"
-        tasks = [
-            Task(
-                id=1,
-                title="Task 1",
-                description="Description 1",
-                due_date=date(2020, 1, 15),
-            ),
-            Task(
-                id=2,
-                title="Task 2",
-                description="Description 2",
-                due_date=date(2020, 1, 20),
-            ),
-        ]
-        self.task_repository.get_by_period.return_value = (
-            tasks
+        task_service = TaskService(
+            task_repository=self.task_repository,
+            task_cache=TaskCache(None),
+            task_queries=self.task_queries,
+            owner_id=1,
+            task_change_feed=None,
+            task_day_index=None,
+        )
+
+        async def get_rows_by_period(
+            start_date, end_date, shared
+        ):
+            await asyncio.sleep(0.01)
+            return []
+
+        self.task_repository.get_rows_by_period.side_effect = (
+            get_rows_by_period
         )
 
         # act
-        result = (
-            await self.task_service.get_tasks_by_period(
-                start_date, end_date
+        entries = await asyncio.gather(
+            *(
+                task_service.get_tasks_entry(
+                    date(2020, 1, 1), date(2020, 1, 7)
+                )
+                for _ in range(50)
             )
         )
 
-        # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            date(2020, 1, 1), date(2020, 1, 31)
+        # assert - один запрос к БД, результат общий
+        self.task_repository.get_rows_by_period.assert_awaited_once_with(
+            date(2020, 1, 1), date(2020, 1, 7), True
         )
-        self.assertEqual(result, tasks)
+        self.assertEqual(len(set(entries)), 1)
+        self.assertEqual(self.task_queries.coalesced, 49)
 
-    async def test_get_tasks_by_period_incorrect_format(
+    async def test_get_tasks_entry__leader_cancelled__should_load_for_others(
         self,
     ):
         # arrange
-        start_date = "не дата"  # Некорректный формат
-        end_date = "2020-01-31"
-
-        # act & assert
-        with self.assertRaises(ValueError):
-            await self.task_service.get_tasks_by_period(
-                start_date, end_date
+        engine = await create_test_engine()
+        async with engine.begin() as connection:
+            await connection.execute(
+                insert(Task).values(
+                    title="title",
+                    due_date=date(2020, 1, 1),
+                    owner_id=1,
+                )
             )
-
-    async def test_get_tasks_by_period_start_date_greater_than_end_date(
+        sessions = [AsyncSession(engine) for _ in range(2)]
+        used = []
+        for session in sessions:
+            event.listen(
+                session.sync_session,
+                "after_begin",
+                lambda session, *args: used.append(session),
+            )
+        leader, follower = [
+            asyncio.create_task(
+                TaskService(
+                    task_repository=TaskRepository(
+                        session, 1
+                    ),
+                    task_cache=TaskCache(None),
+                    task_queries=self.task_queries,
+                    owner_id=1,
+                    task_change_feed=None,
+                    task_day_index=None,
+                ).get_tasks_entry(
+                    date(2020, 1, 1), date(2020, 1, 7)
+                )
+            )
+            for session in sessions
+        ]
+        loading = asyncio.Event()
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda *args: loading.set(),
+        )
+        await loading.wait()
+
+        # act - запрос, начавший загрузку, отменен во время
+        # выборки, его сессия закрыта
+        leader.cancel()
+        await sessions[0].close()
+        entry = await follower
+
+        # assert - загрузка выполнена в отдельной сессии
+        self.assertEqual(self.task_queries.coalesced, 1)
+        self.assertEqual(len(entry.task_ids), 1)
+        self.assertEqual(used, [])
+        await sessions[1].close()
+        await engine.dispose()
+
+    async def test_get_tasks_entry__reads_own_writes__should_bypass_cache(
         self,
     ):
         # arrange
-        start_date = "2020-02-01"
-        end_date = "2020-01-01"
-
-        # act & assert
-        with self.assertRaises(ValueError):
-            await self.task_service.get_tasks_by_period(
-                start_date, end_date
-            )
-
-    async def test_get_tasks_by_period_empty_range(self):
-        # arrange
-        start_date = "2020-01-01"
-        end_date = (
-            "2020-01-01"  # Та же дата, что и start_date
+        self.task_repository.reads_own_writes.return_value = (
+            True
+        )
+        self.task_repository.get_rows_by_period.return_value = (
+            []
+        )
+        self.task_repository.get_version_by_period.return_value = (
+            0,
+            0,
+            None,
         )
-
-        self.task_repository.get_by_period.return_value = []
 
         # act
-        result = (
-            await self.task_service.get_tasks_by_period(
-                start_date, end_date
-            )
+        await self.task_service.get_tasks_entry(
+            date(2020, 1, 1), date(2020, 1, 7)
         )
-
-        # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            date(2020, 1, 1), date(2020, 1, 1)
+        await self.task_service.get_tasks_etag(
+            date(2020, 1, 1), date(2020, 1, 7)
         )
-        self.assertEqual(result, [])
 
-    async def test_get_tasks_by_period_invalid_date(self):
-        # arrange
-        start_date = "2020-02-30"  # Невалидная дата
-        end_date = "2020-03-01"
-
-        # act & assert
-        with self.assertRaises(ValueError):
-            await self.task_service.get_tasks_by_period(
-                start_date, end_date
-            )
+        # assert - чтение основной БД без кэша и общих загрузок
+        self.task_repository.get_rows_by_period.assert_awaited_once()
+        self.task_cache.get_or_load.assert_not_awaited()
+        self.task_cache.peek.assert_not_awaited()
+        self.assertEqual(self.task_queries.coalesced, 0)
 
-    async def test_get_tasks_by_period_no_tasks_found(self):
+    async def test_get_tasks_page__more_tasks__should_next_cursor(
+        self,
+    ):
         # arrange
-        start_date = "1984-01-01"
-        end_date = "1984-01-31"
-        self.task_repository.get_by_period.return_value = []
+        tasks = [
+            Task(
+                id=i,
+                title=f"Task {i}",
+                due_date=date(2020, 1, i),
+            )
+            for i in range(1, 4)
+        ]
+        self.task_repository.get_page_by_period.return_value = (
+            tasks
+        )
 
         # act
-        result = (
-            await self.task_service.get_tasks_by_period(
-                start_date, end_date
+        page, next_cursor = (
+            await self.task_service.get_tasks_page(
+                date(2020, 1, 1), date(2020, 1, 31), 2, None
             )
         )
 
-        # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            date(1984, 1, 1), date(1984, 1, 31)
+        # assert - запрашивается limit + 1 задача, лишняя отбрасывается
+        self.task_repository.get_page_by_period.assert_called_once_with(
+            date(2020, 1, 1), date(2020, 1, 31), 3, None
+        )
+        self.assertEqual(page, tasks[:2])
+        self.assertEqual(
+            decode_cursor(next_cursor),
+            (date(2020, 1, 2), 2),
         )
-        self.assertEqual(result, [])
 
-    async def test_get_tasks_by_date_valid(self):
+    async def test_get_tasks_page__last_page__should_no_cursor(
+        self,
+    ):
         # arrange
-        test_date = date.today().isoformat()
+        after = Task(
+            id=7, title="Task 7", due_date=date(2020, 1, 5)
+        )
         tasks = [
             Task(
-                id=1,
-                title="Task 1",
-                description="Description 1",
-                due_date=date.today(),
-            ),
-            Task(
-                id=2,
-                title="Task 2",
-                description="Description 2",
-                due_date=date.today(),
-            ),
+                id=8,
+                title="Task 8",
+                due_date=date(2020, 1, 5),
+            )
         ]
-        self.task_repository.get_by_period.return_value = (
+        self.task_repository.get_page_by_period.return_value = (
             tasks
         )
 
         # act
-        result = await self.task_service.get_tasks_by_date(
-            test_date
+        page, next_cursor = (
+            await self.task_service.get_tasks_page(
+                date(2020, 1, 1),
+                date(2020, 1, 31),
+                2,
+                encode_cursor(after),
+            )
         )
 
         # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            date.today(), date.today()
+        self.task_repository.get_page_by_period.assert_called_once_with(
+            date(2020, 1, 1),
+            date(2020, 1, 31),
+            3,
+            (date(2020, 1, 5), 7),
         )
-        self.assertEqual(result, tasks)
+        self.assertEqual(page, tasks)
+        self.assertIsNone(next_cursor)
 
-    async def test_get_tasks_by_date_incorrect_format(self):
-        # arrange
-        incorrect_date = "не дата"  # Некорректный формат
+    async def test_get_tasks_page__invalid_cursor__should_exception(
+        self,
+    ):
+        # act & assert
+        with self.assertRaises(InvalidCursorException):
+            await self.task_service.get_tasks_page(
+                date(2020, 1, 1),
+                date(2020, 1, 31),
+                2,
+                "не курсор",
+            )
+
+
+class TestParseDate(TestCase):
+    def setUp(self):
+        super().setUp()
+        parse_date.cache_clear()
+
+    def test_parse_date__iso_format__should_date(self):
+        # act
+        result = parse_date("2020-02-29")
+
+        # assert
+        self.assertEqual(result, date(2020, 2, 29))
 
+    def test_parse_date__invalid__should_same_message(self):
         # act & assert
+        with self.assertRaisesRegex(
+            ValueError,
+            "^Некорректный формат даты: 01.02.2020$",
+        ):
+            parse_date("01.02.2020")
+
+    def test_parse_date__fuzzy_text__should_value_error(
+        self,
+    ):
+        # act & assert - нестрогие форматы больше не принимаются
         with self.assertRaises(ValueError):
-            await self.task_service.get_tasks_by_date(
-                incorrect_date
-            )
+            parse_date("Feb 1 2020")
 
-    async def test_get_tasks_by_date_no_date_provided_uses_today(
+    def test_parse_date__basic_or_week_format__should_value_error(
         self,
     ):
-        # arrange
-        tasks = [
-            Task(
-                id=1,
-                title="Task Today 1",
-                description="Description Today 1",
-                due_date=date.today(),
-            ),
-        ]
-        self.task_repository.get_by_period.return_value = (
-            tasks
-        )
+        for date_str in ("20240101", "2024-W01-1"):
+            with self.subTest(date_str=date_str):
+                # act & assert
+                with self.assertRaises(ValueError):
+                    parse_date(date_str)
 
+    @patch(
+        "configs.settings.date_extra_formats", ("%d.%m.%Y",)
+    )
+    def test_parse_date__extra_format__should_date(self):
         # act
-        result = await self.task_service.get_tasks_by_date(
-            None
-        )
+        result = parse_date("01.02.2020")
 
         # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            date.today(), date.today()
-        )
-        self.assertEqual(result, tasks)
+        self.assertEqual(result, date(2020, 2, 1))
+
+    def test_parse_date__repeated__should_use_cache(self):
+        # act
+        for _ in range(3):
+            parse_date("2020-01-01")
+
+        # assert
+        self.assertEqual(parse_date.cache_info().hits, 2)
 
-    async def test_get_tasks_by_date_no_tasks_found(self):
-        # arrange
-        test_date = "1984-01-01"
-        self.task_repository.get_by_period.return_value = []
 
+class TestTaskPeriods(TestCase):
+    def test_get_period__valid__should_dates(self):
         # act
-        result = await self.task_service.get_tasks_by_date(
-            test_date
-        )
+        period = get_period("2020-01-01", "2020-01-31")
 
         # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            date(1984, 1, 1), date(1984, 1, 1)
+        self.assertEqual(
+            period, (date(2020, 1, 1), date(2020, 1, 31))
         )
-        self.assertEqual(result, [])
 
-    async def test_get_tasks_for_week_valid(self):
-        # arrange
-        input_date = "2020-01-01"
-        expected_start_date = date(2020, 1, 1)
-        expected_end_date = date(2020, 1, 7)
-        tasks = [
-            Task(
-                id=1,
-                title="Task 1",
-                description="Description 1",
-                due_date=date(2020, 1, 3),
-            ),
-            Task(
-                id=2,
-                title="Task 2",
-                description="Description 2",
-                due_date=date(2020, 1, 6),
-            ),
+    def test_get_period__same_date__should_one_day(self):
+        # act
+        period = get_period("2020-01-01", "2020-01-01")
+
+        # assert
+        self.assertEqual(
+            period, (date(2020, 1, 1), date(2020, 1, 1))
+        )
+
+    def test_get_period__invalid__should_value_error(self):
+        cases = [
+            # Некорректный формат
+            ("не дата", "2020-01-31"),
+            # Невалидная дата
+            ("2020-02-30", "2020-03-01"),
+            # Начало позже конца
+            ("2020-02-01", "2020-01-01"),
         ]
-        self.task_repository.get_by_period.return_value = (
-            tasks
-        )
+        for start_date, end_date in cases:
+            with self.subTest(start_date=start_date):
+                with self.assertRaises(ValueError):
+                    get_period(start_date, end_date)
 
+    def test_get_date_period__valid__should_one_day(self):
         # act
-        result = await self.task_service.get_tasks_for_week(
-            input_date
+        period = get_date_period("1984-01-01")
+
+        # assert
+        self.assertEqual(
+            period, (date(1984, 1, 1), date(1984, 1, 1))
         )
 
+    def test_get_date_period__no_date__should_today(self):
+        # act
+        period = get_date_period(None)
+
         # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            expected_start_date, expected_end_date
+        self.assertEqual(
+            period, (date.today(), date.today())
         )
-        self.assertEqual(result, tasks)
 
-    async def test_get_tasks_for_week_invalid_date_format(
+    def test_get_date_period__incorrect_format__should_value_error(
         self,
     ):
-        # arrange
-        input_date = "not-a-date"
-
         # act & assert
         with self.assertRaises(ValueError):
-            await self.task_service.get_tasks_for_week(
-                input_date
-            )
-
-    async def test_get_tasks_for_week_no_tasks_found(self):
-        # arrange
-        input_date = "2020-02-01"
-        expected_start_date = date(2020, 2, 1)
-        expected_end_date = date(2020, 2, 7)
-        self.task_repository.get_by_period.return_value = []
+            get_date_period("не дата")
 
+    def test_get_week_period__valid__should_seven_days(
+        self,
+    ):
         # act
-        result = await self.task_service.get_tasks_for_week(
-            input_date
-        )
+        period = get_week_period("2020-01-01")
 
         # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            expected_start_date, expected_end_date
+        self.assertEqual(
+            period, (date(2020, 1, 1), date(2020, 1, 7))
         )
-        self.assertEqual(result, [])
 
-    async def test_get_tasks_for_week_boundary_conditions(
-        self,
-    ):
+    def test_get_week_period__boundary_conditions(self):
         # Даты испытаний, которые находятся на границе месяцев и лет
         test_dates = [
             "2020-12-31",
@@ -458,84 +632,30 @@ class TestTaskGetService(IsolatedAsyncioTestCase):
         ]
         for input_date in test_dates:
             start_date = parse_date(input_date)
-            end_date = start_date + timedelta(days=6)
-
             with self.subTest(input_date=input_date):
-                self.task_repository.get_by_period.return_value = (
-                    []
-                )
-                result = await self.task_service.get_tasks_for_week(
-                    input_date
+                self.assertEqual(
+                    get_week_period(input_date),
+                    (
+                        start_date,
+                        start_date + timedelta(days=6),
+                    ),
                 )
-                self.task_repository.get_by_period.assert_called_with(
-                    start_date, end_date
-                )
-                self.assertEqual(result, [])
-
-    async def test_get_tasks_for_week_future_date(self):
-        # arrange
-        input_date = "2030-01-01"  # Будущая дата
-        expected_start_date = date(2030, 1, 1)
-        expected_end_date = date(2030, 1, 7)
-        tasks = [
-            Task(
-                id=1,
-                title="Future Task 1",
-                description="Future Description 1",
-                due_date=date(2030, 1, 3),
-            ),
-            Task(
-                id=2,
-                title="Future Task 2",
-                description="Future Description 2",
-                due_date=date(2030, 1, 6),
-            ),
-        ]
-        self.task_repository.get_by_period.return_value = (
-            tasks
-        )
 
+    def test_get_week_period__no_date__should_from_today(
+        self,
+    ):
         # act
-        result = await self.task_service.get_tasks_for_week(
-            input_date
-        )
+        period = get_week_period(None)
 
         # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            expected_start_date, expected_end_date
-        )
-        self.assertEqual(result, tasks)
-
-    async def test_get_tasks_for_week_none_date(self):
-        # arrange
         today = date.today()
-        expected_start_date = today
-        expected_end_date = today + timedelta(days=6)
-        tasks = [
-            Task(
-                id=1,
-                title="Task Today",
-                description="Description Today",
-                due_date=today + timedelta(days=1),
-            ),
-            Task(
-                id=2,
-                title="Task This Week",
-                description="Description This Week",
-                due_date=today + timedelta(days=5),
-            ),
-        ]
-        self.task_repository.get_by_period.return_value = (
-            tasks
-        )
-
-        # act
-        result = await self.task_service.get_tasks_for_week(
-            None
+        self.assertEqual(
+            period, (today, today + timedelta(days=6))
         )
 
-        # assert
-        self.task_repository.get_by_period.assert_called_once_with(
-            expected_start_date, expected_end_date
-        )
-        self.assertEqual(result, tasks)
+    def test_get_week_period__invalid_format__should_value_error(
+        self,
+    ):
+        # act & assert
+        with self.assertRaises(ValueError):
+            get_week_period("not-a-date")
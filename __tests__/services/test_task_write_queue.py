@@ -0,0 +1,394 @@
+import asyncio
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Optional, Tuple
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from __mocks__.database import (
+    StatementRecorder,
+    create_test_engine,
+)
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+)
+
+from models import Task, TaskWriteTicket
+from schemas.pydantic.task_schema import (
+    TaskPostRequestSchema,
+)
+from services.task_cache import TaskCache
+from services.task_write_queue import (
+    TaskJournal,
+    TaskWriteQueue,
+    TaskWriteQueueFullException,
+)
+
+
+def queue_journal_path(directory: str) -> str:
+    return os.path.abspath(
+        os.path.join(directory, "journal-0.jsonl")
+    )
+
+
+async def wait_status(
+    queue: TaskWriteQueue, ticket: str
+) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Статус квитанции владельца 1 после ее фоновой вставки.
+    """
+    for _ in range(100):
+        status = await queue.get_status(1, ticket)
+        if status[0] is not None:
+            return status
+        await asyncio.sleep(0.01)
+    return status
+
+
+def make_task(title: str) -> TaskPostRequestSchema:
+    return TaskPostRequestSchema(
+        title=title, due_date=date(2030, 1, 1)
+    )
+
+
+class TestTaskWriteQueue(IsolatedAsyncioTestCase):
+    __engine: AsyncEngine
+
+    async def asyncSetUp(self):
+        self.__engine = await create_test_engine()
+        self.__session_maker = async_sessionmaker(
+            bind=self.__engine, expire_on_commit=False
+        )
+        self.__directory = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        await self.__engine.dispose()
+        self.__directory.cleanup()
+
+    def __create_queue(self, **kwargs) -> TaskWriteQueue:
+        return TaskWriteQueue(
+            self.__session_maker,
+            TaskJournal(self.__directory.name),
+            TaskCache(None),
+            **{
+                "batch_size": 100,
+                "flush_interval": 0.01,
+                "max_pending": 100,
+                "retry_interval": 0.01,
+                "tickets_kept": 100,
+                **kwargs,
+            },
+        )
+
+    async def __get_titles(self):
+        async with self.__session_maker() as session:
+            result = await session.scalars(
+                select(Task.title).order_by(Task.id)
+            )
+            return list(result.all())
+
+    async def test_enqueue__concurrent__should_group_commit(
+        self,
+    ):
+        # arrange
+        queue = self.__create_queue()
+        await queue.start()
+
+        # act
+        with StatementRecorder(self.__engine) as recorder:
+            pending = await asyncio.gather(
+                *(
+                    queue.enqueue(1, make_task(f"task {i}"))
+                    for i in range(10)
+                )
+            )
+            await queue.stop()
+
+        # assert - один INSERT задач на все 10 задач
+        inserts = [
+            statement
+            for statement, _ in recorder.statements
+            if statement.startswith("INSERT INTO task ")
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            await self.__get_titles(),
+            [f"task {i}" for i in range(10)],
+        )
+        self.assertEqual(
+            len({task.ticket for task in pending}), 10
+        )
+
+    async def test_get_status__after_flush__should_created(
+        self,
+    ):
+        # arrange
+        queue = self.__create_queue()
+        pending = await queue.enqueue(1, make_task("task"))
+
+        # act
+        before = await wait_status(queue, pending.ticket)
+        await queue.flush()
+        after = await queue.get_status(1, pending.ticket)
+
+        # assert
+        self.assertEqual(before, ("pending", None))
+        self.assertEqual(after[0], "created")
+        self.assertIsNotNone(after[1])
+        self.assertEqual(
+            await queue.get_status(2, pending.ticket),
+            (None, None),
+        )
+        await queue.stop()
+
+    async def test_get_status__other_worker__should_read_db(
+        self,
+    ):
+        # arrange - воркеры с разными журналами и общей БД
+        queue = self.__create_queue()
+        other = self.__create_queue()
+        pending = await queue.enqueue(1, make_task("task"))
+
+        # act - квитанция вставляется в фоне
+        before = await wait_status(other, pending.ticket)
+        await queue.flush()
+        after = await other.get_status(1, pending.ticket)
+
+        # assert
+        self.assertEqual(before, ("pending", None))
+        self.assertEqual(
+            after,
+            await queue.get_status(1, pending.ticket),
+        )
+        self.assertEqual(after[0], "created")
+        await queue.stop()
+        await other.stop()
+
+    async def test_enqueue__db_blocked__should_not_wait(
+        self,
+    ):
+        # arrange - БД не отвечает, пока не открыт released
+        released = asyncio.Event()
+
+        @asynccontextmanager
+        async def blocked_session():
+            await released.wait()
+            async with self.__session_maker() as session:
+                yield session
+
+        queue = TaskWriteQueue(
+            blocked_session,
+            TaskJournal(self.__directory.name),
+            TaskCache(None),
+        )
+
+        # act - ответ зависит только от журнала
+        pending = await asyncio.wait_for(
+            queue.enqueue(1, make_task("task")), timeout=5
+        )
+        released.set()
+        await queue.flush()
+
+        # assert
+        self.assertEqual(
+            (await queue.get_status(1, pending.ticket))[0],
+            "created",
+        )
+        await queue.stop()
+
+    async def test_get_pending__should_owner_and_period(
+        self,
+    ):
+        # arrange
+        queue = self.__create_queue()
+        own = await queue.enqueue(1, make_task("own"))
+        await queue.enqueue(2, make_task("other"))
+
+        # act
+        pending = queue.get_pending(
+            1, date(2030, 1, 1), date(2030, 1, 7)
+        )
+        outside = queue.get_pending(
+            1, date(2030, 2, 1), date(2030, 2, 7)
+        )
+
+        # assert
+        self.assertEqual(pending, [own])
+        self.assertEqual(outside, [])
+        await queue.stop()
+
+    async def test_start__after_crash__should_replay_journal(
+        self,
+    ):
+        # arrange - процесс завершился, не записав задачи
+        journal = TaskJournal(self.__directory.name)
+        queue = TaskWriteQueue(
+            self.__session_maker, journal, TaskCache(None)
+        )
+        for title in ("first", "second"):
+            await queue.enqueue(1, make_task(title))
+        journal.close()
+
+        # act
+        restarted = self.__create_queue()
+        await restarted.start()
+        await restarted.stop()
+
+        # assert
+        self.assertEqual(
+            await self.__get_titles(), ["first", "second"]
+        )
+
+    async def test_start__crash_after_commit__should_skip_written(
+        self,
+    ):
+        # arrange - пакет записан, но запись "done" не
+        # попала в журнал
+        journal = TaskJournal(self.__directory.name)
+        queue = TaskWriteQueue(
+            self.__session_maker, journal, TaskCache(None)
+        )
+        written = await queue.enqueue(
+            1, make_task("written")
+        )
+        await queue.enqueue(1, make_task("pending"))
+        journal.close()
+        async with self.__session_maker.begin() as session:
+            task_id = (
+                await session.execute(
+                    insert(Task).values(
+                        owner_id=1,
+                        title="written",
+                        due_date=date(2030, 1, 1),
+                    )
+                )
+            ).inserted_primary_key[0]
+            await session.execute(
+                update(TaskWriteTicket)
+                .where(
+                    TaskWriteTicket.ticket == written.ticket
+                )
+                .values(status="created", task_id=task_id)
+            )
+
+        # act
+        restarted = self.__create_queue()
+        await restarted.start()
+        await restarted.stop()
+
+        # assert - каждая задача записана ровно один раз
+        self.assertEqual(
+            await self.__get_titles(),
+            ["written", "pending"],
+        )
+
+    async def test_flush__queue_drained__should_release_tickets(
+        self,
+    ):
+        # arrange
+        queue = self.__create_queue(tickets_kept=1)
+        tickets = []
+
+        # act
+        for title in ("first", "second", "third"):
+            tickets.append(
+                (
+                    await queue.enqueue(1, make_task(title))
+                ).ticket
+            )
+            await queue.flush()
+
+        # assert - квитанции очищенного журнала освобождены,
+        # хранится не больше tickets_kept из них
+        async with self.__session_maker() as session:
+            journals = dict(
+                (
+                    await session.execute(
+                        select(
+                            TaskWriteTicket.ticket,
+                            TaskWriteTicket.journal,
+                        )
+                    )
+                ).all()
+            )
+        self.assertEqual(
+            journals,
+            {
+                tickets[1]: None,
+                tickets[2]: queue_journal_path(
+                    self.__directory.name
+                ),
+            },
+        )
+        await queue.stop()
+
+    async def test_start__scaled_down__should_replay_all_journals(
+        self,
+    ):
+        # arrange - журнал воркера с номером больше числа
+        # воркеров после перезапуска
+        path = os.path.join(
+            self.__directory.name, "journal-5.jsonl"
+        )
+        journal = TaskJournal(self.__directory.name, path)
+        queue = TaskWriteQueue(
+            self.__session_maker, journal, TaskCache(None)
+        )
+        pending = await queue.enqueue(
+            1, make_task("orphan")
+        )
+        journal.close()
+
+        # act
+        restarted = self.__create_queue()
+        await restarted.start()
+        await restarted.stop()
+
+        # assert - задача записана, чужой журнал очищен
+        self.assertEqual(
+            await self.__get_titles(), ["orphan"]
+        )
+        self.assertEqual(os.path.getsize(path), 0)
+        self.assertEqual(
+            (await restarted.get_status(1, pending.ticket))[
+                0
+            ],
+            "created",
+        )
+
+    async def test_flush__queue_drained__should_fsync_truncate(
+        self,
+    ):
+        # arrange
+        queue = self.__create_queue()
+        await queue.enqueue(1, make_task("task"))
+
+        # act
+        with patch(
+            "services.task_write_queue.os.fsync",
+            wraps=os.fsync,
+        ) as fsync:
+            await queue.flush()
+
+        # assert - очистка журнала сброшена на диск до
+        # освобождения квитанций
+        fsync.assert_called_once()
+        await queue.stop()
+
+    async def test_enqueue__full__should_raise(self):
+        # arrange
+        queue = self.__create_queue(max_pending=2)
+        for title in ("first", "second"):
+            await queue.enqueue(1, make_task(title))
+
+        # act / assert
+        with self.assertRaises(TaskWriteQueueFullException):
+            await queue.enqueue(1, make_task("third"))
+        self.assertEqual(
+            queue.stats(), {"pending": 2, "max_pending": 2}
+        )
+        await queue.stop()
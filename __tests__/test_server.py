@@ -0,0 +1,51 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from server import resolve_workers, worker_environ
+
+from configs import settings
+
+
+class TestServer(TestCase):
+    def test_resolve_workers__zero__should_cpu_count(self):
+        # arrange
+
+        # act
+        with patch("os.cpu_count", return_value=6):
+            workers = resolve_workers(0)
+
+        # assert
+        self.assertEqual(workers, 6)
+        self.assertEqual(resolve_workers(3), 3)
+
+    def test_worker_environ__memory_cache__should_enable_feed(
+        self,
+    ):
+        # arrange
+
+        # act
+        with patch.object(
+            settings, "tasks_cache_backend", "memory"
+        ), patch.dict("os.environ", clear=True):
+            single = worker_environ(1)
+            several = worker_environ(4)
+
+        # assert - кэш одного воркера сбрасывать по ленте не нужно
+        self.assertEqual(single, {})
+        self.assertEqual(
+            several, {"TODO_API_CHANGE_FEED": "1"}
+        )
+
+    def test_worker_environ__shared_cache__should_not_enable_feed(
+        self,
+    ):
+        # arrange
+
+        # act
+        with patch.object(
+            settings, "tasks_cache_backend", "redis"
+        ), patch.dict("os.environ", clear=True):
+            environ = worker_environ(4)
+
+        # assert
+        self.assertEqual(environ, {})
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+
+from models import *
+from models.base_model import BaseModel
+
+root_dir = os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))
+)
+
+first_request_script = """
+import asyncio
+
+import httpx
+
+import main
+
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app),
+            base_url="http://startup",
+        ) as client:
+            response = await client.get(
+                "/v1/tasks/", params={"date": "2030-01-01"}
+            )
+            response.raise_for_status()
+    print(main.app.openapi_schema is None)
+
+
+asyncio.run(run())
+"""
+
+
+def run_python(code: str, **env: str) -> str:
+    """
+    Выполнить code отдельным интерпретатором и вернуть stdout.
+    """
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=root_dir,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+class TestStartup(TestCase):
+    def test_import_main__should_not_create_engine(self):
+        # arrange
+        code = (
+            "import sys, main, configs.database as db;"
+            "print(db.engine is None, 'aiosqlite' in sys.modules)"
+        )
+
+        # act
+        output = run_python(code)
+
+        # assert - движок БД и драйвер создаются при первом
+        # запросе, а не при импорте
+        self.assertEqual(output.split(), ["True", "False"])
+
+    def test_first_request__should_create_engine_lazily(
+        self,
+    ):
+        # arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "startup.sqlite")
+            engine = create_engine(f"sqlite:///{path}")
+            BaseModel.metadata.create_all(engine)
+            engine.dispose()
+
+            # act
+            output = run_python(
+                first_request_script,
+                TODO_API_DB_URL=f"sqlite+aiosqlite:///{path}",
+            )
+
+        # assert - первый запрос отвечает, схема OpenAPI при
+        # этом не строится
+        self.assertEqual(output.split(), ["True"])
@@ -0,0 +1,115 @@
+"""
+Бенчмарк: пакетные эндпоинты /v1/tasks/batch против поштучных запросов.
+
+Запуск:
+    python -m benchmarks.batch_write --tasks 10000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import benchmark_client
+
+
+def make_tasks(count: int) -> list:
+    today = date.today()
+    return [
+        {
+            "title": f"Задача {i}",
+            "description": f"Описание задачи {i}",
+            "due_date": (
+                today + timedelta(days=i % 365)
+            ).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+async def one_at_a_time(tasks: list) -> dict:
+    timings = {}
+    async with benchmark_client() as client:
+        started = time.perf_counter()
+        ids = []
+        for task in tasks:
+            response = await client.post(
+                "/v1/tasks/", json=task
+            )
+            ids.append(response.json()["id"])
+        timings["create"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for task_id, task in zip(ids, tasks):
+            await client.put(
+                f"/v1/tasks/{task_id}",
+                json={**task, "title": "Обновлено"},
+            )
+        timings["update"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for task_id in ids:
+            await client.delete(f"/v1/tasks/{task_id}")
+        timings["delete"] = time.perf_counter() - started
+    return timings
+
+
+async def batched(tasks: list) -> dict:
+    timings = {}
+    async with benchmark_client() as client:
+        started = time.perf_counter()
+        response = await client.post(
+            "/v1/tasks/batch", json=tasks
+        )
+        ids = [task["id"] for task in response.json()]
+        timings["create"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await client.put(
+            "/v1/tasks/batch",
+            json=[
+                {
+                    **task,
+                    "id": task_id,
+                    "title": "Обновлено",
+                }
+                for task_id, task in zip(ids, tasks)
+            ],
+        )
+        timings["update"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await client.request(
+            "DELETE", "/v1/tasks/batch", json=ids
+        )
+        timings["delete"] = time.perf_counter() - started
+    return timings
+
+
+async def run(count: int) -> None:
+    tasks = make_tasks(count)
+    single = await one_at_a_time(tasks)
+    batch = await batched(tasks)
+
+    print(f"tasks: {count}")
+    print(
+        f"{'':8}{'single, s':>12}{'batch, s':>12}{'speedup':>10}"
+    )
+    for operation in ("create", "update", "delete"):
+        print(
+            f"{operation:8}{single[operation]:12.3f}"
+            f"{batch[operation]:12.3f}"
+            f"{single[operation] / batch[operation]:9.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=10000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.tasks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Общие вспомогательные функции бенчмарков.
+
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from configs.database import (
+    create_db_connection,
+    create_db_engine,
+    get_db_connection,
+)
+from models import *
+from models.base_model import BaseModel
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * q))
+    return ordered[index]
+
+
+@asynccontextmanager
+async def benchmark_client(
+    sqlite_profile: Optional[str] = None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    ASGI-клиент приложения, работающего с временной БД SQLite,
+    чтобы замеры не затрагивали рабочую базу проекта.
+    sqlite_profile - профиль PRAGMA (по умолчанию из настроек).
+    """
+    from main import app
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(
+            "sqlite+aiosqlite:///"
+            + os.path.join(directory, "benchmark.sqlite"),
+            sqlite_profile,
+        )
+        async with engine.begin() as connection:
+            await connection.run_sync(
+                BaseModel.metadata.create_all
+            )
+        app.dependency_overrides[get_db_connection] = (
+            create_db_connection(
+                async_sessionmaker(
+                    bind=engine,
+                    autoflush=False,
+                    expire_on_commit=False,
+                )
+            )
+        )
+        try:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://benchmark",
+                timeout=600,
+            ) as client:
+                yield client
+        finally:
+            app.dependency_overrides.pop(get_db_connection)
+            await engine.dispose()
@@ -0,0 +1,156 @@
+"""
+Бенчмарк сжатия ответов GET /v1/tasks: время сжатия (CPU) против
+размера ответа и времени передачи при разной пропускной способности
+канала.
+
+Для выборок из 10, 100, 1000 и 10000 задач выводятся размер сжатого
+ответа, время сжатия и время отдачи ответа (сжатие и передача) для
+каждой доступной кодировки и уровня. Ответ из кэша выборок сжимается
+один раз, и при попадании остается только передача.
+
+Запуск:
+    python -m benchmarks.compression
+"""
+
+import argparse
+import gzip
+import random
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import orjson
+
+# Пропускная способность канала клиента, бит/с
+bandwidths = {
+    "10 Мбит/с": 10e6,
+    "100 Мбит/с": 100e6,
+    "1 Гбит/с": 1e9,
+}
+
+
+def make_payload(tasks: int) -> bytes:
+    """
+    JSON выборки того же вида, что хранит кэш выборок.
+    """
+    rng = random.Random(tasks)
+    today = date.today()
+    words = [
+        "купить",
+        "позвонить",
+        "отчет",
+        "встреча",
+        "код",
+    ]
+    return orjson.dumps(
+        [
+            {
+                "id": i,
+                "title": f"Задача {rng.randrange(10**6)}",
+                "description": " ".join(
+                    rng.choice(words)
+                    for _ in range(rng.randint(0, 12))
+                ),
+                "due_date": today
+                + timedelta(days=rng.randint(0, 6)),
+            }
+            for i in range(tasks)
+        ]
+    )
+
+
+def make_codecs() -> (
+    List[Tuple[str, Callable[[bytes], bytes]]]
+):
+    codecs: List[Tuple[str, Callable[[bytes], bytes]]] = [
+        ("identity", lambda data: data)
+    ]
+    for level in (1, 6, 9):
+        codecs.append(
+            (
+                f"gzip-{level}",
+                lambda data, level=level: gzip.compress(
+                    data, compresslevel=level, mtime=0
+                ),
+            )
+        )
+    try:
+        import brotli
+
+        for level in (1, 4, 11):
+            codecs.append(
+                (
+                    f"br-{level}",
+                    lambda data, level=level: brotli.compress(
+                        data, quality=level
+                    ),
+                )
+            )
+    except ImportError:
+        pass
+    try:
+        import zstandard
+
+        for level in (1, 3, 19):
+            codecs.append(
+                (
+                    f"zstd-{level}",
+                    zstandard.ZstdCompressor(
+                        level=level
+                    ).compress,
+                )
+            )
+    except ImportError:
+        pass
+    return codecs
+
+
+def measure(
+    codec: Callable[[bytes], bytes],
+    payload: bytes,
+    repeat: int,
+) -> Tuple[int, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compressed = codec(payload)
+        timings.append(time.perf_counter() - started)
+    return len(compressed), sorted(timings)[repeat // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=21)
+    args = parser.parse_args()
+
+    codecs = make_codecs()
+    print(
+        f"{'tasks':>6}{'codec':>10}{'bytes':>10}{'ratio':>7}"
+        f"{'cpu, ms':>9}"
+        + "".join(f"{name:>14}" for name in bandwidths)
+    )
+    for tasks in (10, 100, 1000, 10000):
+        payload = make_payload(tasks)
+        for name, codec in codecs:
+            size, elapsed = measure(
+                codec, payload, args.repeat
+            )
+            # Время отдачи ответа, мс: сжатие и передача
+            totals: Dict[str, float] = {
+                bandwidth: (elapsed + size * 8 / bits)
+                * 1000
+                for bandwidth, bits in bandwidths.items()
+            }
+            print(
+                f"{tasks:>6}{name:>10}{size:>10}"
+                f"{len(payload) / size:7.1f}"
+                f"{elapsed * 1000:9.3f}"
+                + "".join(
+                    f"{total:14.2f}"
+                    for total in totals.values()
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
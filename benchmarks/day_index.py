@@ -0,0 +1,136 @@
+"""
+Бенчмарк: недельные выборки задач владельца из индекса по дням
+(services/task_day_index.py) против запроса к БД по индексу
+ix_task_owner_due_date_id.
+
+Таблица заполняется как в benchmarks.owners; выводятся время
+загрузки окна, оценка памяти индекса и задержки p50/p95 выборки
+крупного, среднего и мелкого владельца.
+
+Запуск:
+    python -m benchmarks.day_index --tasks 1000000 --owners 10000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable, List
+
+from benchmarks import owners
+from benchmarks.common import percentile
+from benchmarks.owners import build_table, owner_sizes
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from configs.database import create_db_engine
+from repositories.task_repository import TaskRepository
+from services.task_day_index import TaskDayIndex
+
+
+async def measure(
+    queries: int, lookup: Callable[[date], Awaitable[List]]
+) -> List[float]:
+    rng = random.Random(1)
+    today = date.today()
+    latencies = []
+    for _ in range(queries):
+        start_date = today + timedelta(
+            days=rng.randint(-30, 30)
+        )
+        started = time.perf_counter()
+        await lookup(start_date)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--tasks", type=int, default=1000000
+    )
+    parser.add_argument("--owners", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tasks.sqlite")
+        # Задачи распределяются по году вокруг сегодняшнего дня.
+        owners.anchor_date = date.today() - timedelta(
+            days=182
+        )
+        build_table(path, args.tasks, args.owners)
+        sizes = owner_sizes(path)
+        ranked = sorted(sizes, key=sizes.get, reverse=True)
+
+        engine = create_db_engine(
+            f"sqlite+aiosqlite:///{path}"
+        )
+        try:
+            task_day_index = TaskDayIndex(
+                async_sessionmaker(bind=engine)
+            )
+            started = time.perf_counter()
+            await task_day_index.warm()
+            stats = task_day_index.stats()
+            print(
+                f"окно {task_day_index.window[0]}.."
+                f"{task_day_index.window[1]}: {stats['tasks']}"
+                f" задач, {stats['bytes'] / 2**20:.1f} МиБ,"
+                f" загружено за"
+                f" {time.perf_counter() - started:.2f} с"
+            )
+
+            print(
+                f"{'owner':>8}{'owner tasks':>13}{'method':>8}"
+                f"{'p50, ms':>10}{'p95, ms':>10}"
+            )
+            async with AsyncSession(engine) as session:
+                for name, owner_id in (
+                    ("large", ranked[0]),
+                    ("medium", ranked[len(ranked) // 100]),
+                    ("small", ranked[len(ranked) // 2]),
+                ):
+                    task_repository = TaskRepository(
+                        session, owner_id
+                    )
+
+                    async def db(start_date: date) -> List:
+                        return await task_repository.get_rows_by_period(
+                            start_date,
+                            start_date + timedelta(days=6),
+                        )
+
+                    async def index(
+                        start_date: date,
+                    ) -> List:
+                        return task_day_index.get_rows(
+                            owner_id,
+                            start_date,
+                            start_date + timedelta(days=6),
+                        )
+
+                    for method, lookup in (
+                        ("db", db),
+                        ("index", index),
+                    ):
+                        latencies = await measure(
+                            args.queries, lookup
+                        )
+                        print(
+                            f"{name:>8}{sizes[owner_id]:>13}"
+                            f"{method:>8}"
+                            f"{percentile(latencies, 0.50) * 1000:10.3f}"
+                            f"{percentile(latencies, 0.95) * 1000:10.3f}"
+                        )
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
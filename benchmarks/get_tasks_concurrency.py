@@ -0,0 +1,95 @@
+"""
+Нагрузочный бенчмарк: задержка GET /v1/tasks при конкурентных клиентах.
+
+Запуск против работающего сервиса:
+    python -m benchmarks.get_tasks_concurrency --url http://127.0.0.1:8000
+
+Запуск внутри процесса (ASGI, без сети):
+    python -m benchmarks.get_tasks_concurrency
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+from benchmarks.common import percentile
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    requests_count: int,
+    latencies: List[float],
+) -> None:
+    for _ in range(requests_count):
+        started = time.perf_counter()
+        response = await client.get(
+            "/v1/tasks/", params={"week": "true"}
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(
+    url: str, clients: int, requests_per_client: int
+) -> None:
+    if url:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=clients)
+        )
+        base_url = url
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://benchmark"
+
+    latencies: List[float] = []
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=60
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                client_loop(
+                    client, requests_per_client, latencies
+                )
+                for _ in range(clients)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    print(f"clients:  {clients}")
+    print(f"requests: {len(latencies)}")
+    print(f"req/s:    {len(latencies) / elapsed:.1f}")
+    print(
+        f"mean:     {statistics.mean(latencies) * 1000:.2f} ms"
+    )
+    for name, q in (
+        ("p50", 0.50),
+        ("p95", 0.95),
+        ("p99", 0.99),
+    ):
+        print(
+            f"{name}:      {percentile(latencies, q) * 1000:.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--url",
+        default="",
+        help="Адрес сервиса; по умолчанию приложение вызывается внутри процесса",
+    )
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()
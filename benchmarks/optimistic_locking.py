@@ -0,0 +1,254 @@
+"""
+Бенчмарк: изменение одних и тех же задач конкурентными клиентами
+(read-modify-write) с оптимистичной блокировкой против
+пессимистичной.
+
+Каждый клиент читает задачу, увеличивает счетчик в ее названии и
+записывает его обратно:
+- optimistic - чтение без блокировки и условный
+  UPDATE ... WHERE id = ? AND version = ?, при конфликте - повтор
+  (как PUT /v1/tasks/{task_id} с If-Match);
+- pessimistic - SELECT ... FOR UPDATE и UPDATE в одной транзакции.
+  SQLite не поддерживает FOR UPDATE: блокировка записи берется
+  при чтении через BEGIN IMMEDIATE;
+- blind - чтение без блокировки и UPDATE без проверки версии
+  (как PUT без If-Match): показывает потерянные изменения.
+
+errors - изменения, не дождавшиеся блокировки записи БД
+(SQLite: busy_timeout, TODO_API_DB_SQLITE_BUSY_TIMEOUT).
+
+Запуск:
+    python -m benchmarks.optimistic_locking --clients 20 --tasks 1 --edits 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import date
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.common import percentile
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+)
+
+from configs.database import create_db_engine
+from models.base_model import BaseModel
+from models.task_model import Task
+
+Edit = Callable[[AsyncEngine, int], Awaitable[int]]
+
+
+async def edit_optimistic(
+    engine: AsyncEngine, task_id: int
+) -> int:
+    """
+    Увеличить счетчик задачи условным UPDATE. Возвращает число
+    повторов из-за конфликтов версий.
+    """
+    retries = 0
+    while True:
+        async with engine.connect() as connection:
+            title, version = (
+                await connection.execute(
+                    select(Task.title, Task.version).where(
+                        Task.id == task_id
+                    )
+                )
+            ).one()
+            await connection.rollback()
+        async with engine.begin() as connection:
+            result = await connection.execute(
+                update(Task)
+                .where(
+                    Task.id == task_id,
+                    Task.version == version,
+                )
+                .values(
+                    title=str(int(title) + 1),
+                    version=Task.version + 1,
+                )
+            )
+        if result.rowcount == 1:
+            return retries
+        retries += 1
+
+
+async def lock_for_update(
+    connection: AsyncConnection,
+) -> None:
+    if connection.dialect.name == "sqlite":
+        # Транзакция сразу берет блокировку записи БД.
+        await connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+async def edit_pessimistic(
+    engine: AsyncEngine, task_id: int
+) -> int:
+    async with engine.connect() as connection:
+        await lock_for_update(connection)
+        title = await connection.scalar(
+            select(Task.title)
+            .where(Task.id == task_id)
+            .with_for_update()
+        )
+        await connection.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(
+                title=str(int(title) + 1),
+                version=Task.version + 1,
+            )
+        )
+        await connection.commit()
+    return 0
+
+
+async def edit_blind(
+    engine: AsyncEngine, task_id: int
+) -> int:
+    async with engine.connect() as connection:
+        title = await connection.scalar(
+            select(Task.title).where(Task.id == task_id)
+        )
+        await connection.rollback()
+    async with engine.begin() as connection:
+        await connection.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(
+                title=str(int(title) + 1),
+                version=Task.version + 1,
+            )
+        )
+    return 0
+
+
+modes: Dict[str, Edit] = {
+    "optimistic": edit_optimistic,
+    "pessimistic": edit_pessimistic,
+    "blind": edit_blind,
+}
+
+
+async def run(
+    engine: AsyncEngine,
+    edit: Edit,
+    clients: int,
+    tasks: int,
+    edits: int,
+) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(
+            BaseModel.metadata.drop_all
+        )
+        await connection.run_sync(
+            BaseModel.metadata.create_all
+        )
+        await connection.execute(
+            insert(Task),
+            [
+                {"title": "0", "due_date": date.today()}
+                for _ in range(tasks)
+            ],
+        )
+
+    latencies: List[float] = []
+    retries = 0
+    errors = 0
+
+    async def client(number: int) -> None:
+        nonlocal retries, errors
+        rng = random.Random(number)
+        for _ in range(edits):
+            started = time.perf_counter()
+            try:
+                retries += await edit(
+                    engine, rng.randint(1, tasks)
+                )
+            except OperationalError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*map(client, range(clients)))
+    elapsed = time.perf_counter() - started
+
+    async with engine.connect() as connection:
+        total = sum(
+            int(title)
+            for title in await connection.scalars(
+                select(Task.title)
+            )
+        )
+    expected = clients * edits - errors
+    print(
+        f"{edit.__name__.removeprefix('edit_'):>12}"
+        f"{expected / elapsed:>10.0f}"
+        f"{percentile(latencies, 0.5) * 1000:>10.1f}"
+        f"{percentile(latencies, 0.95) * 1000:>10.1f}"
+        f"{retries:>9}{errors:>8}{expected - total:>7}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument(
+        "--tasks",
+        type=int,
+        default=1,
+        help="число изменяемых задач (меньше - выше конкуренция)",
+    )
+    parser.add_argument(
+        "--edits",
+        type=int,
+        default=50,
+        help="изменений на клиента",
+    )
+    parser.add_argument(
+        "--db-url",
+        default=None,
+        help="пустая БД для замера (по умолчанию - временный "
+        "файл SQLite); таблицы создаются заново",
+    )
+    parser.add_argument(
+        "--modes",
+        default=",".join(modes),
+        help="режимы через запятую",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(
+            args.db_url
+            or "sqlite+aiosqlite:///"
+            + os.path.join(directory, "benchmark.sqlite")
+        )
+        print(
+            f"{'mode':>12}{'edits/s':>10}{'p50, ms':>10}"
+            f"{'p95, ms':>10}{'retries':>9}{'errors':>8}"
+            f"{'lost':>7}"
+        )
+        try:
+            for mode in args.modes.split(","):
+                await run(
+                    engine,
+                    modes[mode],
+                    args.clients,
+                    args.tasks,
+                    args.edits,
+                )
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
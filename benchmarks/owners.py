@@ -0,0 +1,167 @@
+"""
+Бенчмарк: выборка задач владельца за неделю по индексу
+ix_task_owner_due_date_id при росте таблицы и неравномерном
+распределении задач между владельцами.
+
+Владельцы получают задачи по закону Ципфа: у крупнейшего - заметная
+доля таблицы, у большинства - десятки задач. Для таблиц разного
+размера выводятся задержки p50/p95 недельной выборки крупного,
+среднего и мелкого владельца: для мелкого она не должна расти вместе
+с таблицей.
+
+Запуск:
+    python -m benchmarks.owners --sizes 100000,1000000 --owners 10000
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from benchmarks.common import percentile
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from configs.database import create_db_engine
+from models.base_model import BaseModel
+from repositories.task_repository import TaskRepository
+
+anchor_date = date(2030, 1, 1)
+
+
+def build_table(path: str, tasks: int, owners: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    BaseModel.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(42)
+    # Владелец ранга k получает задачи с весом 1/k.
+    weights = list(
+        itertools.accumulate(
+            1 / rank for rank in range(1, owners + 1)
+        )
+    )
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        # Поиск не измеряется: триггеры FTS только замедлили бы
+        # заполнение.
+        for trigger in ("insert", "update", "delete"):
+            connection.execute(
+                f"DROP TRIGGER task_fts_{trigger}"
+            )
+        for offset in range(0, tasks, 50000):
+            connection.executemany(
+                "INSERT INTO task "
+                "(owner_id, title, due_date, updated_at) "
+                "VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                (
+                    (
+                        rng.choices(
+                            range(1, owners + 1),
+                            cum_weights=weights,
+                        )[0],
+                        "Задача",
+                        (
+                            anchor_date
+                            + timedelta(
+                                days=rng.randint(0, 365)
+                            )
+                        ).isoformat(),
+                    )
+                    for _ in range(
+                        min(50000, tasks - offset)
+                    )
+                ),
+            )
+            connection.commit()
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def owner_sizes(path: str) -> Dict[int, int]:
+    connection = sqlite3.connect(path)
+    try:
+        return dict(
+            connection.execute(
+                "SELECT owner_id, count(*) FROM task "
+                "GROUP BY owner_id"
+            ).fetchall()
+        )
+    finally:
+        connection.close()
+
+
+async def measure_owner(
+    engine, owner_id: int, queries: int
+) -> List[float]:
+    rng = random.Random(owner_id)
+    latencies = []
+    async with AsyncSession(engine) as session:
+        task_repository = TaskRepository(session, owner_id)
+        for _ in range(queries):
+            start_date = anchor_date + timedelta(
+                days=rng.randint(0, 358)
+            )
+            started = time.perf_counter()
+            await task_repository.get_rows_by_period(
+                start_date, start_date + timedelta(days=6)
+            )
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--owners", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'tasks':>9}{'owner':>8}{'owner tasks':>13}"
+        f"{'p50, ms':>10}{'p95, ms':>10}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for size in map(int, args.sizes.split(",")):
+            path = os.path.join(directory, f"{size}.sqlite")
+            build_table(path, size, args.owners)
+            sizes = owner_sizes(path)
+            ranked = sorted(
+                sizes, key=sizes.get, reverse=True
+            )
+            owners = {
+                "large": ranked[0],
+                "medium": ranked[len(ranked) // 100],
+                "small": ranked[len(ranked) // 2],
+            }
+
+            engine = create_db_engine(
+                f"sqlite+aiosqlite:///{path}"
+            )
+            try:
+                for name, owner_id in owners.items():
+                    latencies = await measure_owner(
+                        engine, owner_id, args.queries
+                    )
+                    print(
+                        f"{size:>9}{name:>8}"
+                        f"{sizes[owner_id]:>13}"
+                        f"{percentile(latencies, 0.50) * 1000:10.2f}"
+                        f"{percentile(latencies, 0.95) * 1000:10.2f}"
+                    )
+            finally:
+                await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Микробенчмарк разбора дат: services.task_service.parse_date
+против прежнего разбора через dateutil.parser.
+
+Запуск:
+    python -m benchmarks.parse_date
+"""
+
+import argparse
+import timeit
+from datetime import date, timedelta
+
+from dateutil import parser, tz
+
+from services.task_service import parse_date
+
+
+def parse_date_dateutil(date_str: str) -> date:
+    parsed_datetime = parser.parse(date_str)
+    if parsed_datetime.tzinfo is None:
+        parsed_datetime = parsed_datetime.replace(
+            tzinfo=tz.UTC
+        )
+    return parsed_datetime.date()
+
+
+def parse_date_uncached(date_str: str) -> date:
+    return parse_date.__wrapped__(date_str)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__
+    )
+    arg_parser.add_argument(
+        "--number", type=int, default=100000
+    )
+    args = arg_parser.parse_args()
+
+    # Типичная нагрузка: несколько десятков различных дат.
+    dates = [
+        (date(2024, 1, 1) + timedelta(days=i)).isoformat()
+        for i in range(64)
+    ]
+
+    def run(parse) -> float:
+        def body():
+            for date_str in dates:
+                parse(date_str)
+
+        rounds = max(1, args.number // len(dates))
+        elapsed = timeit.timeit(body, number=rounds)
+        return elapsed / (rounds * len(dates)) * 1e9
+
+    print(f"{'parser':24}{'ns/call':>10}")
+    for name, parse in (
+        ("dateutil.parser.parse", parse_date_dateutil),
+        ("date.fromisoformat", parse_date_uncached),
+        ("parse_date (lru_cache)", parse_date),
+    ):
+        print(f"{name:24}{run(parse):10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Бенчмарк: полнотекстовый поиск задач по индексу FTS5
+(TaskRepository.search) против наивного LIKE '%слово%' по title и
+description.
+
+Корпус задач из случайных слов словаря создается один раз и
+хранится в .benchmarks/search-<tasks>.sqlite. Запросы - слова
+частых, средних и редких слов; для каждого способа выводятся
+задержки p50/p95 получения первой страницы результатов.
+
+Запуск:
+    python -m benchmarks.search --tasks 1000000 --queries 200
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable, List
+
+from benchmarks.common import percentile
+from sqlalchemy import create_engine, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from configs import settings
+from configs.database import create_db_engine
+from models.base_model import BaseModel
+from models.task_model import Task
+from repositories.task_repository import (
+    TaskRepository,
+    task_columns,
+)
+
+vocabulary_size = 20000
+page_size = 100
+
+
+def make_vocabulary(rng: random.Random) -> List[str]:
+    letters = "абвгдеежзиклмнопрстуфхцчшыэюя"
+    return [
+        "".join(rng.choices(letters, k=rng.randint(4, 10)))
+        for _ in range(vocabulary_size)
+    ]
+
+
+def make_text(
+    rng: random.Random,
+    vocabulary: List[str],
+    weights: List[float],
+    words: int,
+) -> str:
+    return " ".join(
+        rng.choices(
+            vocabulary, cum_weights=weights, k=words
+        )
+    )
+
+
+def zipf_weights() -> List[float]:
+    # Частота слова обратна его рангу (закон Ципфа), как в живом
+    # тексте; веса накопленные для random.choices.
+    return list(
+        itertools.accumulate(
+            1 / rank
+            for rank in range(1, vocabulary_size + 1)
+        )
+    )
+
+
+def build_corpus(path: str, tasks: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    BaseModel.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    weights = zipf_weights()
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        # Индекс task_fts заполняется триггером на INSERT.
+        for offset in range(0, tasks, 50000):
+            connection.executemany(
+                "INSERT INTO task "
+                "(title, description, due_date, updated_at) "
+                "VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                (
+                    (
+                        make_text(
+                            rng, vocabulary, weights, 3
+                        ),
+                        make_text(
+                            rng, vocabulary, weights, 12
+                        ),
+                        (
+                            date(2030, 1, 1)
+                            + timedelta(
+                                days=rng.randint(0, 365)
+                            )
+                        ).isoformat(),
+                    )
+                    for _ in range(
+                        min(50000, tasks - offset)
+                    )
+                ),
+            )
+            connection.commit()
+        connection.execute(
+            "INSERT INTO task_fts(task_fts) VALUES ('optimize')"
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def corpus_path(tasks: int) -> str:
+    os.makedirs(".benchmarks", exist_ok=True)
+    path = os.path.abspath(
+        os.path.join(
+            ".benchmarks", f"search-{tasks}.sqlite"
+        )
+    )
+    if not os.path.exists(path):
+        build_corpus(path + ".tmp", tasks)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+async def measure(
+    words: List[str],
+    search: Callable[[str], Awaitable[int]],
+) -> List[float]:
+    latencies = []
+    for word in words:
+        started = time.perf_counter()
+        await search(word)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--tasks", type=int, default=1000000
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    path = corpus_path(args.tasks)
+    rng = random.Random(7)
+    vocabulary = make_vocabulary(random.Random(42))
+    # Слова разной частоты: у частых ранжируется большая часть
+    # корпуса, LIKE же останавливается на первой странице.
+    query_sets = {
+        "frequent": rng.choices(
+            vocabulary[:10], k=args.queries
+        ),
+        "medium": rng.choices(
+            vocabulary[100:1000], k=args.queries
+        ),
+        "rare": rng.choices(
+            vocabulary[5000:], k=args.queries
+        ),
+    }
+
+    engine = create_db_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with AsyncSession(engine) as session:
+            task_repository = TaskRepository(
+                session, settings.default_owner_id
+            )
+
+            async def fts(word: str) -> int:
+                rows = await task_repository.search(
+                    word, None, None, page_size
+                )
+                return len(rows)
+
+            async def like(word: str) -> int:
+                pattern = f"%{word}%"
+                result = await session.execute(
+                    select(*task_columns)
+                    .where(
+                        or_(
+                            Task.title.like(pattern),
+                            Task.description.like(pattern),
+                        )
+                    )
+                    .order_by(Task.id)
+                    .limit(page_size)
+                )
+                return len(result.all())
+
+            print(
+                f"{args.tasks} задач, {args.queries} запросов"
+            )
+            print(
+                f"{'words':>9}{'method':>8}"
+                f"{'p50, ms':>10}{'p95, ms':>10}"
+            )
+            for words_name, words in query_sets.items():
+                for name, search in (
+                    ("fts5", fts),
+                    ("like", like),
+                ):
+                    latencies = await measure(words, search)
+                    print(
+                        f"{words_name:>9}{name:>8}"
+                        f"{percentile(latencies, 0.50) * 1000:10.2f}"
+                        f"{percentile(latencies, 0.95) * 1000:10.2f}"
+                    )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
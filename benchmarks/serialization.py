@@ -0,0 +1,130 @@
+"""
+Бенчмарк сериализации списка задач: прежний путь FastAPI
+(сущности ORM -> TaskResponseSchema -> jsonable_encoder -> json)
+против кодирования строк БД через orjson.
+
+Запуск:
+    python -m benchmarks.serialization
+"""
+
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, select
+
+from models.task_model import Task
+from pydantic import TypeAdapter
+from repositories.task_repository import task_columns
+from routers.responses import dumps
+from schemas.pydantic.task_schema import TaskResponseSchema
+
+tasks_adapter = TypeAdapter(List[TaskResponseSchema])
+
+
+def make_tasks(count: int) -> List[Task]:
+    today = date.today()
+    return [
+        Task(
+            id=i,
+            title=f"Задача {i}",
+            description=f"Описание задачи {i}",
+            due_date=today + timedelta(days=i % 365),
+            updated_at=datetime.now(timezone.utc),
+        )
+        for i in range(count)
+    ]
+
+
+def make_rows(tasks: List[Task]) -> list:
+    # Строки того же вида, что возвращает TaskRepository.
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        Task.metadata.create_all(connection)
+        connection.execute(
+            Task.__table__.insert(),
+            [
+                {
+                    "id": task.id,
+                    "title": task.title,
+                    "description": task.description,
+                    "due_date": task.due_date,
+                    "updated_at": task.updated_at,
+                }
+                for task in tasks
+            ],
+        )
+        return connection.execute(
+            select(*task_columns).order_by(Task.id)
+        ).all()
+
+
+def fastapi_path(tasks: List[Task]) -> bytes:
+    validated = tasks_adapter.validate_python(
+        tasks, from_attributes=True
+    )
+    content = jsonable_encoder(
+        tasks_adapter.dump_python(validated, mode="json")
+    )
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def pydantic_path(tasks: List[Task]) -> bytes:
+    return tasks_adapter.dump_json(
+        tasks_adapter.validate_python(
+            tasks, from_attributes=True
+        )
+    )
+
+
+def measure(
+    function: Callable, argument, repeat: int
+) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'tasks':>8}{'fastapi, ms':>14}{'pydantic, ms':>14}"
+        f"{'orjson rows, ms':>17}{'speedup':>9}"
+    )
+    for size in args.sizes:
+        tasks = make_tasks(size)
+        rows = make_rows(tasks)
+        fastapi_time = measure(
+            fastapi_path, tasks, args.repeat
+        )
+        pydantic_time = measure(
+            pydantic_path, tasks, args.repeat
+        )
+        orjson_time = measure(dumps, rows, args.repeat)
+        print(
+            f"{size:>8}{fastapi_time * 1000:14.1f}"
+            f"{pydantic_time * 1000:14.1f}"
+            f"{orjson_time * 1000:17.1f}"
+            f"{fastapi_time / orjson_time:8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
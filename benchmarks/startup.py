@@ -0,0 +1,144 @@
+"""
+Бенчмарк запуска воркера: время импорта main (по python -X
+importtime) и время от старта интерпретатора до первого ответа
+GET /v1/tasks на временной БД SQLite.
+
+Выводятся медианы по --repeat запускам и самые медленные импорты.
+
+Запуск:
+    python -m benchmarks.startup --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+from sqlalchemy import create_engine
+
+from models import *
+from models.base_model import BaseModel
+
+root_dir = os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))
+)
+
+first_request_script = """
+import asyncio
+
+import httpx
+
+import main
+
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app),
+            base_url="http://startup",
+        ) as client:
+            response = await client.get(
+                "/v1/tasks/", params={"date": "2030-01-01"}
+            )
+            response.raise_for_status()
+
+
+asyncio.run(run())
+"""
+
+
+def profile_imports() -> List[Tuple[int, int, str]]:
+    """
+    Импортировать main с -X importtime: (собственное время, время
+    с вложенными импортами в мкс, модуль).
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import main",
+        ],
+        cwd=root_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line[12:].split("|")
+        if own.strip().isdigit():
+            imports.append(
+                (int(own), int(cumulative), name.strip())
+            )
+    return imports
+
+
+def first_request(path: str) -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", first_request_script],
+        cwd=root_dir,
+        env={
+            **os.environ,
+            "TODO_API_DB_URL": f"sqlite+aiosqlite:///{path}",
+        },
+        check=True,
+    )
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=10,
+        help="сколько самых медленных импортов вывести",
+    )
+    args = parser.parse_args()
+
+    import_times = []
+    imports: List[Tuple[int, int, str]] = []
+    for _ in range(args.repeat):
+        imports = profile_imports()
+        (main_time,) = [
+            cumulative
+            for _, cumulative, name in imports
+            if name == "main"
+        ]
+        import_times.append(main_time / 1e6)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "startup.sqlite")
+        engine = create_engine(f"sqlite:///{path}")
+        BaseModel.metadata.create_all(engine)
+        engine.dispose()
+        request_times = [
+            first_request(path) for _ in range(args.repeat)
+        ]
+
+    print(
+        f"import main: {statistics.median(import_times):.3f} с"
+    )
+    print(
+        "первый ответ GET /v1/tasks: "
+        f"{statistics.median(request_times):.3f} с"
+    )
+    print("самые медленные импорты (последний запуск):")
+    for own, _, name in sorted(imports, reverse=True)[
+        : args.slowest
+    ]:
+        print(f"{own / 1000:8.1f} мс {name}")
+
+
+if __name__ == "__main__":
+    main()
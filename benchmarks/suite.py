@@ -0,0 +1,703 @@
+"""
+Воспроизводимый набор бенчмарков эндпоинтов /v1/tasks.
+
+Заполнение таблицы task (10k, 1M, 10M строк и т. п.):
+    python -m benchmarks.suite seed --rows 1000000
+
+Замер create, get_tasks (date/week/period), update и delete
+через ASGI-клиент в процессе или через воркеры uvicorn:
+    python -m benchmarks.suite run --rows 10000 --mode asgi
+    python -m benchmarks.suite run --rows 1000000 --mode uvicorn \
+        --workers 4 --output head.json
+
+Сравнение двух ревизий git (или сохраненных результатов JSON)
+с отметкой регрессий:
+    python -m benchmarks.suite compare HEAD~1 HEAD --rows 10000
+    python -m benchmarks.suite compare base.json head.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+
+import httpx
+from benchmarks.common import percentile
+
+# Опорная дата сгенерированных задач: одна и та же при любом
+# запуске, чтобы результаты разных дней были сравнимы.
+anchor_date = date(2030, 1, 1)
+
+scenarios = (
+    "create",
+    "get_date",
+    "get_week",
+    "get_period",
+    "update",
+    "delete",
+)
+
+seed_chunk_size = 50000
+
+
+def random_due_date(rng: random.Random) -> date:
+    """
+    Реалистичное распределение сроков: большинство задач около
+    опорной даты, часть запланирована на год вперед, часть
+    просрочена.
+    """
+    kind = rng.random()
+    if kind < 0.7:
+        offset = round(rng.gauss(0, 14))
+    elif kind < 0.9:
+        offset = rng.randint(0, 365)
+    else:
+        offset = -rng.randint(1, 365)
+    return anchor_date + timedelta(days=offset)
+
+
+def seed(
+    path: str, rows: int, random_seed: int = 42
+) -> None:
+    """
+    Заполнить таблицу task в файле SQLite. Если файла нет, схема
+    создается по текущим моделям; иначе используется имеющаяся
+    (например, созданная миграциями другой ревизии).
+    """
+    if not os.path.exists(path):
+        from sqlalchemy import create_engine
+
+        from models import Task
+        from models.base_model import BaseModel
+
+        engine = create_engine(f"sqlite:///{path}")
+        BaseModel.metadata.create_all(engine)
+        engine.dispose()
+
+    connection = sqlite3.connect(path)
+    try:
+        columns = {
+            row[1]
+            for row in connection.execute(
+                "PRAGMA table_info(task)"
+            )
+        }
+        now = datetime.now(timezone.utc).isoformat(" ")
+        # Необязательные колонки более поздних ревизий
+        extra = {
+            name: value
+            for name, value in (("updated_at", now),)
+            if name in columns
+        }
+        names = ["title", "description", "due_date", *extra]
+        statement = (
+            f"INSERT INTO task ({', '.join(names)}) "
+            f"VALUES ({', '.join('?' * len(names))})"
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute("DELETE FROM task")
+
+        rng = random.Random(random_seed)
+        for offset in range(0, rows, seed_chunk_size):
+            connection.executemany(
+                statement,
+                (
+                    (
+                        f"Задача {i}",
+                        f"Описание задачи {i}",
+                        random_due_date(rng).isoformat(),
+                        *extra.values(),
+                    )
+                    for i in range(
+                        offset,
+                        min(rows, offset + seed_chunk_size),
+                    )
+                ),
+            )
+            connection.commit()
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def seeded_database(data_dir: str, rows: int) -> str:
+    """
+    Путь к заполненной БД на rows задач; БД переиспользуется
+    между запусками.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.abspath(
+        os.path.join(data_dir, f"tasks-{rows}.sqlite")
+    )
+    if not os.path.exists(path):
+        seed(path + ".tmp", rows)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+class Workload:
+    """
+    Генератор запросов сценариев. Для delete выдаются разные
+    идентификаторы, чтобы каждый запрос удалял существующую задачу.
+    """
+
+    def __init__(
+        self, rows: int, random_seed: int = 7
+    ) -> None:
+        self.__rows = rows
+        self.__rng = random.Random(random_seed)
+        self.__next_delete = rows
+
+    def request(self, scenario: str) -> tuple:
+        rng = self.__rng
+        due_date = random_due_date(rng).isoformat()
+        if scenario == "create":
+            return (
+                "POST",
+                "/v1/tasks/",
+                {"json": self.__task_body(rng)},
+            )
+        if scenario == "get_date":
+            return (
+                "GET",
+                "/v1/tasks/",
+                {"params": {"date": due_date}},
+            )
+        if scenario == "get_week":
+            return (
+                "GET",
+                "/v1/tasks/",
+                {
+                    "params": {
+                        "week": "true",
+                        "date": due_date,
+                    }
+                },
+            )
+        if scenario == "get_period":
+            start_date = random_due_date(rng)
+            end_date = start_date + timedelta(
+                days=rng.randint(1, 30)
+            )
+            return (
+                "GET",
+                "/v1/tasks/",
+                {
+                    "params": {
+                        "start_date": start_date.isoformat(),
+                        "end_date": end_date.isoformat(),
+                    }
+                },
+            )
+        if scenario == "update":
+            return (
+                "PUT",
+                f"/v1/tasks/{rng.randint(1, self.__rows // 2)}",
+                {"json": self.__task_body(rng)},
+            )
+        if scenario == "delete":
+            task_id = self.__next_delete
+            self.__next_delete -= 1
+            return ("DELETE", f"/v1/tasks/{task_id}", {})
+        raise ValueError(scenario)
+
+    @staticmethod
+    def __task_body(rng: random.Random) -> dict:
+        # Срок новой задачи не может быть в прошлом.
+        return {
+            "title": f"Задача {rng.randrange(10**9)}",
+            "description": "Описание",
+            "due_date": (
+                date.today()
+                + timedelta(days=rng.randint(0, 60))
+            ).isoformat(),
+        }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    scenario: str,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    pending = [
+        workload.request(scenario) for _ in range(requests)
+    ]
+
+    async def worker() -> None:
+        nonlocal errors
+        while pending:
+            method, url, options = pending.pop()
+            started = time.perf_counter()
+            response = await client.request(
+                method, url, **options
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(worker() for _ in range(concurrency))
+    )
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(
+            percentile(latencies, 0.50) * 1000, 2
+        ),
+        "p95_ms": round(
+            percentile(latencies, 0.95) * 1000, 2
+        ),
+        "p99_ms": round(
+            percentile(latencies, 0.99) * 1000, 2
+        ),
+    }
+
+
+@asynccontextmanager
+async def asgi_client(
+    database: str,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    ASGI-клиент приложения текущего дерева, работающего с копией
+    заполненной БД.
+    """
+    from main import app
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from configs.database import (
+        create_db_connection,
+        create_db_engine,
+        get_db_connection,
+    )
+
+    engine = create_db_engine(
+        f"sqlite+aiosqlite:///{database}"
+    )
+    app.dependency_overrides[get_db_connection] = (
+        create_db_connection(
+            async_sessionmaker(
+                bind=engine,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+        )
+    )
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://benchmark",
+            timeout=600,
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_db_connection)
+        await engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_client(
+    database: str,
+    workers: int,
+    concurrency: int,
+    cwd: Optional[str] = None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Клиент воркеров uvicorn, запущенных в каталоге cwd (по умолчанию
+    текущее дерево) с БД database.
+    """
+    port = free_port()
+    env = {
+        **os.environ,
+        "TODO_API_DB_URL": f"sqlite+aiosqlite:///{database}",
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=cwd,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(
+            base_url=base_url,
+            timeout=600,
+            limits=httpx.Limits(
+                max_connections=concurrency
+            ),
+        ) as client:
+            for _ in range(300):
+                if server.poll() is not None:
+                    raise RuntimeError(
+                        "uvicorn завершился при запуске"
+                    )
+                try:
+                    await client.get("/openapi.json")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn не запустился")
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def run(
+    client_factory: Callable[[str], Awaitable],
+    database: str,
+    rows: int,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Dict[str, float]]:
+    # Каждый прогон работает с копией БД, чтобы запись не меняла
+    # исходные данные.
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, "tasks.sqlite")
+        shutil.copyfile(database, copy)
+        results = {}
+        async with client_factory(copy) as client:
+            workload = Workload(rows)
+            for scenario in scenarios:
+                results[scenario] = await run_scenario(
+                    client,
+                    workload,
+                    scenario,
+                    requests,
+                    concurrency,
+                )
+                print(
+                    f"{scenario:>11}: "
+                    + json.dumps(results[scenario]),
+                    file=sys.stderr,
+                )
+        return results
+
+
+def git_revision(cwd: Optional[str] = None) -> str:
+    return subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def make_report(
+    args: argparse.Namespace,
+    results: dict,
+    revision: str,
+    mode: str,
+) -> dict:
+    return {
+        "meta": {
+            "revision": revision,
+            "mode": mode,
+            "rows": args.rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "python": platform.python_version(),
+            "started_at": datetime.now(
+                timezone.utc
+            ).isoformat(),
+        },
+        "scenarios": results,
+    }
+
+
+def run_current(args: argparse.Namespace) -> dict:
+    database = seeded_database(args.data_dir, args.rows)
+    if args.mode == "asgi":
+        factory = asgi_client
+    else:
+
+        def factory(path: str):
+            return uvicorn_client(
+                path, args.workers, args.concurrency
+            )
+
+    results = asyncio.run(
+        run(
+            factory,
+            database,
+            args.rows,
+            args.requests,
+            args.concurrency,
+        )
+    )
+    return make_report(
+        args, results, git_revision(), args.mode
+    )
+
+
+def run_revision(
+    args: argparse.Namespace, revision: str
+) -> dict:
+    """
+    Замерить ревизию git через uvicorn в отдельном рабочем дереве.
+    Схема БД создается миграциями этой ревизии.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        worktree = os.path.join(directory, "tree")
+        subprocess.run(
+            [
+                "git",
+                "worktree",
+                "add",
+                "--detach",
+                worktree,
+                revision,
+            ],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            # Старые ревизии работают с migrator/todo-api.sqlite,
+            # новые - с TODO_API_DB_URL: используется один файл.
+            database = os.path.join(
+                worktree, "migrator", "todo-api.sqlite"
+            )
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "alembic",
+                    "upgrade",
+                    "head",
+                ],
+                cwd=worktree,
+                env={
+                    **os.environ,
+                    "TODO_API_DB_URL": (
+                        f"sqlite+aiosqlite:///{database}"
+                    ),
+                },
+                check=True,
+                capture_output=True,
+            )
+            seed(database, args.rows)
+
+            def factory(path: str):
+                return uvicorn_client(
+                    path,
+                    args.workers,
+                    args.concurrency,
+                    cwd=worktree,
+                )
+
+            print(f"{revision}:", file=sys.stderr)
+            results = asyncio.run(
+                run(
+                    factory,
+                    database,
+                    args.rows,
+                    args.requests,
+                    args.concurrency,
+                )
+            )
+            return make_report(
+                args,
+                results,
+                git_revision(worktree),
+                "uvicorn",
+            )
+        finally:
+            subprocess.run(
+                [
+                    "git",
+                    "worktree",
+                    "remove",
+                    "--force",
+                    worktree,
+                ],
+                capture_output=True,
+            )
+
+
+def compare(
+    base: dict, head: dict, threshold: float
+) -> List[str]:
+    """
+    Найти регрессии head относительно base: падение req/s или
+    рост p95/p99 больше чем на threshold (доля).
+    """
+    regressions = []
+    for scenario, base_result in base["scenarios"].items():
+        head_result = head["scenarios"].get(scenario)
+        if head_result is None:
+            continue
+        if head_result["rps"] < base_result["rps"] * (
+            1 - threshold
+        ):
+            regressions.append(
+                f"{scenario}: req/s {base_result['rps']}"
+                f" -> {head_result['rps']}"
+            )
+        for key in ("p95_ms", "p99_ms"):
+            if head_result[key] > base_result[key] * (
+                1 + threshold
+            ):
+                regressions.append(
+                    f"{scenario}: {key} {base_result[key]}"
+                    f" -> {head_result[key]}"
+                )
+    return regressions
+
+
+def load_or_run(
+    args: argparse.Namespace, target: str
+) -> dict:
+    if target.endswith(".json") and os.path.exists(target):
+        with open(target) as file:
+            return json.load(file)
+    return run_revision(args, target)
+
+
+def print_comparison(base: dict, head: dict) -> None:
+    print(
+        f"{'scenario':>11}{'req/s':>18}"
+        f"{'p95, ms':>20}{'p99, ms':>20}"
+    )
+    for scenario, base_result in base["scenarios"].items():
+        head_result = head["scenarios"].get(scenario)
+        if head_result is None:
+            continue
+        print(
+            f"{scenario:>11}"
+            + "".join(
+                f"{base_result[key]:>9} ->{head_result[key]:>7}"
+                for key in ("rps", "p95_ms", "p99_ms")
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(
+        dest="command", required=True
+    )
+
+    seed_parser = commands.add_parser("seed")
+    run_parser = commands.add_parser("run")
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="допустимое ухудшение (доля)",
+    )
+
+    for command in (
+        seed_parser,
+        run_parser,
+        compare_parser,
+    ):
+        command.add_argument(
+            "--rows", type=int, default=10000
+        )
+        command.add_argument(
+            "--data-dir", default=".benchmarks"
+        )
+    for command in (run_parser, compare_parser):
+        command.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="запросов на сценарий",
+        )
+        command.add_argument(
+            "--concurrency", type=int, default=50
+        )
+        command.add_argument(
+            "--workers", type=int, default=1
+        )
+        command.add_argument("--output")
+    run_parser.add_argument(
+        "--mode",
+        choices=("asgi", "uvicorn"),
+        default="asgi",
+    )
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        print(seeded_database(args.data_dir, args.rows))
+        return
+
+    if args.command == "run":
+        report = run_current(args)
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w") as file:
+                file.write(output + "\n")
+        print(output)
+        return
+
+    base = load_or_run(args, args.base)
+    head = load_or_run(args, args.head)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {"base": base, "head": head}, file, indent=2
+            )
+    print_comparison(base, head)
+    regressions = compare(base, head, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
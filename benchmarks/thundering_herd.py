@@ -0,0 +1,133 @@
+"""
+Бенчмарк: одновременные одинаковые запросы GET /v1/tasks при холодном
+кэше с объединением загрузок (single-flight) и без него.
+
+Запуск:
+    python -m benchmarks.thundering_herd --clients 500
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import benchmark_client
+from main import app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.single_flight import (
+    SingleFlight,
+    get_task_queries,
+)
+from services.task_cache import (
+    MemoryCacheBackend,
+    TaskCache,
+    get_task_cache,
+)
+
+
+class NoSingleFlight(SingleFlight):
+    """
+    Каждый вызов выполняет собственную загрузку.
+    """
+
+    async def run(self, key, load):
+        return await load()
+
+
+async def run(
+    single_flight: SingleFlight, clients: int, tasks: int
+) -> dict:
+    today = date.today()
+    selects = 0
+
+    def count_select(
+        connection, cursor, statement, *args
+    ) -> None:
+        nonlocal selects
+        if statement.startswith("SELECT"):
+            selects += 1
+
+    app.dependency_overrides[get_task_queries] = lambda: (
+        single_flight
+    )
+    async with benchmark_client() as client:
+        await client.post(
+            "/v1/tasks/batch",
+            json=[
+                {
+                    "title": f"Задача {i}",
+                    "due_date": (
+                        today + timedelta(days=i % 7)
+                    ).isoformat(),
+                }
+                for i in range(tasks)
+            ],
+        )
+        # холодный кэш: записи еще нет
+        task_cache = TaskCache(MemoryCacheBackend(16, 60))
+        app.dependency_overrides[get_task_cache] = lambda: (
+            task_cache
+        )
+
+        event.listen(
+            Engine, "before_cursor_execute", count_select
+        )
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    client.get(
+                        "/v1/tasks/",
+                        params={
+                            "week": "true",
+                            "date": today.isoformat(),
+                        },
+                    )
+                    for _ in range(clients)
+                )
+            )
+            elapsed = time.perf_counter() - started
+        finally:
+            event.remove(
+                Engine,
+                "before_cursor_execute",
+                count_select,
+            )
+            app.dependency_overrides.pop(get_task_cache)
+            app.dependency_overrides.pop(get_task_queries)
+
+    return {
+        "queries": selects,
+        "coalesced": single_flight.coalesced,
+        "elapsed": elapsed,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--tasks", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>14}{'db queries':>12}"
+        f"{'coalesced':>11}{'time, ms':>10}"
+    )
+    for name, single_flight in (
+        ("no coalescing", NoSingleFlight()),
+        ("single-flight", SingleFlight()),
+    ):
+        result = await run(
+            single_flight, args.clients, args.tasks
+        )
+        print(
+            f"{name:>14}{result['queries']:12}"
+            f"{result['coalesced']:11}"
+            f"{result['elapsed'] * 1000:10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,214 @@
+"""
+Бенчмарк: пропускная способность GET /v1/tasks при запуске через
+server.py с 1, 2, 4, ... воркерами.
+
+Сервис работает с копией БД benchmarks.suite; нагрузку создают
+несколько процессов-клиентов, чтобы клиент на одном ядре не
+ограничивал замер. Выводятся запросы в секунду, ускорение
+относительно одного воркера и задержки p50/p95.
+
+Запуск:
+    python -m benchmarks.workers_scaling --rows 1000000 \
+        --max-workers 8 --clients 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+import httpx
+from benchmarks.common import percentile
+from benchmarks.suite import (
+    Workload,
+    free_port,
+    seeded_database,
+)
+
+
+def worker_counts(max_workers: int) -> List[int]:
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+    return counts
+
+
+async def load(
+    url: str,
+    rows: int,
+    scenario: str,
+    requests: int,
+    concurrency: int,
+    random_seed: int,
+) -> Tuple[List[float], float]:
+    workload = Workload(rows, random_seed)
+    pending = [
+        workload.request(scenario) for _ in range(requests)
+    ]
+    latencies: List[float] = []
+
+    async with httpx.AsyncClient(
+        base_url=url,
+        timeout=600,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+
+        async def worker() -> None:
+            while pending:
+                method, path, options = pending.pop()
+                started = time.perf_counter()
+                response = await client.request(
+                    method, path, **options
+                )
+                response.raise_for_status()
+                latencies.append(
+                    time.perf_counter() - started
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(worker() for _ in range(concurrency))
+        )
+        return latencies, time.perf_counter() - started
+
+
+def run_client(
+    arguments: tuple,
+) -> Tuple[List[float], float]:
+    return asyncio.run(load(*arguments))
+
+
+def wait_ready(server: subprocess.Popen, url: str) -> None:
+    for _ in range(600):
+        if server.poll() is not None:
+            raise RuntimeError(
+                "server.py завершился при запуске"
+            )
+        try:
+            httpx.get(f"{url}/openapi.json")
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError("server.py не запустился")
+
+
+def measure(
+    args: argparse.Namespace, database: str, workers: int
+) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, "tasks.sqlite")
+        shutil.copyfile(database, copy)
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "server",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--workers",
+                str(workers),
+                "--no-migrate",
+            ],
+            env={
+                **os.environ,
+                "TODO_API_DB_URL": f"sqlite+aiosqlite:///{copy}",
+            },
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(server, url)
+            with multiprocessing.get_context("spawn").Pool(
+                args.clients
+            ) as pool:
+                results = pool.map(
+                    run_client,
+                    [
+                        (
+                            url,
+                            args.rows,
+                            args.scenario,
+                            args.requests // args.clients,
+                            args.concurrency // args.clients
+                            or 1,
+                            client,
+                        )
+                        for client in range(args.clients)
+                    ],
+                )
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+    latencies = [
+        latency
+        for client_latencies, _ in results
+        for latency in client_latencies
+    ]
+    elapsed = max(elapsed for _, elapsed in results)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument(
+        "--scenario",
+        choices=("get_date", "get_week", "get_period"),
+        default="get_week",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=10000
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=64
+    )
+    parser.add_argument(
+        "--clients",
+        type=int,
+        default=max(1, (os.cpu_count() or 1) // 2),
+        help="процессов-клиентов, создающих нагрузку",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+    )
+    parser.add_argument("--data-dir", default=".benchmarks")
+    args = parser.parse_args()
+
+    database = seeded_database(args.data_dir, args.rows)
+    print(
+        f"{'workers':>8}{'rps':>10}{'speedup':>9}"
+        f"{'p50, ms':>10}{'p95, ms':>10}"
+    )
+    baseline = None
+    for workers in worker_counts(args.max_workers):
+        result = measure(args, database, workers)
+        baseline = baseline or result["rps"]
+        print(
+            f"{workers:>8}{result['rps']:10.0f}"
+            f"{result['rps'] / baseline:9.2f}"
+            f"{result['p50_ms']:10.2f}{result['p95_ms']:10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
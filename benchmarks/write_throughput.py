@@ -0,0 +1,109 @@
+"""
+Бенчмарк: пропускная способность записи в SQLite с профилем
+PRAGMA "default" (журнал DELETE, synchronous=FULL) и "tuned"
+(WAL, synchronous=NORMAL, mmap, кэш страниц).
+
+Конкурентные клиенты создают задачи по одной (транзакция на
+задачу) напрямую через движок БД и через POST /v1/tasks/.
+
+Запуск:
+    python -m benchmarks.write_throughput --clients 20 --tasks 2000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.common import benchmark_client
+from sqlalchemy import insert
+
+from configs.database import create_db_engine
+from models.base_model import BaseModel
+from models.task_model import Task
+
+
+async def engine_writes(
+    profile: str, clients: int, per_client: int
+) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(
+            "sqlite+aiosqlite:///"
+            + os.path.join(directory, "benchmark.sqlite"),
+            profile,
+        )
+        async with engine.begin() as connection:
+            await connection.run_sync(
+                BaseModel.metadata.create_all
+            )
+
+        async def write(number: int) -> None:
+            for i in range(per_client):
+                async with engine.begin() as connection:
+                    await connection.execute(
+                        insert(Task).values(
+                            title=f"Задача {number}-{i}",
+                            description="Описание",
+                            due_date=date.today(),
+                        )
+                    )
+
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(
+                *map(write, range(clients))
+            )
+            return time.perf_counter() - started
+        finally:
+            await engine.dispose()
+
+
+async def api_writes(
+    profile: str, clients: int, per_client: int
+) -> float:
+    async with benchmark_client(profile) as client:
+
+        async def write(number: int) -> None:
+            for i in range(per_client):
+                await client.post(
+                    "/v1/tasks/",
+                    json={
+                        "title": f"Задача {number}-{i}",
+                        "description": "Описание",
+                        "due_date": date.today().isoformat(),
+                    },
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*map(write, range(clients)))
+        return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=2000)
+    args = parser.parse_args()
+    per_client = args.tasks // args.clients
+    count = per_client * args.clients
+
+    print(
+        f"{'profile':>8}{'engine, tx/s':>15}{'api, tx/s':>12}"
+    )
+    for profile in ("default", "tuned"):
+        engine_time = await engine_writes(
+            profile, args.clients, per_client
+        )
+        api_time = await api_writes(
+            profile, args.clients, per_client
+        )
+        print(
+            f"{profile:>8}{count / engine_time:15.0f}"
+            f"{count / api_time:12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,24 +1,385 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+import math
+import time
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 import configs.environment as environment
 import configs.settings as settings
 
-engine = create_engine(
-    settings.db_conn_string,
-    future=True,
-    echo=environment.debug,
+
+def get_sqlite_pragmas(
+    profile: str,
+) -> List[Tuple[str, Any]]:
+    """
+    Получить PRAGMA профиля SQLite, выполняемые при открытии
+    каждого соединения.
+    """
+    if profile == "default":
+        return []
+    if profile == "tuned":
+        return [
+            # WAL: чтение не блокируется записью, а фиксация
+            # транзакции не требует перезаписи основного файла.
+            ("journal_mode", "WAL"),
+            # В режиме WAL NORMAL сохраняет целостность БД,
+            # синхронизируя журнал с диском только при checkpoint.
+            ("synchronous", "NORMAL"),
+            ("mmap_size", settings.db_sqlite_mmap_size),
+            ("cache_size", settings.db_sqlite_cache_size),
+            (
+                "busy_timeout",
+                settings.db_sqlite_busy_timeout,
+            ),
+            ("temp_store", "MEMORY"),
+        ]
+    raise ValueError(
+        f"Неизвестный профиль SQLite: '{profile}'"
+    )
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, сохраняющий в connection_record.info время
+    ожидания соединения ("checkout_wait", секунды) для метрик.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        record = super()._do_get()
+        record.info["checkout_wait"] = (
+            time.perf_counter() - started
+        )
+        return record
+
+
+def get_engine_options(url: URL) -> Dict[str, Any]:
+    """
+    Получить параметры create_async_engine для СУБД из url
+    по настройкам пула и ограничению времени запроса.
+    """
+    options: Dict[str, Any] = {
+        "echo": environment.debug,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+    # SQLite в памяти работает с единственным соединением
+    # без пула с очередью: его размеры неприменимы.
+    if not is_sqlite_memory(url):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+
+    if (
+        url.get_backend_name() == "postgresql"
+        and url.get_driver_name() == "asyncpg"
+        and settings.db_statement_timeout
+    ):
+        options["connect_args"] = {
+            "server_settings": {
+                "statement_timeout": str(
+                    settings.db_statement_timeout
+                )
+            }
+        }
+
+    return options
+
+
+def is_sqlite_memory(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:")
+    )
+
+
+def create_db_engine(
+    conn_string: Optional[str] = None,
+    sqlite_profile: Optional[str] = None,
+) -> AsyncEngine:
+    """
+    Создать асинхронный движок БД по настройкам configs.settings.
+    Для SQLite к каждому соединению применяется профиль PRAGMA.
+    """
+    url = make_url(conn_string or settings.db_conn_string)
+    engine = create_async_engine(
+        url, **get_engine_options(url)
+    )
+
+    if url.get_backend_name() == "sqlite":
+        pragmas = get_sqlite_pragmas(
+            sqlite_profile or settings.db_sqlite_profile
+        )
+        if pragmas:
+
+            @event.listens_for(
+                engine.sync_engine, "connect"
+            )
+            def set_sqlite_pragmas(
+                dbapi_connection, connection_record
+            ):
+                cursor = dbapi_connection.cursor()
+                for name, value in pragmas:
+                    cursor.execute(f"PRAGMA {name}={value}")
+                cursor.close()
+
+    return engine
+
+
+class ReplicaSet:
+    """
+    Реплики БД для чтения. Реплика выбирается по кругу;
+    недоступная реплика исключается из выбора на retry_interval
+    секунд, после чего снова участвует в нем.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine],
+        retry_interval: float,
+    ) -> None:
+        self.engines = list(engines)
+        self.__retry_interval = retry_interval
+        self.__failed_until = [0.0] * len(self.engines)
+        self.__next = 0
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """
+        Получить следующую доступную реплику (None, если
+        доступных нет).
+        """
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = self.__next
+            self.__next = (index + 1) % len(self.engines)
+            if self.__failed_until[index] <= now:
+                return self.engines[index]
+        return None
+
+    def mark_failed(self, engine: AsyncEngine) -> None:
+        index = self.engines.index(engine)
+        self.__failed_until[index] = (
+            time.monotonic() + self.__retry_interval
+        )
+
+
+# Движок основной БД и реплики создаются при первом обращении, а
+# не при импорте модуля: импорт приложения не загружает драйвер БД
+# (быстрый запуск воркера), а модули, которым БД не нужна, не
+# создают движок.
+engine: Optional[AsyncEngine] = None
+replicas: Optional[ReplicaSet] = None
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Движок основной БД (settings.db_conn_string).
+    """
+    global engine
+    if engine is None:
+        engine = create_db_engine()
+    return engine
+
+
+def get_replicas() -> ReplicaSet:
+    """
+    Реплики для чтения (settings.db_replica_conn_strings).
+    """
+    global replicas
+    if replicas is None:
+        replicas = ReplicaSet(
+            [
+                create_db_engine(conn_string)
+                for conn_string in settings.db_replica_conn_strings
+            ],
+            settings.db_replica_retry_interval,
+        )
+    return replicas
+
+
+class LazySessionMaker(async_sessionmaker):
+    """
+    Фабрика сессий основной БД: привязывается к get_engine при
+    создании первой сессии.
+    """
+
+    def __call__(self, **local_kw: Any) -> AsyncSession:
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+# expire_on_commit=False: после commit атрибуты сущностей
+# остаются доступны без повторной (неявной) загрузки из БД,
+# которая в асинхронном режиме невозможна.
+session_local = LazySessionMaker(
+    autoflush=False,
+    expire_on_commit=False,
 )
 
-session_local = sessionmaker(autoflush=False, bind=engine)
 
+# Запросы этих методов получают сессию только для чтения:
+# без транзакции, commit и flush.
+read_only_methods = frozenset(("GET", "HEAD", "OPTIONS"))
+
+AfterCommit = Callable[[], Awaitable[None]]
+
+
+def after_commit(
+    db: AsyncSession, callback: AfterCommit
+) -> None:
+    """
+    Выполнить callback после фиксации транзакции запроса.
+    При откате транзакции callback не выполняется.
+    """
+    db.info.setdefault("after_commit", []).append(callback)
+
+
+def open_session(db: AsyncSession) -> AsyncSession:
+    """
+    Открыть новую сессию той же БД (реплики), что и сессия
+    запроса db, из той же фабрики. Для загрузок, результат которых
+    разделяют конкурентные запросы: отмена запроса, начавшего
+    загрузку, закрывает его сессию, но не эту.
+    """
+    session_factory = db.info.get("session_factory")
+    if session_factory is not None:
+        return session_factory()
+    return AsyncSession(
+        db.bind, autoflush=False, expire_on_commit=False
+    )
 
-def get_db_connection():
+
+def reads_own_writes(db: AsyncSession) -> bool:
+    """
+    Сессия запроса на чтение направлена в основную БД, потому что
+    клиент недавно выполнял запись: общим для процесса кэшам и
+    загрузкам, которые могли заполнить отстающие реплики, такой
+    запрос не доверяет.
     """
-    Получить сессию БД.
+    return db.info.get("reads_own_writes", False)
+
+
+# Cookie со временем (unix), до которого клиент после записи
+# читает из основной БД
+primary_cookie = "todo-api-primary-until"
+
+
+def create_db_connection(
+    session_maker: async_sessionmaker,
+    replica_set: Union[
+        ReplicaSet, Callable[[], ReplicaSet], None
+    ] = None,
+    sticky_window: float = 0,
+) -> Callable[..., AsyncIterator[AsyncSession]]:
     """
-    db = scoped_session(session_local)
-    try:
-        yield db
-    finally:
-        db.close()
+    Создать зависимость FastAPI, выдающую сессию БД на время
+    запроса: одна транзакция на запрос, commit при успешном
+    выполнении эндпоинта и rollback при исключении.
+
+    Запросы на чтение направляются в реплики replica_set, если
+    клиент не выполнял запись в последние sticky_window секунд.
+    replica_set может быть функцией, создающей реплики при первом
+    запросе.
+    """
+    use_replicas: Optional[bool] = None
+
+    def has_replicas() -> bool:
+        nonlocal replica_set, use_replicas
+        if use_replicas is None:
+            if callable(replica_set):
+                replica_set = replica_set()
+            use_replicas = bool(
+                replica_set and replica_set.engines
+            )
+        return use_replicas
+
+    def is_sticky(request: Request) -> bool:
+        try:
+            primary_until = float(
+                request.cookies.get(primary_cookie, 0)
+            )
+        except ValueError:
+            primary_until = 0
+        return primary_until > time.time()
+
+    async def get_db_connection(
+        request: Request, response: Response
+    ) -> AsyncIterator[AsyncSession]:
+        if request.method in read_only_methods:
+            sticky = has_replicas() and is_sticky(request)
+            replica = (
+                replica_set.choose()
+                if has_replicas() and not sticky
+                else None
+            )
+            session_factory = partial(
+                session_maker,
+                **({"bind": replica} if replica else {}),
+            )
+            async with session_factory() as db:
+                db.info["session_factory"] = session_factory
+                db.info["reads_own_writes"] = sticky
+                try:
+                    yield db
+                except (
+                    InterfaceError,
+                    OperationalError,
+                    OSError,
+                ):
+                    # Реплика недоступна: запрос завершается
+                    # ошибкой, следующие идут в другие реплики.
+                    if replica is not None:
+                        replica_set.mark_failed(replica)
+                    raise
+            return
+
+        if sticky_window and has_replicas():
+            response.set_cookie(
+                primary_cookie,
+                str(time.time() + sticky_window),
+                max_age=math.ceil(sticky_window),
+                httponly=True,
+            )
+        async with session_maker() as db:
+            async with db.begin():
+                yield db
+            for callback in db.info.pop("after_commit", ()):
+                await callback()
+
+    return get_db_connection
+
+
+# Сессия БД запроса. Подключается через
+# Depends(get_db_connection, scope="function"), чтобы транзакция
+# фиксировалась до отправки ответа, а не после.
+get_db_connection = create_db_connection(
+    session_local,
+    get_replicas,
+    settings.db_replica_sticky_window,
+)
@@ -0,0 +1,63 @@
+"""
+Схема OpenAPI, сгенерированная заранее.
+
+Построение схемы по маршрутам занимает десятки миллисекунд при
+первом запросе /docs каждого воркера; образ docker генерирует ее
+при сборке, а воркеры читают готовый файл:
+    python -m configs.openapi openapi.json
+"""
+
+import logging
+import os
+import sys
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import FastAPI
+
+from configs import settings
+
+logger = logging.getLogger(__name__)
+
+
+def dump_openapi_schema(app: FastAPI, path: str) -> None:
+    """
+    Построить схему приложения по маршрутам и записать в файл.
+    """
+    # FastAPI.openapi, а не app.openapi: у приложения, запущенного
+    # с готовой схемой, app.openapi возвращает ее.
+    with open(path, "wb") as file:
+        file.write(orjson.dumps(FastAPI.openapi(app)))
+
+
+def load_openapi_schema(
+    path: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Прочитать схему из файла. None, если файла нет или схема
+    сгенерирована для другой версии API: тогда приложение строит
+    схему само.
+    """
+    if not os.path.exists(path):
+        logger.warning(
+            "Файл схемы OpenAPI %s не найден", path
+        )
+        return None
+    with open(path, "rb") as file:
+        schema = orjson.loads(file.read())
+    if schema.get("info", {}).get("version") != (
+        settings.api_version
+    ):
+        logger.warning(
+            "Схема OpenAPI %s сгенерирована для другой версии"
+            " API",
+            path,
+        )
+        return None
+    return schema
+
+
+if __name__ == "__main__":
+    from main import app
+
+    dump_openapi_schema(app, sys.argv[1])
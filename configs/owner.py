@@ -0,0 +1,56 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+from fastapi.exceptions import RequestValidationError
+
+from configs import settings
+from pydantic import (
+    NonNegativeInt,
+    TypeAdapter,
+    ValidationError,
+)
+
+owner_id_adapter = TypeAdapter(NonNegativeInt)
+
+
+def get_owner_id(
+    owner_header: Optional[str] = Header(
+        None,
+        alias=settings.owner_header,
+        description="Идентификатор владельца задач (целое >= 0)",
+    ),
+) -> int:
+    """
+    Зависимость FastAPI: владелец задач запроса. Все выборки и
+    изменения задач ограничиваются этим владельцем.
+
+    От нее зависят и роутер, и TaskService, и TaskRepository.
+    Ошибку валидации заголовка FastAPI не кэширует и собирает с
+    каждой из них, поэтому заголовок проверяется здесь, а ошибка
+    поднимается исключением - в ответе 422 она одна.
+    """
+    if owner_header is not None:
+        try:
+            return owner_id_adapter.validate_python(
+                owner_header
+            )
+        except ValidationError as e:
+            raise RequestValidationError(
+                [
+                    {
+                        **error,
+                        "loc": (
+                            "header",
+                            settings.owner_header,
+                            *error["loc"],
+                        ),
+                    }
+                    for error in e.errors(include_url=False)
+                ]
+            ) from e
+    if settings.owner_required:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Не указан заголовок {settings.owner_header}.",
+        )
+    return settings.default_owner_id
@@ -1,4 +1,270 @@
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+
+
 app_title = "todo-api"
 api_version = "1.0.0"
 
-db_conn_string = "sqlite:///migrator/todo-api.sqlite"
+# Схема OpenAPI, сгенерированная при сборке образа
+# (python -m configs.openapi <файл>): при запуске читается из
+# файла вместо построения по маршрутам при первом запросе /docs.
+# Пустая строка - схема строится приложением.
+openapi_schema_file = os.environ.get(
+    "TODO_API_OPENAPI_SCHEMA", ""
+)
+
+# Запуск в продакшн (python -m server)
+server_host = os.environ.get("TODO_API_HOST", "0.0.0.0")
+server_port = env_int("TODO_API_PORT", 8000)
+# Число воркеров uvicorn (0 - по числу процессоров)
+server_workers = env_int("TODO_API_WORKERS", 0)
+# Сколько секунд при остановке ждать завершения принятых запросов
+server_graceful_timeout = env_float(
+    "TODO_API_GRACEFUL_TIMEOUT", 30.0
+)
+# Файл блокировки, под которой применяются миграции: запуски на
+# одном хосте (контейнеры с общим томом БД) не применяют их
+# одновременно.
+server_migrate_lock = os.environ.get(
+    "TODO_API_MIGRATE_LOCK", "migrator/.migrate.lock"
+)
+
+# Строка подключения к БД через асинхронный драйвер:
+# - SQLite: "sqlite+aiosqlite:///<путь к файлу>"
+# - PostgreSQL: "postgresql+asyncpg://<user>:<password>@<host>/<db>"
+db_conn_string = os.environ.get(
+    "TODO_API_DB_URL",
+    "sqlite+aiosqlite:///migrator/todo-api.sqlite",
+)
+
+# Пул соединений (для SQLite в памяти не применяется)
+db_pool_size = env_int("TODO_API_DB_POOL_SIZE", 5)
+db_max_overflow = env_int("TODO_API_DB_MAX_OVERFLOW", 10)
+db_pool_timeout = env_float(
+    "TODO_API_DB_POOL_TIMEOUT", 30.0
+)
+# Проверка соединения перед выдачей из пула
+db_pool_pre_ping = env_bool(
+    "TODO_API_DB_POOL_PRE_PING", True
+)
+# Пересоздание соединений старше заданного числа секунд
+# (-1 - без ограничения)
+db_pool_recycle = env_int("TODO_API_DB_POOL_RECYCLE", 1800)
+# Ограничение времени выполнения запроса, мс (0 - без ограничения).
+# PostgreSQL: statement_timeout сессии; SQLite: не поддерживается.
+db_statement_timeout = env_int(
+    "TODO_API_DB_STATEMENT_TIMEOUT", 0
+)
+
+# Реплики для чтения: строки подключения через запятую.
+# Запросы GET распределяются по ним по кругу, запись идет в
+# основную БД db_conn_string.
+db_replica_conn_strings = tuple(
+    conn_string.strip()
+    for conn_string in os.environ.get(
+        "TODO_API_DB_REPLICA_URLS", ""
+    ).split(",")
+    if conn_string.strip()
+)
+# На сколько секунд недоступная реплика исключается из выбора
+db_replica_retry_interval = env_float(
+    "TODO_API_DB_REPLICA_RETRY_INTERVAL", 30.0
+)
+# Сколько секунд после записи клиент читает из основной БД
+# (read-your-writes, 0 - отключено)
+db_replica_sticky_window = env_float(
+    "TODO_API_DB_REPLICA_STICKY_WINDOW", 5.0
+)
+
+# Профиль SQLite, применяемый к каждому новому соединению:
+# "tuned" - WAL и параметры ниже, "default" - настройки SQLite
+db_sqlite_profile = os.environ.get(
+    "TODO_API_DB_SQLITE_PROFILE", "tuned"
+)
+db_sqlite_mmap_size = env_int(
+    "TODO_API_DB_SQLITE_MMAP_SIZE", 256 * 1024 * 1024
+)
+# Отрицательное значение - размер в КиБ (64 МиБ)
+db_sqlite_cache_size = env_int(
+    "TODO_API_DB_SQLITE_CACHE_SIZE", -64 * 1024
+)
+db_sqlite_busy_timeout = env_int(
+    "TODO_API_DB_SQLITE_BUSY_TIMEOUT", 5000
+)
+
+# Владелец задач определяется заголовком owner_header, который
+# выставляет шлюз аутентификации. Без заголовка запрос относится к
+# default_owner_id, а при owner_required отклоняется с 401.
+owner_header = os.environ.get(
+    "TODO_API_OWNER_HEADER", "X-Owner-Id"
+)
+owner_required = env_bool("TODO_API_OWNER_REQUIRED", False)
+default_owner_id = env_int("TODO_API_DEFAULT_OWNER_ID", 0)
+
+# Постраничная выдача и потоковая передача задач
+tasks_page_default_limit = 100
+tasks_page_max_limit = 1000
+tasks_stream_batch_size = 500
+
+# Максимальное количество задач в пакетном запросе
+tasks_batch_max_size = 10000
+
+# Максимальная длина строки полнотекстового поиска задач
+tasks_search_max_length = 256
+
+# Отложенная запись (services/task_write_queue.py): при включении
+# POST /v1/tasks/ с заголовком "Prefer: respond-async" ставит задачу
+# в очередь и отвечает 202. Фоновый обработчик записывает очередь
+# пакетами до write_behind_batch_size задач не реже чем раз в
+# write_behind_flush_interval секунд.
+write_behind_enabled = env_bool(
+    "TODO_API_WRITE_BEHIND", False
+)
+write_behind_batch_size = env_int(
+    "TODO_API_WRITE_BEHIND_BATCH_SIZE", 500
+)
+write_behind_flush_interval = env_float(
+    "TODO_API_WRITE_BEHIND_FLUSH_INTERVAL", 0.05
+)
+# Предел очереди: сверх него запросы отклоняются с 503
+write_behind_max_pending = env_int(
+    "TODO_API_WRITE_BEHIND_MAX_PENDING", 10000
+)
+# Каталог журналов очереди (по журналу на процесс)
+write_behind_journal_dir = os.environ.get(
+    "TODO_API_WRITE_BEHIND_JOURNAL_DIR", "write-behind"
+)
+# Пауза перед повтором записи пакета после ошибки БД
+write_behind_retry_interval = env_float(
+    "TODO_API_WRITE_BEHIND_RETRY_INTERVAL", 1.0
+)
+# Сколько квитанций записанных задач хранить в task_write_ticket
+# для GET /v1/tasks/pending/{ticket} после очистки журнала
+write_behind_tickets_kept = env_int(
+    "TODO_API_WRITE_BEHIND_TICKETS_KEPT", 10000
+)
+
+# Индекс задач по дням в памяти процесса
+# (services/task_day_index.py): задачи дней
+# [сегодня - tasks_day_index_window_days;
+# сегодня + tasks_day_index_window_days] загружаются при запуске,
+# и выборки этих дней выполняются без запросов задач к БД.
+tasks_day_index_enabled = env_bool(
+    "TODO_API_DAY_INDEX", False
+)
+tasks_day_index_window_days = env_int(
+    "TODO_API_DAY_INDEX_WINDOW_DAYS", 60
+)
+# Оценка занимаемой памяти, байт: при превышении окно сужается
+# с дальнего от сегодня края.
+tasks_day_index_max_bytes = env_int(
+    "TODO_API_DAY_INDEX_MAX_BYTES", 256 * 1024 * 1024
+)
+# Лента изменений задач task_change (services/task_change_feed.py):
+# все воркеры пишут в нее изменения задач, а перед выборками читают
+# чужие изменения и сбрасывают затронутые записи кэша в памяти.
+# Нужна индексу задач по дням и нескольким воркерам с кэшем "memory".
+tasks_change_feed_enabled = (
+    env_bool("TODO_API_CHANGE_FEED", False)
+    or tasks_day_index_enabled
+)
+# Как часто читать ленту, секунды. 0 - перед каждой выборкой:
+# изменения других воркеров видны сразу ценой одного запроса по
+# первичному ключу ленты.
+tasks_change_feed_sync_interval = env_float(
+    "TODO_API_CHANGE_FEED_SYNC_INTERVAL", 0.0
+)
+# Сколько хранить записи ленты, секунды. Воркер, не читавший ленту
+# дольше половины этого срока, загружает свое состояние заново.
+tasks_change_feed_retention = env_float(
+    "TODO_API_CHANGE_FEED_RETENTION", 3600.0
+)
+# PostgreSQL выдает номера ленты до фиксации транзакций, поэтому
+# пропуск в номерах ждет опоздавшую запись не дольше этого
+# времени, секунды.
+tasks_change_feed_gap_timeout = env_float(
+    "TODO_API_CHANGE_FEED_GAP_TIMEOUT", 5.0
+)
+
+# Кэш выборок задач по периоду: "memory", "redis" или "none"
+tasks_cache_backend = "memory"
+tasks_cache_max_entries = 1024
+tasks_cache_ttl = 30.0
+tasks_cache_redis_url = "redis://localhost:6379/0"
+
+# Сжатие ответов (services/compression.py): кодировка выбирается
+# по Accept-Encoding из перечисленных (при равном весе - первая).
+# br и zstd требуют установки пакетов brotli и zstandard, которых
+# нет в Pipfile, например "zstd,br,gzip". Пустая строка - без
+# сжатия.
+compression_encodings = tuple(
+    encoding.strip()
+    for encoding in os.environ.get(
+        "TODO_API_COMPRESSION", "gzip"
+    ).split(",")
+    if encoding.strip()
+)
+# Ответы меньше этого размера, байт, отдаются без сжатия
+compression_min_size = env_int(
+    "TODO_API_COMPRESSION_MIN_SIZE", 1024
+)
+# Уровни сжатия: gzip 1-9, brotli 0-11, zstd 1-22
+compression_gzip_level = env_int(
+    "TODO_API_COMPRESSION_GZIP_LEVEL", 6
+)
+compression_brotli_level = env_int(
+    "TODO_API_COMPRESSION_BROTLI_LEVEL", 4
+)
+compression_zstd_level = env_int(
+    "TODO_API_COMPRESSION_ZSTD_LEVEL", 3
+)
+
+# Разбор дат в параметрах запросов: помимо ISO 8601 (гггг-мм-дд)
+# принимаются только явно перечисленные форматы strptime,
+# например "%d.%m.%Y".
+date_extra_formats = ()
+date_parse_cache_size = 1024
+
+# Профилирование запросов (monitoring/profiler.py).
+# При выключенном профилировании и пустом токене middleware
+# не подключается.
+profiling_enabled = env_bool("TODO_API_PROFILING", False)
+# Доля запросов, выполняемых под cProfile
+profiling_sample_rate = env_float(
+    "TODO_API_PROFILING_SAMPLE_RATE", 0.01
+)
+# Запросы дольше порога (секунды) сохраняются в отчеты
+profiling_slow_threshold = env_float(
+    "TODO_API_PROFILING_SLOW_THRESHOLD", 0.5
+)
+# Каталог отчетов и их максимальное количество (старые удаляются)
+profiling_dir = os.environ.get(
+    "TODO_API_PROFILING_DIR", "profiles"
+)
+profiling_max_reports = env_int(
+    "TODO_API_PROFILING_MAX_REPORTS", 100
+)
+# Токен заголовка X-Profile: профилирование отдельного запроса
+# и доступ к /v1/admin/profiles (пустой - запрещено)
+profiling_token = os.environ.get(
+    "TODO_API_PROFILING_TOKEN", ""
+)
@@ -1,23 +1,98 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
 
 from configs import settings
+from configs.openapi import load_openapi_schema
 from models.tags import tags
+from monitoring.metrics import (
+    MetricsMiddleware,
+    instrument_db,
+)
+from monitoring.profiler import ProfilerMiddleware
 from repositories.task_repository import (
     TaskNotFoundException,
+    TaskVersionConflictException,
 )
+from routers.compression import CompressionMiddleware
+from routers.metrics_router import metrics_router
+from routers.v1.cache_router import cache_router
+from routers.v1.profile_router import profile_router
 from routers.v1.task_router import task_router
+from services.task_change_feed import (
+    create_task_change_feed,
+)
+from services.task_day_index import create_task_day_index
+from services.task_service import (
+    InvalidCursorException,
+    make_task_etag,
+)
+from services.task_write_queue import (
+    TaskWriteQueueFullException,
+    create_task_write_queue,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Чтение ленты изменений начинается до загрузки индекса задач
+    # по дням, а индекс загружается до приема запросов.
+    if settings.tasks_change_feed_enabled:
+        await create_task_change_feed().start()
+    if settings.tasks_day_index_enabled:
+        await create_task_day_index().warm()
+    # Очередь отложенной записи дописывает задачи из журнала
+    # при запуске и записывает оставшиеся при остановке.
+    task_write_queue = (
+        create_task_write_queue()
+        if settings.write_behind_enabled
+        else None
+    )
+    if task_write_queue is not None:
+        await task_write_queue.start()
+    try:
+        yield
+    finally:
+        if task_write_queue is not None:
+            await task_write_queue.stop()
+
 
 # Инициализация веб-сервиса.
 app = FastAPI(
     title=settings.app_title,
     version=settings.api_version,
     openapi_tags=tags,
+    lifespan=lifespan,
 )
 
 # Подключение маршрутов.
 app.include_router(task_router)
+app.include_router(cache_router)
+app.include_router(metrics_router)
+app.include_router(profile_router)
+
+# Сжатие ответов по Accept-Encoding.
+app.add_middleware(CompressionMiddleware)
+
+# Сбор метрик HTTP- и SQL-запросов.
+app.add_middleware(MetricsMiddleware)
+instrument_db()
+
+# Профилирование запросов: без настройки middleware не подключается.
+if settings.profiling_enabled or settings.profiling_token:
+    app.add_middleware(ProfilerMiddleware)
+
+# Схема OpenAPI, сгенерированная при сборке.
+openapi_schema = (
+    load_openapi_schema(settings.openapi_schema_file)
+    if settings.openapi_schema_file
+    else None
+)
+if openapi_schema is not None:
+    app.openapi = lambda: openapi_schema
 
 
 @app.exception_handler(TaskNotFoundException)
@@ -30,6 +105,49 @@ async def task_not_found_exception_handler(
     )
 
 
+@app.exception_handler(TaskVersionConflictException)
+async def task_version_conflict_exception_handler(
+    request: Request, exc: TaskVersionConflictException
+):
+    # ETag текущей версии: клиент может перечитать задачу
+    # и повторить изменение.
+    return JSONResponse(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        content=({"msg": exc.message}),
+        headers={"ETag": make_task_etag(exc.version)},
+    )
+
+
+@app.exception_handler(InvalidCursorException)
+async def invalid_cursor_exception_handler(
+    request: Request, exc: InvalidCursorException
+):
+    return JSONResponse(
+        status_code=422,
+        content=({"msg": exc.message}),
+    )
+
+
+@app.exception_handler(TaskWriteQueueFullException)
+async def task_write_queue_full_exception_handler(
+    request: Request, exc: TaskWriteQueueFullException
+):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=({"msg": exc.message}),
+        headers={
+            "Retry-After": str(
+                max(
+                    1,
+                    round(
+                        settings.write_behind_flush_interval
+                    ),
+                )
+            )
+        },
+    )
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(
     request: Request, exc: HTTPException
@@ -1,8 +1,10 @@
+import asyncio
 from logging.config import fileConfig
 
 from alembic import context
+from sqlalchemy.engine import Connection
 
-from configs.database import engine
+from configs.database import get_engine
 from models import *
 from models.base_model import BaseModel
 
@@ -14,17 +16,42 @@ if config.config_file_name is not None:
 target_metadata = BaseModel.metadata
 
 
-def run_migrations_online() -> None:
-    connectable = engine
-
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata,
+def include_object(
+    object, name, type_, reflected, compare_to
+) -> bool:
+    # Объекты полнотекстового поиска создаются миграцией вручную
+    # и не описаны в моделях: autogenerate не должен их удалять.
+    if reflected and compare_to is None:
+        return not (
+            name.startswith("task_fts")
+            or name
+            in ("search_vector", "ix_task_search_vector")
         )
+    return True
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
 
-        with context.begin_transaction():
-            context.run_migrations()
+async def run_async_migrations() -> None:
+    connectable = get_engine()
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    asyncio.run(run_async_migrations())
 
 
 run_migrations_online()
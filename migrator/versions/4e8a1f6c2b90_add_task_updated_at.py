@@ -0,0 +1,47 @@
+"""add task updated_at
+
+Revision ID: 4e8a1f6c2b90
+Revises: 9c2e4b7a1d35
+Create Date: 2026-10-18 12:31:07.553102
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4e8a1f6c2b90"
+down_revision: Union[str, None] = "9c2e4b7a1d35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "task",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+        ),
+    )
+    op.execute(
+        sa.text(
+            "UPDATE task SET updated_at = CURRENT_TIMESTAMP"
+        )
+    )
+    # SQLite не умеет менять NOT NULL через ALTER TABLE,
+    # batch-режим пересоздает таблицу.
+    with op.batch_alter_table("task") as batch_op:
+        batch_op.alter_column(
+            "updated_at",
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("task") as batch_op:
+        batch_op.drop_column("updated_at")
@@ -0,0 +1,77 @@
+"""add task search index
+
+Revision ID: b71d0e3f5a28
+Revises: 4e8a1f6c2b90
+Create Date: 2026-10-18 19:05:12.418337
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b71d0e3f5a28"
+down_revision: Union[str, None] = "4e8a1f6c2b90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Триггеры task_fts удаляются вместе с таблицей task: миграции,
+# пересоздающие task в batch-режиме, должны создавать их заново.
+sqlite_upgrade = (
+    "CREATE VIRTUAL TABLE task_fts USING fts5("
+    "title, description, content='task', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER task_fts_update "
+    "AFTER UPDATE OF title, description ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    # Индексация уже существующих задач
+    "INSERT INTO task_fts(task_fts) VALUES ('rebuild')",
+)
+
+sqlite_downgrade = (
+    "DROP TRIGGER task_fts_update",
+    "DROP TRIGGER task_fts_delete",
+    "DROP TRIGGER task_fts_insert",
+    "DROP TABLE task_fts",
+)
+
+postgresql_upgrade = (
+    "ALTER TABLE task ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', "
+    "coalesce(title, '') || ' ' || coalesce(description, ''))) "
+    "STORED",
+    "CREATE INDEX ix_task_search_vector ON task "
+    "USING gin (search_vector)",
+)
+
+postgresql_downgrade = (
+    "DROP INDEX ix_task_search_vector",
+    "ALTER TABLE task DROP COLUMN search_vector",
+)
+
+
+def upgrade() -> None:
+    for statement in {
+        "sqlite": sqlite_upgrade,
+        "postgresql": postgresql_upgrade,
+    }.get(op.get_bind().dialect.name, ()):
+        op.execute(sa.text(statement))
+
+
+def downgrade() -> None:
+    for statement in {
+        "sqlite": sqlite_downgrade,
+        "postgresql": postgresql_downgrade,
+    }.get(op.get_bind().dialect.name, ()):
+        op.execute(sa.text(statement))
@@ -0,0 +1,38 @@
+"""add task version
+
+Revision ID: c5f1a7d9e302
+Revises: a886bef79643
+Create Date: 2026-10-18 20:14:41.215630
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5f1a7d9e302"
+down_revision: Union[str, None] = "a886bef79643"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ADD COLUMN со значением по умолчанию не пересоздает таблицу:
+    # триггеры task_fts сохраняются.
+    op.add_column(
+        "task",
+        sa.Column(
+            "version",
+            sa.Integer(),
+            server_default="1",
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    # Без batch-режима: пересоздание task удалило бы триггеры
+    # task_fts (ALTER TABLE DROP COLUMN - SQLite 3.35+).
+    op.drop_column("task", "version")
@@ -0,0 +1,57 @@
+"""add task owner
+
+Revision ID: d3a9c5e1f047
+Revises: b71d0e3f5a28
+Create Date: 2026-10-18 19:48:33.120584
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d3a9c5e1f047"
+down_revision: Union[str, None] = "b71d0e3f5a28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Существующие задачи достаются владельцу по умолчанию (0).
+    # ADD COLUMN не пересоздает таблицу: триггеры task_fts
+    # сохраняются.
+    op.add_column(
+        "task",
+        sa.Column(
+            "owner_id",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_task_owner_due_date_id",
+        "task",
+        ["owner_id", "due_date", "id"],
+        unique=False,
+    )
+    # Все выборки ограничены владельцем: индекс без owner_id
+    # только замедляет запись.
+    op.drop_index("ix_task_due_date_id", table_name="task")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_task_due_date_id",
+        "task",
+        ["due_date", "id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_task_owner_due_date_id", table_name="task"
+    )
+    # Без batch-режима: пересоздание task удалило бы триггеры
+    # task_fts (ALTER TABLE DROP COLUMN - SQLite 3.35+).
+    op.drop_column("task", "owner_id")
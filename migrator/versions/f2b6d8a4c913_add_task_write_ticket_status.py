@@ -0,0 +1,65 @@
+"""add task write ticket status
+
+Revision ID: f2b6d8a4c913
+Revises: c5f1a7d9e302
+Create Date: 2026-10-18 23:12:47.508214
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b6d8a4c913"
+down_revision: Union[str, None] = "c5f1a7d9e302"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "task_write_ticket",
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+    )
+    # Прежние квитанции хранились только для записанных задач.
+    op.add_column(
+        "task_write_ticket",
+        sa.Column(
+            "status",
+            sa.String(length=16),
+            server_default="created",
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "task_write_ticket",
+        sa.Column("task_id", sa.Integer(), nullable=True),
+    )
+    op.add_column(
+        "task_write_ticket",
+        sa.Column(
+            "journal", sa.String(length=255), nullable=True
+        ),
+    )
+    op.create_index(
+        "ix_task_write_ticket_journal",
+        "task_write_ticket",
+        ["journal"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_task_write_ticket_journal",
+        table_name="task_write_ticket",
+    )
+    for column in (
+        "journal",
+        "task_id",
+        "status",
+        "owner_id",
+    ):
+        op.drop_column("task_write_ticket", column)
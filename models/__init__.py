@@ -1,4 +1,6 @@
 # Модели сущностей предметной области SQLAlchemy.
 
 # Регистрация моделей для экспорта:
+from .task_change_model import TaskChange
 from .task_model import Task
+from .task_write_ticket_model import TaskWriteTicket
@@ -2,5 +2,17 @@ tags = [
     {
         "name": "task",
         "description": "Управление задачами",
-    }
+    },
+    {
+        "name": "cache",
+        "description": "Состояние кэша выборок задач",
+    },
+    {
+        "name": "metrics",
+        "description": "Метрики сервиса в формате Prometheus",
+    },
+    {
+        "name": "admin",
+        "description": "Отчеты профилирования запросов",
+    },
 ]
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Index,
+    Integer,
+)
+
+from models.base_model import BaseModel
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class TaskChange(BaseModel):
+    """
+    Лента изменений задач: запись на каждую созданную, измененную
+    или удаленную задачу в транзакции изменения. По ленте воркеры
+    обновляют индекс задач по дням (services/task_day_index.py).
+    """
+
+    __tablename__ = "task_change"
+    __table_args__ = (
+        # Удаление устаревших записей ленты
+        Index("ix_task_change_changed_at", "changed_at"),
+        # AUTOINCREMENT: номера не переиспользуются после очистки
+        # ленты, иначе воркеры пропустили бы новые записи.
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, nullable=False)
+    # Дата задачи после изменения (для удаленной - прежняя)
+    due_date = Column(Date, nullable=False)
+    changed_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=utc_now,
+    )
@@ -1,20 +1,116 @@
+from datetime import datetime, timezone
+
 from sqlalchemy import (
+    DDL,
     Column,
     Date,
+    DateTime,
+    Index,
     Integer,
     PrimaryKeyConstraint,
     String,
+    event,
 )
 
 from models.base_model import BaseModel
 
 
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class Task(BaseModel):
     __tablename__ = "task"
+    __table_args__ = (
+        # Выборки по периоду (get_by_period) идут по владельцу и
+        # диапазону due_date, id добавлен для стабильного порядка
+        # строк. Поиск по индексу зависит от числа задач владельца,
+        # а не от размера таблицы.
+        Index(
+            "ix_task_owner_due_date_id",
+            "owner_id",
+            "due_date",
+            "id",
+        ),
+    )
 
     id = Column(Integer)
+    # Владелец задачи (configs.owner.get_owner_id)
+    owner_id = Column(
+        Integer, nullable=False, server_default="0"
+    )
     title = Column(String(256), nullable=False)
     description = Column(String(256))
     due_date = Column(Date, nullable=False)
+    # Время последнего изменения, обновляется при каждой записи
+    # репозиторием; используется для ETag и Last-Modified.
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=utc_now,
+        onupdate=utc_now,
+    )
+    # Версия задачи для оптимистичной блокировки: увеличивается
+    # каждым изменением, передается клиенту в ETag и проверяется
+    # по If-Match одним условным UPDATE/DELETE.
+    version = Column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default="1",
+    )
 
     PrimaryKeyConstraint(id)
+
+
+# Полнотекстовый поиск по title и description (TaskRepository.search).
+# SQLite: внешняя таблица FTS5 task_fts с содержимым из task,
+# синхронизируемая триггерами.
+sqlite_search_ddl = (
+    "CREATE VIRTUAL TABLE task_fts USING fts5("
+    "title, description, content='task', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER task_fts_update "
+    "AFTER UPDATE OF title, description ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+)
+
+# PostgreSQL: вычисляемая колонка tsvector с индексом GIN.
+# Конфигурация simple не зависит от языка задач.
+postgresql_search_ddl = (
+    "ALTER TABLE task ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', "
+    "coalesce(title, '') || ' ' || coalesce(description, ''))) "
+    "STORED",
+    "CREATE INDEX ix_task_search_vector ON task "
+    "USING gin (search_vector)",
+)
+
+# Схема, созданная по моделям (тесты, бенчмарки), получает те же
+# объекты поиска, что и миграция.
+for dialect, statements in (
+    ("sqlite", sqlite_search_ddl),
+    ("postgresql", postgresql_search_ddl),
+):
+    for statement in statements:
+        event.listen(
+            Task.__table__,
+            "after_create",
+            DDL(statement).execute_if(dialect=dialect),
+        )
+event.listen(
+    Task.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS task_fts").execute_if(
+        dialect="sqlite"
+    ),
+)
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Index, Integer, String
+
+from models.base_model import BaseModel
+
+
+class TaskWriteTicket(BaseModel):
+    """
+    Квитанция задачи очереди отложенной записи: состояние
+    ("pending" - в очереди, "created" - записана в БД) и id
+    записанной задачи. По таблице любой воркер отвечает на
+    GET /v1/tasks/pending/{ticket}. Квитанция становится "created"
+    в одной транзакции с задачей: при повторе журнала после сбоя
+    уже записанные задачи пропускаются.
+    """
+
+    __tablename__ = "task_write_ticket"
+    __table_args__ = (
+        # Освобождение квитанций очищенного журнала
+        Index("ix_task_write_ticket_journal", "journal"),
+    )
+
+    ticket = Column(String(32), primary_key=True)
+    # Пусто у квитанций, выданных до появления колонки
+    owner_id = Column(Integer)
+    # Квитанции, выданные до появления колонки, хранились только
+    # для записанных задач.
+    status = Column(
+        String(16),
+        nullable=False,
+        default="pending",
+        server_default="created",
+    )
+    task_id = Column(Integer)
+    # Журнал (абсолютный путь), из которого задачу еще можно
+    # повторить; пусто, когда журнал очищен и квитанция нужна
+    # только для GET /v1/tasks/pending/{ticket}.
+    journal = Column(String(255))
@@ -0,0 +1 @@
+# Наблюдаемость сервиса: метрики
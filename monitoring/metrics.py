@@ -0,0 +1,446 @@
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+# Метрики пишутся из одного потока цикла событий, поэтому
+# наблюдения изменяют счетчики без блокировок.
+
+LabelValues = Tuple[str, ...]
+
+latency_buckets = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+count_buckets = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus: количество наблюдений
+    по корзинам (le), сумма и общее количество.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = latency_buckets,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Для каждого набора меток: количества по корзинам
+        # (последняя - +Inf) и сумма наблюдений в конце списка.
+        self.series: Dict[LabelValues, List[float]] = {}
+
+    def observe(
+        self, value: float, *label_values: str
+    ) -> None:
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series.setdefault(
+                label_values, [0] * (len(self.buckets) + 2)
+            )
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values, series in list(
+            self.series.items()
+        ):
+            labels = format_labels(
+                self.labels, label_values
+            )
+            cumulative = 0
+            for le, count in zip(
+                (*map(format_value, self.buckets), "+Inf"),
+                series[:-1],
+            ):
+                cumulative += count
+                bucket_labels = format_labels(
+                    (*self.labels, "le"),
+                    (*label_values, le),
+                )
+                lines.append(
+                    f"{self.name}_bucket{bucket_labels}"
+                    f" {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_sum{labels}"
+                f" {format_value(series[-1])}"
+            )
+            lines.append(
+                f"{self.name}_count{labels} {cumulative}"
+            )
+        return lines
+
+
+class Counter:
+    """
+    Счетчик в формате Prometheus: монотонно растущее значение.
+    """
+
+    type_name = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.series: Dict[LabelValues, float] = {}
+
+    def inc(
+        self, value: float = 1, *label_values: str
+    ) -> None:
+        self.series[label_values] = (
+            self.series.get(label_values, 0) + value
+        )
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *(
+                f"{self.name}"
+                f"{format_labels(self.labels, label_values)}"
+                f" {format_value(value)}"
+                for label_values, value in list(
+                    self.series.items()
+                )
+            ),
+        ]
+
+
+class Gauge(Counter):
+    """
+    Показатель в формате Prometheus: текущее значение.
+    """
+
+    type_name = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.series[label_values] = value
+
+
+class MetricsRegistry:
+    """
+    Набор метрик сервиса, отдаваемых по /metrics.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: List[Union[Histogram, Counter]] = []
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        histogram = Histogram(*args, **kwargs)
+        self.metrics.append(histogram)
+        return histogram
+
+    def counter(self, *args, **kwargs) -> Counter:
+        counter = Counter(*args, **kwargs)
+        self.metrics.append(counter)
+        return counter
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        gauge = Gauge(*args, **kwargs)
+        self.metrics.append(gauge)
+        return gauge
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "todo_api_http_request_duration_seconds",
+    "Длительность HTTP-запросов по шаблону маршрута и статусу.",
+    ("method", "route", "status"),
+)
+db_query_duration = registry.histogram(
+    "todo_api_db_query_duration_seconds",
+    "Длительность SQL-запросов по методу репозитория.",
+    ("operation",),
+)
+db_request_queries = registry.histogram(
+    "todo_api_db_request_queries",
+    "Количество SQL-запросов на один HTTP-запрос.",
+    ("method", "route"),
+    count_buckets,
+)
+db_request_duration = registry.histogram(
+    "todo_api_db_request_duration_seconds",
+    "Суммарное время SQL-запросов одного HTTP-запроса.",
+    ("method", "route"),
+)
+db_pool_checkout_duration = registry.histogram(
+    "todo_api_db_pool_checkout_seconds",
+    "Ожидание соединения из пула (включая открытие нового).",
+)
+
+# Количество и суммарная длительность SQL-запросов текущего
+# HTTP-запроса (None вне запроса).
+request_db_stats: ContextVar[Optional[List[float]]] = (
+    ContextVar("request_db_stats", default=None)
+)
+# SQL-запросы текущего HTTP-запроса с длительностью; заполняется
+# только при включенном профилировании (None - не собирать).
+request_statements: ContextVar[
+    Optional[List[Tuple[str, float]]]
+] = ContextVar("request_statements", default=None)
+# Метод репозитория, выполняющий SQL-запрос.
+current_operation: ContextVar[str] = ContextVar(
+    "current_operation", default="other"
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: длительность HTTP-запросов и статистика
+    SQL-запросов в разрезе шаблона маршрута.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = "500"
+        db_stats = [0, 0.0]
+        token = request_db_stats.set(db_stats)
+
+        async def send_with_status(
+            message: Message,
+        ) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_db_stats.reset(token)
+            route = scope.get("route")
+            route_path = (
+                route.path
+                if route is not None
+                else "unmatched"
+            )
+            method = scope["method"]
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method,
+                route_path,
+                status,
+            )
+            db_request_queries.observe(
+                db_stats[0], method, route_path
+            )
+            db_request_duration.observe(
+                db_stats[1], method, route_path
+            )
+
+
+def before_cursor_execute(
+    connection,
+    cursor,
+    statement,
+    parameters,
+    context,
+    executemany,
+) -> None:
+    # Время начала хранится в контексте выполнения запроса: при
+    # ошибке запроса after_cursor_execute не вызывается, и
+    # контекст отбрасывается вместе с ним.
+    context.query_started = time.perf_counter()
+
+
+def after_cursor_execute(
+    connection,
+    cursor,
+    statement,
+    parameters,
+    context,
+    executemany,
+) -> None:
+    duration = time.perf_counter() - context.query_started
+    db_query_duration.observe(
+        duration, current_operation.get()
+    )
+    db_stats = request_db_stats.get()
+    if db_stats is not None:
+        db_stats[0] += 1
+        db_stats[1] += duration
+    statements = request_statements.get()
+    if statements is not None:
+        statements.append((statement, duration))
+
+
+def on_checkout(
+    dbapi_connection, connection_record, connection_proxy
+) -> None:
+    wait = connection_record.info.pop("checkout_wait", None)
+    if wait is not None:
+        db_pool_checkout_duration.observe(wait)
+
+
+def instrument_db() -> None:
+    """
+    Подключить сбор метрик SQL-запросов и пула ко всем
+    движкам БД процесса.
+    """
+    if not event.contains(
+        Engine,
+        "before_cursor_execute",
+        before_cursor_execute,
+    ):
+        event.listen(
+            Engine,
+            "before_cursor_execute",
+            before_cursor_execute,
+        )
+        event.listen(
+            Engine,
+            "after_cursor_execute",
+            after_cursor_execute,
+        )
+        event.listen(Pool, "checkout", on_checkout)
+
+
+T = TypeVar("T")
+
+
+def instrument_methods(cls: T) -> T:
+    """
+    Декоратор класса репозитория: SQL-запросы его асинхронных
+    методов учитываются в метриках с меткой "Класс.метод".
+    """
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        operation = f"{cls.__name__}.{name}"
+        if inspect.isasyncgenfunction(method):
+            setattr(
+                cls,
+                name,
+                instrument_generator(method, operation),
+            )
+        elif inspect.iscoroutinefunction(method):
+            setattr(
+                cls,
+                name,
+                instrument_coroutine(method, operation),
+            )
+    return cls
+
+
+def instrument_coroutine(
+    method: Callable, operation: str
+) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(operation)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+
+    return wrapper
+
+
+def instrument_generator(
+    method: Callable, operation: str
+) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        # Генератор может завершаться в другом контексте (задаче),
+        # поэтому восстанавливается значение, а не токен.
+        previous = current_operation.get()
+        current_operation.set(operation)
+        try:
+            async for item in method(*args, **kwargs):
+                yield item
+        finally:
+            current_operation.set(previous)
+
+    return wrapper
+
+
+def format_labels(
+    names: Sequence[str], values: Sequence[str]
+) -> str:
+    if not names:
+        return ""
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{escape_label(value)}"'
+            for name, value in zip(names, values)
+        )
+        + "}"
+    )
+
+
+def escape_label(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def format_value(value: float) -> str:
+    return repr(float(value))
@@ -0,0 +1,257 @@
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+from configs import settings
+from monitoring.metrics import request_statements
+
+# Количество функций в текстовом отчете cProfile
+profile_top_functions = 50
+
+report_id_pattern = re.compile(
+    r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$"
+)
+
+
+class ProfileStore:
+    """
+    Отчеты о медленных запросах на диске: кольцевой буфер из
+    не более max_reports файлов JSON, старые удаляются.
+    """
+
+    def __init__(
+        self, directory: str, max_reports: int
+    ) -> None:
+        self.directory = directory
+        self.__max_reports = max_reports
+
+    def save(self, report: Dict[str, Any]) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        report_id = (
+            datetime.now(timezone.utc).strftime(
+                "%Y%m%dT%H%M%S"
+            )
+            + "-"
+            + uuid.uuid4().hex[:8]
+        )
+        with open(self.path(report_id), "w") as file:
+            json.dump(
+                {"id": report_id, **report},
+                file,
+                ensure_ascii=False,
+            )
+
+        for stale_id in self.ids()[self.__max_reports :]:
+            try:
+                os.remove(self.path(stale_id))
+            except FileNotFoundError:
+                pass
+        return report_id
+
+    def ids(self) -> List[str]:
+        """
+        Идентификаторы отчетов, начиная с последнего.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            (
+                name[: -len(".json")]
+                for name in os.listdir(self.directory)
+                if name.endswith(".json")
+                and report_id_pattern.match(
+                    name[: -len(".json")]
+                )
+            ),
+            reverse=True,
+        )
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Краткие сведения об отчетах, начиная с последнего.
+        """
+        summaries = []
+        for report_id in self.ids():
+            report = self.load(report_id)
+            if report is None:
+                continue
+            summaries.append(
+                {
+                    key: report[key]
+                    for key in (
+                        "id",
+                        "started_at",
+                        "method",
+                        "path",
+                        "status",
+                        "duration",
+                        "profiled",
+                    )
+                }
+            )
+        return summaries
+
+    def load(
+        self, report_id: str
+    ) -> Optional[Dict[str, Any]]:
+        if not report_id_pattern.match(report_id):
+            return None
+        try:
+            with open(self.path(report_id)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def path(self, report_id: str) -> str:
+        return os.path.join(
+            self.directory, f"{report_id}.json"
+        )
+
+
+profile_store = ProfileStore(
+    settings.profiling_dir, settings.profiling_max_reports
+)
+
+
+def get_profile_store() -> ProfileStore:
+    return profile_store
+
+
+class ProfilerMiddleware:
+    """
+    ASGI-middleware профилирования запросов.
+
+    Доля sample_rate запросов (при enabled) и запросы с заголовком
+    X-Profile, равным token, выполняются под cProfile. Запрос,
+    длившийся дольше slow_threshold секунд, а также запрос с
+    X-Profile сохраняются в store вместе с SQL-запросами и их
+    длительностью. cProfile охватывает поток целиком, поэтому
+    одновременно профилируется не более одного запроса, а отчет
+    может включать работу конкурентных запросов.
+    """
+
+    __busy = False
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: Optional[ProfileStore] = None,
+        enabled: bool = settings.profiling_enabled,
+        sample_rate: float = settings.profiling_sample_rate,
+        slow_threshold: float = settings.profiling_slow_threshold,
+        token: str = settings.profiling_token,
+    ) -> None:
+        self.app = app
+        self.store = store or profile_store
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.token = token
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = Headers(scope=scope).get("x-profile")
+        # Байты, а не str: compare_digest не принимает строки не
+        # из ASCII, а заголовки декодируются как latin-1.
+        forced = bool(self.token and header) and (
+            secrets.compare_digest(
+                header.encode("latin-1"),
+                self.token.encode(),
+            )
+        )
+        if not (self.enabled or forced):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = None
+        if (
+            forced or random.random() < self.sample_rate
+        ) and not ProfilerMiddleware.__busy:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                ProfilerMiddleware.__busy = True
+            except ValueError:
+                # Активен другой профилировщик.
+                profiler = None
+
+        status = 500
+
+        async def send_with_status(
+            message: Message,
+        ) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        statements: List = []
+        token = request_statements.set(statements)
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            request_statements.reset(token)
+            if profiler is not None:
+                profiler.disable()
+                ProfilerMiddleware.__busy = False
+
+            if forced or duration >= self.slow_threshold:
+                report = {
+                    "started_at": started_at.isoformat(),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope["query_string"].decode(
+                        "latin-1"
+                    ),
+                    "status": status,
+                    "duration": duration,
+                    "profiled": profiler is not None,
+                    "statements": [
+                        {"sql": sql, "duration": seconds}
+                        for sql, seconds in statements
+                    ],
+                    "profile": (
+                        format_profile(profiler)
+                        if profiler is not None
+                        else None
+                    ),
+                }
+                # Запись на диск не задерживает цикл событий.
+                await asyncio.to_thread(
+                    self.store.save, report
+                )
+
+
+def format_profile(profiler: cProfile.Profile) -> str:
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(
+        pstats.SortKey.CUMULATIVE
+    ).print_stats(profile_top_functions)
+    return stream.getvalue()
@@ -1,11 +1,57 @@
-from datetime import date
-from typing import List
+import re
+from datetime import date, datetime
+from typing import (
+    AsyncIterator,
+    Collection,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Row,
+    Select,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    table,
+    tuple_,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from configs.database import get_db_connection
+from configs import settings
+from configs.database import (
+    AfterCommit,
+    after_commit,
+    get_db_connection,
+    open_session,
+    reads_own_writes,
+)
+from configs.owner import get_owner_id
+from models.task_change_model import TaskChange
 from models.task_model import Task
+from monitoring.metrics import instrument_methods
+
+# Колонки ответа со списком задач (TaskResponseSchema).
+# Выборки для сериализации читают строки, а не сущности ORM.
+task_columns = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.due_date,
+)
+
+# Таблица FTS5 полнотекстового поиска (только SQLite), см.
+# models.task_model.sqlite_search_ddl.
+task_fts = table("task_fts", column("rowid"))
 
 
 class TaskNotFoundException(Exception):
@@ -15,53 +61,509 @@ class TaskNotFoundException(Exception):
         super().__init__(self.message)
 
 
+class TaskVersionConflictException(Exception):
+    """
+    Версия задачи не совпала с If-Match: задачу изменили после
+    того, как клиент ее прочитал.
+    """
+
+    def __init__(self, task_id: int, version: int):
+        self.task_id = task_id
+        self.version = version
+        self.message = (
+            f"Задача '{task_id}' изменена другим запросом"
+        )
+        super().__init__(self.message)
+
+
+@instrument_methods
 class TaskRepository:
-    __db_context: Session
+    __db_context: AsyncSession
+    __owner_id: int
 
     def __init__(
         self,
-        db_context: Session = Depends(get_db_connection),
+        db_context: AsyncSession = Depends(
+            get_db_connection, scope="function"
+        ),
+        owner_id: int = Depends(get_owner_id),
     ) -> None:
         self.__db_context = db_context
+        self.__owner_id = owner_id
+
+    def after_commit(self, callback: AfterCommit) -> None:
+        """
+        Выполнить callback после фиксации транзакции запроса.
+        Транзакцию фиксирует зависимость get_db_connection.
+        """
+        after_commit(self.__db_context, callback)
 
-    def create(self, task: Task) -> Task:
+    def reads_own_writes(self) -> bool:
+        """
+        Запрос читает собственные записи клиента из основной БД
+        (см. configs.database.reads_own_writes).
+        """
+        return reads_own_writes(self.__db_context)
+
+    async def record_changes(
+        self, changes: Collection[Tuple[int, date]]
+    ) -> None:
+        """
+        Записать в ленту task_change измененные задачи
+        (id, due_date) в транзакции изменения, если лента включена
+        (settings.tasks_change_feed_enabled).
+        """
+        if (
+            not settings.tasks_change_feed_enabled
+            or not changes
+        ):
+            return
+        await self.__db_context.execute(
+            insert(TaskChange),
+            [
+                {
+                    "task_id": task_id,
+                    "owner_id": self.__owner_id,
+                    "due_date": due_date,
+                }
+                for task_id, due_date in changes
+            ],
+        )
+
+    async def create(self, task: Task) -> Task:
+        task.owner_id = self.__owner_id
         self.__db_context.add(task)
-        self.__db_context.commit()
-        self.__db_context.refresh(task)
+        await self.__db_context.flush()
+        await self.record_changes(
+            [(task.id, task.due_date)]
+        )
         return task
 
-    def delete(self, task_id: int) -> Task:
-        task = self.__db_context.query(Task).get(task_id)
+    async def create_many(
+        self, tasks: List[Task]
+    ) -> List[Task]:
+        """
+        Создать задачи многострочным INSERT ... RETURNING.
+        Порядок результата совпадает с tasks.
+        """
+        # sort_by_parameter_order на SQLite вырождается в построчные
+        # INSERT, поэтому порядок восстанавливается по
+        # автоинкрементному id, выдаваемому в порядке VALUES.
+        result = await self.__db_context.scalars(
+            insert(Task).returning(Task),
+            [
+                {
+                    "owner_id": self.__owner_id,
+                    "title": task.title,
+                    "description": task.description,
+                    "due_date": task.due_date,
+                }
+                for task in tasks
+            ],
+        )
+        created = sorted(
+            result.all(), key=lambda task: task.id
+        )
+        await self.record_changes(
+            [(task.id, task.due_date) for task in created]
+        )
+        return created
+
+    async def delete(
+        self,
+        task_id: int,
+        versions: Optional[Collection[int]] = None,
+    ) -> Task:
+        """
+        Удалить задачу. versions - допустимые версии задачи
+        (If-Match), None - удалить без проверки версии.
+        """
+        query = delete(Task).where(
+            Task.id == task_id,
+            Task.owner_id == self.__owner_id,
+        )
+        if versions is not None:
+            query = query.where(Task.version.in_(versions))
+        task = await self.__db_context.scalar(
+            query.returning(Task)
+        )
 
         if task is None:
-            raise TaskNotFoundException(task_id)
+            await self.__raise_not_changed(
+                task_id, versions
+            )
 
-        self.__db_context.delete(task)
-        self.__db_context.commit()
+        await self.record_changes(
+            [(task.id, task.due_date)]
+        )
         return task
 
-    def get_by_period(
+    async def delete_many(
+        self, task_ids: List[int]
+    ) -> Set[int]:
+        """
+        Удалить задачи одним выражением DELETE ... RETURNING.
+        Возвращает идентификаторы фактически удаленных задач.
+        """
+        result = await self.__db_context.execute(
+            delete(Task)
+            .where(
+                Task.id.in_(task_ids),
+                Task.owner_id == self.__owner_id,
+            )
+            .returning(Task.id, Task.due_date)
+        )
+        deleted = result.all()
+        await self.record_changes(deleted)
+        return {task_id for task_id, _ in deleted}
+
+    async def get_by_period(
         self, start_date: date, end_date: date
     ) -> List[Task]:
-        return (
-            self.__db_context.query(Task)
-            .filter(
+        result = await self.__db_context.scalars(
+            select_by_period(
+                self.__owner_id, start_date, end_date
+            )
+        )
+        return list(result.all())
+
+    async def get_rows_by_period(
+        self,
+        start_date: date,
+        end_date: date,
+        shared: bool = False,
+    ) -> Sequence[Row]:
+        """
+        Получить строки задач периода (task_columns и updated_at)
+        без построения сущностей ORM.
+
+        shared - результат разделяют конкурентные запросы: выборка
+        выполняется в отдельной сессии (open_session), которая не
+        зависит от жизненного цикла сессии запроса.
+        """
+        statement = select_by_period(
+            self.__owner_id,
+            start_date,
+            end_date,
+            *task_columns,
+            Task.updated_at,
+        )
+        if not shared:
+            result = await self.__db_context.execute(
+                statement
+            )
+            return result.all()
+
+        async with open_session(self.__db_context) as db:
+            result = await db.execute(statement)
+            return result.all()
+
+    async def get_version_by_period(
+        self, start_date: date, end_date: date
+    ) -> Tuple[int, int, Optional[datetime]]:
+        """
+        Получить версию выборки за период без загрузки задач:
+        количество задач, сумму их id и время последнего изменения.
+        """
+        row = (
+            await self.__db_context.execute(
+                select(
+                    func.count(Task.id),
+                    func.coalesce(func.sum(Task.id), 0),
+                    func.max(Task.updated_at),
+                ).where(
+                    Task.owner_id == self.__owner_id,
+                    Task.due_date >= start_date,
+                    Task.due_date <= end_date,
+                )
+            )
+        ).one()
+        return int(row[0]), int(row[1]), row[2]
+
+    async def count_by_day(
+        self, start_date: date, end_date: date
+    ) -> Sequence[Row]:
+        """
+        Получить количество задач периода по дням (due_date, count)
+        одним GROUP BY по индексу ix_task_owner_due_date_id.
+        Дни без задач не возвращаются.
+        """
+        result = await self.__db_context.execute(
+            select(Task.due_date, func.count(Task.id))
+            .where(
+                Task.owner_id == self.__owner_id,
                 Task.due_date >= start_date,
                 Task.due_date <= end_date,
             )
-            .all()
+            .group_by(Task.due_date)
+            .order_by(Task.due_date)
         )
+        return result.all()
 
-    def update(self, task: Task) -> Task:
-        db_task = self.__db_context.query(Task).get(task.id)
+    async def get_page_by_period(
+        self,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> Sequence[Row]:
+        """
+        Получить до limit строк задач периода, следующих за ключом
+        after = (due_date, id) в порядке индекса
+        ix_task_owner_due_date_id.
+        """
+        query = select_by_period(
+            self.__owner_id,
+            start_date,
+            end_date,
+            *task_columns,
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(Task.due_date, Task.id)
+                > tuple_(*after)
+            )
+        result = await self.__db_context.execute(
+            query.limit(limit)
+        )
+        return result.all()
 
-        if db_task is None:
-            raise TaskNotFoundException(task.id)
+    async def search(
+        self,
+        query: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        limit: int,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> Sequence[Row]:
+        """
+        Найти до limit задач, содержащих все слова query в title
+        или description, по полнотекстовому индексу. Строки
+        (task_columns и score) упорядочены по score (меньше -
+        релевантнее) и id и следуют за ключом after = (score, id).
+        """
+        if self.__db_context.get_bind().dialect.name == (
+            "postgresql"
+        ):
+            ranked = select_search_postgresql(query)
+        else:
+            terms = search_terms(query)
+            if not terms:
+                return []
+            ranked = select_search_sqlite(terms)
+
+        ranked = ranked.where(
+            Task.owner_id == self.__owner_id
+        )
+        if start_date is not None and end_date is not None:
+            ranked = ranked.where(
+                Task.due_date >= start_date,
+                Task.due_date <= end_date,
+            )
+        ranked = ranked.subquery()
+        statement = select(ranked).order_by(
+            ranked.c.score, ranked.c.id
+        )
+        if after is not None:
+            statement = statement.where(
+                tuple_(ranked.c.score, ranked.c.id)
+                > tuple_(*after)
+            )
+        result = await self.__db_context.execute(
+            statement.limit(limit)
+        )
+        return result.all()
 
-        db_task.title = task.title
-        db_task.description = task.description
-        db_task.due_date = task.due_date
-        self.__db_context.commit()
-        self.__db_context.refresh(db_task)
+    async def stream_by_period(
+        self, start_date: date, end_date: date
+    ) -> AsyncIterator[Row]:
+        """
+        Построчно выдать задачи периода, загружая их из БД
+        пакетами по settings.tasks_stream_batch_size.
+        """
+        result = await self.__db_context.stream(
+            select_by_period(
+                self.__owner_id,
+                start_date,
+                end_date,
+                *task_columns,
+            ).execution_options(
+                yield_per=settings.tasks_stream_batch_size
+            )
+        )
+        try:
+            async for row in result:
+                yield row
+        finally:
+            await result.close()
+            # Поток передается уже после закрытия сессии
+            # зависимостью запроса и заново занимает соединение:
+            # освобождаем его явно.
+            await self.__db_context.close()
 
+    async def update(
+        self,
+        task: Task,
+        versions: Optional[Collection[int]] = None,
+    ) -> Task:
+        """
+        Обновить задачу одним условным UPDATE без блокировки
+        строки при чтении: versions - допустимые версии задачи
+        (If-Match), None - обновить без проверки версии.
+        """
+        query = update(Task).where(
+            Task.id == task.id,
+            Task.owner_id == self.__owner_id,
+        )
+        if versions is not None:
+            query = query.where(Task.version.in_(versions))
+        db_task = await self.__db_context.scalar(
+            query.values(
+                title=task.title,
+                description=task.description,
+                due_date=task.due_date,
+                version=Task.version + 1,
+            ).returning(Task)
+        )
+
+        if db_task is None:
+            await self.__raise_not_changed(
+                task.id, versions
+            )
+
+        await self.record_changes(
+            [(db_task.id, db_task.due_date)]
+        )
         return db_task
+
+    async def update_many(
+        self, tasks: List[Task]
+    ) -> Set[int]:
+        """
+        Обновить задачи пакетным UPDATE (executemany).
+        Возвращает идентификаторы обновленных задач.
+        """
+        result = await self.__db_context.scalars(
+            select(Task.id).where(
+                Task.id.in_([task.id for task in tasks]),
+                Task.owner_id == self.__owner_id,
+            )
+        )
+        existing = set(result.all())
+
+        rows = [
+            {
+                "task_id": task.id,
+                "title": task.title,
+                "description": task.description,
+                "due_date": task.due_date,
+            }
+            for task in tasks
+            if task.id in existing
+        ]
+        if rows:
+            # UPDATE таблицы, а не сущности: пакетный UPDATE ORM
+            # по первичному ключу не позволяет увеличить version.
+            task_table = Task.__table__
+            await self.__db_context.execute(
+                update(task_table)
+                .where(
+                    task_table.c.id == bindparam("task_id")
+                )
+                .values(
+                    title=bindparam("title"),
+                    description=bindparam("description"),
+                    due_date=bindparam("due_date"),
+                    version=task_table.c.version + 1,
+                ),
+                rows,
+            )
+            await self.record_changes(
+                [
+                    (row["task_id"], row["due_date"])
+                    for row in rows
+                ]
+            )
+        return existing
+
+    async def __raise_not_changed(
+        self,
+        task_id: int,
+        versions: Optional[Collection[int]],
+    ) -> None:
+        """
+        Изменение не затронуло строк: задачи нет либо ее версия не
+        совпала с If-Match. Версия читается только при проверке
+        версии, без нее задачи нет.
+        """
+        if versions is None:
+            raise TaskNotFoundException(task_id)
+        version = await self.__db_context.scalar(
+            select(Task.version).where(
+                Task.id == task_id,
+                Task.owner_id == self.__owner_id,
+            )
+        )
+        if version is None:
+            raise TaskNotFoundException(task_id)
+        raise TaskVersionConflictException(task_id, version)
+
+
+def select_by_period(
+    owner_id: int,
+    start_date: date,
+    end_date: date,
+    *entities,
+) -> Select:
+    return (
+        select(*(entities or (Task,)))
+        .where(
+            Task.owner_id == owner_id,
+            Task.due_date >= start_date,
+            Task.due_date <= end_date,
+        )
+        .order_by(Task.due_date, Task.id)
+    )
+
+
+def search_terms(query: str) -> List[str]:
+    """
+    Слова запроса в синтаксисе FTS5: каждое в кавычках, чтобы
+    операторы и спецсимволы пользователя не нарушали MATCH.
+    """
+    return [
+        f'"{word}"' for word in re.findall(r"\w+", query)
+    ]
+
+
+def select_search_sqlite(terms: List[str]) -> Select:
+    # bm25 отрицательна: чем меньше, тем релевантнее.
+    return (
+        select(
+            *task_columns,
+            func.bm25(literal_column("task_fts")).label(
+                "score"
+            ),
+        )
+        .select_from(task_fts)
+        .join(Task, Task.id == task_fts.c.rowid)
+        .where(
+            literal_column("task_fts").op("MATCH")(
+                " ".join(terms)
+            )
+        )
+    )
+
+
+def select_search_postgresql(query: str) -> Select:
+    search_vector = literal_column("task.search_vector")
+    ts_query = func.websearch_to_tsquery(
+        literal_column("'simple'::regconfig"), query
+    )
+    # Знак ts_rank меняется, чтобы порядок совпадал с SQLite.
+    return select(
+        *task_columns,
+        (-func.ts_rank(search_vector, ts_query)).label(
+            "score"
+        ),
+    ).where(search_vector.op("@@")(ts_query))
@@ -0,0 +1,102 @@
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+from configs import settings
+from services.compression import choose_encoding, compress
+
+# Типы содержимого, которые имеет смысл сжимать
+compressible_types = (
+    "application/json",
+    "application/problem+json",
+    "text/",
+)
+
+
+def is_compressible(headers: Headers, size: int) -> bool:
+    """
+    Ответ сжимается, если он текстовый, еще не сжат и не меньше
+    settings.compression_min_size.
+    """
+    content_type = headers.get("content-type", "")
+    return (
+        size >= settings.compression_min_size
+        and "content-encoding" not in headers
+        and content_type.startswith(compressible_types)
+    )
+
+
+def add_vary(headers: MutableHeaders) -> None:
+    """
+    Ответ зависит от Accept-Encoding запроса: промежуточные кэши
+    должны хранить его отдельно для каждой кодировки.
+    """
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware: сжатие ответов в кодировку, выбранную по
+    Accept-Encoding. Ответ сжимается целиком, поэтому потоковые
+    ответы (NDJSON) и ответы, уже сжатые эндпоинтом (выборки из
+    кэша, см. TaskCache.get_encoded), передаются как есть.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.compression_encodings
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(
+            Headers(scope=scope).get("accept-encoding")
+        )
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Заголовки отправляются вместе с первой частью
+                # тела, когда известно, сжимается ли ответ.
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if not message.get(
+                "more_body", False
+            ) and is_compressible(headers, len(body)):
+                add_vary(headers)
+                if encoding is not None:
+                    body = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(
+                        len(body)
+                    )
+                    message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+from monitoring.metrics import registry
+
+metrics_router = APIRouter(tags=["metrics"])
+"""
+Эндпоинт метрик сервиса в текстовом формате Prometheus
+"""
+
+
+@metrics_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4",
+    )
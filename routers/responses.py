@@ -0,0 +1,33 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import Row
+
+
+def default(value: Any) -> Any:
+    """
+    Сериализация типов, которые orjson не поддерживает напрямую.
+    """
+    if isinstance(value, Row):
+        return value._asdict()
+    raise TypeError
+
+
+def dumps(content: Any, option: int = 0) -> bytes:
+    return orjson.dumps(
+        content, default=default, option=option
+    )
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON-ответ, кодируемый orjson. Готовые байты (например, из кэша
+    выборок) отдаются как есть, строки БД кодируются без
+    промежуточных моделей Pydantic.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,26 @@
+from typing import Dict
+
+from fastapi import APIRouter, Depends, status
+
+from services.single_flight import (
+    SingleFlight,
+    get_task_queries,
+)
+from services.task_cache import TaskCache, get_task_cache
+
+cache_router = APIRouter(prefix="/v1/cache", tags=["cache"])
+"""
+Эндпоинты состояния кэша выборок задач
+"""
+
+
+@cache_router.get(
+    "/stats",
+    response_model=Dict[str, int],
+    status_code=status.HTTP_200_OK,
+)
+async def get_stats(
+    task_cache: TaskCache = Depends(get_task_cache),
+    task_queries: SingleFlight = Depends(get_task_queries),
+):
+    return {**task_cache.stats(), **task_queries.stats()}
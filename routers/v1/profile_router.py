@@ -0,0 +1,82 @@
+import secrets
+from typing import Any, Dict, List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    status,
+)
+from fastapi.responses import FileResponse
+
+from configs import settings
+from monitoring.profiler import (
+    ProfileStore,
+    get_profile_store,
+)
+
+profile_router = APIRouter(
+    prefix="/v1/admin/profiles", tags=["admin"]
+)
+"""
+Эндпоинты отчетов о медленных и профилированных запросах
+"""
+
+
+def check_admin_token(
+    x_admin_token: Optional[str] = Header(None),
+) -> None:
+    """
+    Доступ только с заголовком X-Admin-Token, равным
+    settings.profiling_token.
+    """
+    if not settings.profiling_token or not (
+        x_admin_token
+        and secrets.compare_digest(
+            x_admin_token.encode("latin-1"),
+            settings.profiling_token.encode(),
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступ запрещен.",
+        )
+
+
+@profile_router.get(
+    "/",
+    response_model=List[Dict[str, Any]],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_admin_token)],
+)
+async def list_profiles(
+    profile_store: ProfileStore = Depends(
+        get_profile_store
+    ),
+):
+    return profile_store.list()
+
+
+@profile_router.get(
+    "/{profile_id}",
+    response_class=FileResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_admin_token)],
+)
+async def get_profile(
+    profile_id: str,
+    profile_store: ProfileStore = Depends(
+        get_profile_store
+    ),
+):
+    if profile_store.load(profile_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Отчет '{profile_id}' не найден.",
+        )
+    return FileResponse(
+        profile_store.path(profile_id),
+        media_type="application/json",
+        filename=f"{profile_id}.json",
+    )
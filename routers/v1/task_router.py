@@ -1,20 +1,48 @@
-from typing import List, Optional
+from email.utils import format_datetime
+from typing import AsyncIterator, List, Optional, Set, Union
 
+import orjson
 from fastapi import (
     APIRouter,
+    Body,
     Depends,
+    Header,
     HTTPException,
     Query,
     status,
 )
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import Row
 
+from configs import settings
+from configs.owner import get_owner_id
+from routers.responses import ORJSONResponse, dumps
 from schemas.pydantic.task_schema import (
+    TaskBatchPutRequestSchema,
+    TaskBatchResultSchema,
+    TaskPageResponseSchema,
+    TaskPendingResponseSchema,
     TaskPostRequestSchema,
     TaskPutRequestSchema,
     TaskResponseSchema,
     TaskSchema,
+    TaskSummaryResponseSchema,
+    TaskTicketSchema,
+)
+from services.compression import choose_encoding
+from services.task_service import (
+    Granularity,
+    TaskService,
+    get_date_period,
+    get_period,
+    get_week_period,
+    make_task_etag,
+    to_utc,
+)
+from services.task_write_queue import (
+    TaskWriteQueue,
+    get_task_write_queue,
 )
-from services.task_service import TaskService
 
 task_router = APIRouter(prefix="/v1/tasks", tags=["task"])
 """
@@ -26,17 +54,158 @@ task_router = APIRouter(prefix="/v1/tasks", tags=["task"])
     "/",
     response_model=TaskSchema,
     status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": TaskTicketSchema,
+            "description": (
+                "Задача поставлена в очередь отложенной записи;"
+                " до записи в БД она видна в GET /v1/tasks только"
+                " на принявшем воркере, а статус по Location на"
+                " других воркерах может недолго отвечать 404"
+            ),
+        }
+    },
 )
 async def create(
     task: TaskPostRequestSchema,
+    response: Response,
+    prefer: Optional[str] = Header(
+        None,
+        description="respond-async - поставить задачу в очередь записи и ответить 202",
+    ),
+    owner_id: int = Depends(get_owner_id),
+    task_write_queue: Optional[TaskWriteQueue] = Depends(
+        get_task_write_queue
+    ),
     task_service: TaskService = Depends(),
 ):
-    return task_service.create(task)
+    if task_write_queue is not None and prefers_async(
+        prefer
+    ):
+        pending = await task_write_queue.enqueue(
+            owner_id, task
+        )
+        return ORJSONResponse(
+            {
+                "ticket": pending.ticket,
+                "status": "pending",
+                "id": None,
+            },
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={
+                "Location": f"/v1/tasks/pending/{pending.ticket}",
+                "Preference-Applied": "respond-async",
+            },
+        )
+    created = await task_service.create(task)
+    response.headers["ETag"] = make_task_etag(
+        created.version
+    )
+    return created
+
+
+def prefers_async(prefer: Optional[str]) -> bool:
+    """
+    Проверить предпочтение respond-async в заголовке Prefer
+    (RFC 7240).
+    """
+    if not prefer:
+        return False
+    return any(
+        preference.split(";")[0]
+        .split("=")[0]
+        .strip()
+        .lower()
+        == "respond-async"
+        for preference in prefer.split(",")
+    )
+
+
+@task_router.get(
+    "/pending/{ticket}",
+    response_model=TaskTicketSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def get_pending(
+    ticket: str,
+    owner_id: int = Depends(get_owner_id),
+    task_write_queue: Optional[TaskWriteQueue] = Depends(
+        get_task_write_queue
+    ),
+):
+    ticket_status, task_id = (
+        await task_write_queue.get_status(owner_id, ticket)
+        if task_write_queue is not None
+        else (None, None)
+    )
+    if ticket_status is not None:
+        return {
+            "ticket": ticket,
+            "status": ticket_status,
+            "id": task_id,
+        }
+    raise HTTPException(
+        status_code=404,
+        detail=f"Квитанция '{ticket}' не найдена",
+    )
+
+
+@task_router.post(
+    "/batch",
+    response_model=List[TaskSchema],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_batch(
+    tasks: List[TaskPostRequestSchema] = Body(
+        min_length=1,
+        max_length=settings.tasks_batch_max_size,
+    ),
+    task_service: TaskService = Depends(),
+):
+    return await task_service.create_many(tasks)
+
+
+@task_router.put(
+    "/batch",
+    response_model=List[TaskBatchResultSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def update_batch(
+    tasks: List[TaskBatchPutRequestSchema] = Body(
+        min_length=1,
+        max_length=settings.tasks_batch_max_size,
+    ),
+    task_service: TaskService = Depends(),
+):
+    return await task_service.update_many(tasks)
+
+
+@task_router.delete(
+    "/batch",
+    response_model=List[TaskBatchResultSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def delete_batch(
+    task_ids: List[int] = Body(
+        min_length=1,
+        max_length=settings.tasks_batch_max_size,
+    ),
+    task_service: TaskService = Depends(),
+):
+    return await task_service.delete_many(task_ids)
 
 
 @task_router.get(
     "/",
-    response_model=List[TaskResponseSchema],
+    response_model=Union[
+        List[
+            Union[
+                TaskResponseSchema,
+                TaskPendingResponseSchema,
+            ]
+        ],
+        TaskPageResponseSchema,
+    ],
     status_code=status.HTTP_200_OK,
 )
 async def get_tasks(
@@ -55,6 +224,26 @@ async def get_tasks(
         None,
         description="Если True, возвращает задачи за неделю начиная с указанной date.",
     ),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=settings.tasks_page_max_limit,
+        description="Размер страницы. Если указан, ответ содержит items и next_cursor.",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Курсор страницы из поля next_cursor предыдущего ответа.",
+    ),
+    stream: Optional[bool] = Query(
+        None,
+        description="Если True, задачи передаются потоком в формате NDJSON.",
+    ),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    owner_id: int = Depends(get_owner_id),
+    task_write_queue: Optional[TaskWriteQueue] = Depends(
+        get_task_write_queue
+    ),
     task_service: TaskService = Depends(),
 ):
     try:
@@ -92,54 +281,298 @@ async def get_tasks(
                 detail="Поле 'end_date' обязательно при наличии 'start_date'.",
             )
 
-        # Логика обработки запросов
-        if week and date:
-            return await task_service.get_tasks_for_week(
-                date
-            )
-        elif week and date is None:
-            return await task_service.get_tasks_for_week(
-                None
-            )
-        elif date:
-            return await task_service.get_tasks_by_date(
-                date
+        # Проверка на наличие одновременно 'stream' и 'limit'/'cursor'
+        if stream and (
+            limit is not None or cursor is not None
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail="Запрос не может одновременно содержать 'stream' и 'limit'/'cursor'. "
+                "Пожалуйста, укажите только один из этих параметров.",
             )
+
+        # Определение периода выборки
+        if week:
+            start, end = get_week_period(date or None)
         elif start_date and end_date:
-            return await task_service.get_tasks_by_period(
-                start_date, end_date
+            start, end = get_period(start_date, end_date)
+        else:
+            start, end = get_date_period(date or None)
+
+        # Логика обработки запросов
+        if stream:
+            return StreamingResponse(
+                to_ndjson(
+                    task_service.stream_tasks(start, end)
+                ),
+                media_type="application/x-ndjson",
             )
+        elif limit is not None or cursor is not None:
+            tasks, next_cursor = (
+                await task_service.get_tasks_page(
+                    start,
+                    end,
+                    limit
+                    or settings.tasks_page_default_limit,
+                    cursor,
+                )
+            )
+            return {
+                "items": tasks,
+                "next_cursor": next_cursor,
+            }
         else:
-            return await task_service.get_tasks_by_date(
-                None
+            # Задачи из очереди отложенной записи видны сразу.
+            pending = (
+                task_write_queue.get_pending(
+                    owner_id, start, end
+                )
+                if task_write_queue is not None
+                else []
             )
+
+            # Условный запрос: ETag вычисляется без загрузки задач.
+            if if_none_match is not None and not pending:
+                etag = await task_service.get_tasks_etag(
+                    start, end
+                )
+                if etag_matches(if_none_match, etag):
+                    headers = {"ETag": etag}
+                    if settings.compression_encodings:
+                        # Те же Vary, что у ответа 200: общие кэши
+                        # хранят кодировки раздельно.
+                        headers["Vary"] = "Accept-Encoding"
+                    return Response(
+                        status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers,
+                    )
+
+            # Готовый JSON из кэша отдается без повторной валидации.
+            entry = await task_service.get_tasks_entry(
+                start, end
+            )
+            if pending:
+                # Ответ с задачами очереди не кэшируется клиентом:
+                # без ETag и Last-Modified.
+                return ORJSONResponse(
+                    orjson.loads(entry.payload)
+                    + [task.to_json() for task in pending]
+                )
+            headers = {"ETag": entry.etag}
+            # Last-Modified носит справочный характер: удаление задачи
+            # его не сдвигает, поэтому условные запросы по
+            # If-Modified-Since не обрабатываются.
+            if entry.last_modified is not None:
+                headers["Last-Modified"] = format_datetime(
+                    to_utc(entry.last_modified), usegmt=True
+                )
+            # Сжатый JSON хранится в кэше рядом с исходным, и
+            # CompressionMiddleware не сжимает его повторно.
+            payload = entry.payload
+            if settings.compression_encodings:
+                # Vary не зависит от размера выборки, чтобы
+                # совпадать с Vary ответа 304.
+                headers["Vary"] = "Accept-Encoding"
+            if settings.compression_encodings and len(
+                payload
+            ) >= (settings.compression_min_size):
+                encoding = choose_encoding(accept_encoding)
+                if encoding is not None:
+                    payload = await task_service.get_tasks_encoded(
+                        start, end, entry, encoding
+                    )
+                    headers["Content-Encoding"] = encoding
+            return ORJSONResponse(payload, headers=headers)
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail={"msg": "Некорректный формат даты."},
+        )
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Проверить заголовок If-None-Match (слабое сравнение, RFC 9110).
+    """
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (
+        candidate.strip().removeprefix("W/")
+        for candidate in if_none_match.split(",")
+    )
+    return etag.removeprefix("W/") in candidates
+
+
+def parse_if_match(
+    if_match: Optional[str],
+) -> Optional[Set[int]]:
+    """
+    Версии задачи из заголовка If-Match (сильное сравнение,
+    RFC 9110). None - изменение без проверки версии (заголовка
+    нет или он равен "*"). Слабые и чужие ETag не совпадают ни с
+    одной версией.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for candidate in if_match.split(","):
+        value = candidate.strip()
+        if (
+            len(value) > 2
+            and value[0] == value[-1] == '"'
+            and value[1:-1].isdigit()
+        ):
+            versions.add(int(value[1:-1]))
+    return versions
+
+
+async def to_ndjson(
+    rows: AsyncIterator[Row],
+) -> AsyncIterator[bytes]:
+    """
+    Сериализовать поток задач в NDJSON: по одному объекту на строку.
+    """
+    async for row in rows:
+        yield dumps(row, orjson.OPT_APPEND_NEWLINE)
+
+
+@task_router.get(
+    "/summary",
+    response_model=TaskSummaryResponseSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def get_tasks_summary(
+    start_date: str = Query(
+        description="Начальная дата в формате (гггг-мм-дд)",
+    ),
+    end_date: str = Query(
+        description="Конечная дата в формате (гггг-мм-дд)",
+    ),
+    granularity: Granularity = Query(
+        "day",
+        description="Интервал группировки: day, week (с понедельника) или month.",
+    ),
+    task_service: TaskService = Depends(),
+):
+    try:
+        start, end = get_period(start_date, end_date)
     except ValueError:
         raise HTTPException(
             status_code=422,
             detail={"msg": "Некорректный формат даты."},
         )
+    return {
+        "granularity": granularity,
+        "counts": await task_service.get_tasks_summary(
+            start, end, granularity
+        ),
+    }
+
+
+@task_router.get(
+    "/search",
+    response_model=TaskPageResponseSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def search_tasks(
+    q: str = Query(
+        min_length=1,
+        max_length=settings.tasks_search_max_length,
+        description="Слова, которые должны встречаться в названии или описании задачи",
+    ),
+    start_date: Optional[str] = Query(
+        None,
+        description="Начальная дата в формате (гггг-мм-дд)",
+    ),
+    end_date: Optional[str] = Query(
+        None,
+        description="Конечная дата в формате (гггг-мм-дд)",
+    ),
+    limit: int = Query(
+        settings.tasks_page_default_limit,
+        ge=1,
+        le=settings.tasks_page_max_limit,
+        description="Размер страницы.",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Курсор страницы из поля next_cursor предыдущего ответа.",
+    ),
+    task_service: TaskService = Depends(),
+):
+    # Проверка, что 'start_date' и 'end_date' переданы вместе
+    if (start_date is None) != (end_date is None):
+        raise HTTPException(
+            status_code=422,
+            detail="Поля 'start_date' и 'end_date' указываются вместе.",
+        )
+    try:
+        start, end = (
+            get_period(start_date, end_date)
+            if start_date and end_date
+            else (None, None)
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail={"msg": "Некорректный формат даты."},
+        )
+
+    tasks, next_cursor = await task_service.search_tasks(
+        q, start, end, limit, cursor
+    )
+    return {"items": tasks, "next_cursor": next_cursor}
 
 
 @task_router.put(
     "/{task_id}",
     response_model=TaskPutRequestSchema,
     status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "description": "Версия задачи не совпала с If-Match"
+        }
+    },
 )
 async def update(
     task_id: int,
     task: TaskPutRequestSchema,
+    response: Response,
+    if_match: Optional[str] = Header(
+        None,
+        description="ETag задачи из ответа POST или PUT: изменить, только если задачу с тех пор не меняли",
+    ),
     task_service: TaskService = Depends(),
 ):
     try:
-        return task_service.update(task_id, task)
+        updated = await task_service.update(
+            task_id, task, parse_if_match(if_match)
+        )
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
+    response.headers["ETag"] = make_task_etag(
+        updated.version
+    )
+    return updated
 
 
 @task_router.delete(
-    "/{task_id}", status_code=status.HTTP_200_OK
+    "/{task_id}",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "description": "Версия задачи не совпала с If-Match"
+        }
+    },
 )
 async def delete(
-    task_id: int, task_service: TaskService = Depends()
+    task_id: int,
+    if_match: Optional[str] = Header(
+        None,
+        description="ETag задачи: удалить, только если задачу с тех пор не меняли",
+    ),
+    task_service: TaskService = Depends(),
 ) -> None:
-    task_service.delete(task_id)
+    await task_service.delete(
+        task_id, parse_if_match(if_match)
+    )
@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 from typing_extensions import Annotated
 
@@ -61,6 +61,17 @@ class TaskPutRequestSchema(BaseModel):
         return v
 
 
+class TaskBatchPutRequestSchema(TaskPutRequestSchema):
+    id: int = Field(description="Идентификатор задачи")
+
+
+class TaskBatchResultSchema(BaseModel):
+    id: int
+    status: Literal["updated", "deleted", "not_found"] = (
+        Field(description="Результат операции над задачей")
+    )
+
+
 class TaskSchema(TaskPostRequestSchema):
     id: int
 
@@ -70,3 +81,46 @@ class TaskResponseSchema(BaseModel):
     title: str
     description: Optional[str] = None
     due_date: Optional[date] = None
+
+
+class TaskPendingResponseSchema(BaseModel):
+    """
+    Задача из очереди отложенной записи в списке задач: id
+    появится после записи в БД.
+    """
+
+    id: None = None
+    ticket: str = Field(
+        description="Квитанция задачи в очереди отложенной записи"
+    )
+    title: str
+    description: Optional[str] = None
+    due_date: date
+
+
+class TaskPageResponseSchema(BaseModel):
+    items: List[TaskResponseSchema]
+    next_cursor: Optional[str] = Field(
+        description="Курсор следующей страницы (null, если страница последняя)",
+        default=None,
+    )
+
+
+class TaskSummaryResponseSchema(BaseModel):
+    granularity: Literal["day", "week", "month"]
+    counts: Dict[date, int] = Field(
+        description="Количество задач по первому дню интервала (интервалы без задач опущены)"
+    )
+
+
+class TaskTicketSchema(BaseModel):
+    ticket: str = Field(
+        description="Квитанция задачи в очереди отложенной записи"
+    )
+    status: Literal["pending", "created"] = Field(
+        description="pending - задача в очереди, created - записана в БД"
+    )
+    id: Optional[int] = Field(
+        description="Идентификатор записанной задачи",
+        default=None,
+    )
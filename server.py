@@ -0,0 +1,123 @@
+"""
+Запуск сервиса в продакшн: миграции БД и воркеры uvicorn.
+
+Миграции применяются один раз в главном процессе до запуска
+воркеров; воркеры не разделяют память, и кэш выборок в памяти
+каждого из них сбрасывается по ленте изменений задач
+(services/task_change_feed.py). По SIGTERM/SIGINT воркеры
+перестают принимать соединения и завершают принятые запросы
+не дольше settings.server_graceful_timeout.
+
+Запуск:
+    python -m server
+    python -m server --workers 4 --port 8080
+"""
+
+import argparse
+import fcntl
+import logging
+import os
+from typing import Optional
+
+import uvicorn
+from alembic import command
+from alembic.config import Config
+
+from configs import settings
+
+logger = logging.getLogger(__name__)
+
+root_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def resolve_workers(workers: int) -> int:
+    """
+    Число воркеров: заданное либо по числу процессоров.
+    """
+    if workers > 0:
+        return workers
+    return os.cpu_count() or 1
+
+
+def worker_environ(workers: int) -> dict:
+    """
+    Переменные окружения, которые главный процесс передает
+    воркерам.
+    """
+    environ = {}
+    if (
+        workers > 1
+        and settings.tasks_cache_backend == "memory"
+        and "TODO_API_CHANGE_FEED" not in os.environ
+    ):
+        # Кэш в памяти у каждого воркера свой: изменения задач
+        # другими воркерами приходят через ленту.
+        environ["TODO_API_CHANGE_FEED"] = "1"
+    return environ
+
+
+def migrate(
+    lock_path: str = settings.server_migrate_lock,
+) -> None:
+    """
+    Применить миграции до последней ревизии. Параллельные запуски
+    на одном хосте ждут друг друга на блокировке файла и не
+    применяют миграции повторно.
+    """
+    config = Config(os.path.join(root_dir, "alembic.ini"))
+    config.set_main_option(
+        "script_location",
+        os.path.join(root_dir, "migrator"),
+    )
+    os.makedirs(
+        os.path.dirname(os.path.abspath(lock_path)),
+        exist_ok=True,
+    )
+    with open(lock_path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            command.upgrade(config, "head")
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Запуск todo-api в продакшн"
+    )
+    parser.add_argument(
+        "--host", default=settings.server_host
+    )
+    parser.add_argument(
+        "--port", type=int, default=settings.server_port
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.server_workers,
+        help="число воркеров (0 - по числу процессоров)",
+    )
+    parser.add_argument(
+        "--no-migrate",
+        action="store_true",
+        help="не применять миграции при запуске",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.no_migrate:
+        migrate()
+    workers = resolve_workers(args.workers)
+    os.environ.update(worker_environ(workers))
+    logger.info("Запуск %d воркеров", workers)
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_graceful_shutdown=settings.server_graceful_timeout,
+    )
+
+
+if __name__ == "__main__":
+    main()
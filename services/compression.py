@@ -0,0 +1,93 @@
+import gzip
+from typing import Callable, Dict, Optional, Tuple
+
+from configs import settings
+
+Compressor = Callable[[bytes], bytes]
+
+
+def create_compressors() -> Dict[str, Compressor]:
+    """
+    Доступные кодировки сжатия (content-coding) с уровнями из
+    настроек. br и zstd требуют пакетов brotli и zstandard и
+    без них не предлагаются.
+    """
+    compressors: Dict[str, Compressor] = {
+        "gzip": lambda data: gzip.compress(
+            data,
+            compresslevel=settings.compression_gzip_level,
+            mtime=0,
+        )
+    }
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        compressors["br"] = lambda data: brotli.compress(
+            data, quality=settings.compression_brotli_level
+        )
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        zstd = zstandard.ZstdCompressor(
+            level=settings.compression_zstd_level
+        )
+        compressors["zstd"] = zstd.compress
+    return compressors
+
+
+compressors = create_compressors()
+
+
+def parse_accept_encoding(
+    accept_encoding: str,
+) -> Dict[str, float]:
+    """
+    Кодировки заголовка Accept-Encoding с их весами q (RFC 9110).
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        name, _, value = parameters.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                continue
+        if coding == "x-gzip":
+            coding = "gzip"
+        weights[coding] = weight
+    return weights
+
+
+def choose_encoding(
+    accept_encoding: Optional[str],
+) -> Optional[str]:
+    """
+    Кодировка ответа по Accept-Encoding: с наибольшим весом среди
+    доступных и включенных в settings.compression_encodings, при
+    равных весах - первая в настройке. None - отдавать без сжатия.
+    """
+    if not accept_encoding:
+        return None
+    weights = parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best: Tuple[float, Optional[str]] = (0.0, None)
+    for encoding in settings.compression_encodings:
+        if encoding not in compressors:
+            continue
+        weight = weights.get(encoding, wildcard)
+        if weight > best[0]:
+            best = (weight, encoding)
+    return best[1]
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return compressors[encoding](data)
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых конкурентных загрузок: пока загрузка
+    по ключу выполняется, остальные вызовы с тем же ключом ждут
+    ее результат вместо повторного запроса к БД.
+    """
+
+    coalesced: int
+
+    def __init__(self) -> None:
+        self.__calls: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def run(
+        self, key: str, load: Callable[[], Awaitable[T]]
+    ) -> T:
+        call = self.__calls.get(key)
+        if call is not None:
+            self.coalesced += 1
+        else:
+            call = asyncio.ensure_future(load())
+            self.__calls[key] = call
+            call.add_done_callback(
+                lambda _: self.__forget(key, call)
+            )
+        # Отмена одного из ожидающих запросов (например, при
+        # разрыве соединения) не отменяет загрузку для остальных.
+        return await asyncio.shield(call)
+
+    def __forget(
+        self, key: str, call: asyncio.Future
+    ) -> None:
+        if self.__calls.get(key) is call:
+            del self.__calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self.__calls),
+            "coalesced": self.coalesced,
+        }
+
+
+task_queries = SingleFlight()
+
+
+def get_task_queries() -> SingleFlight:
+    """
+    Получить общий для процесса реестр выполняющихся
+    загрузок выборок задач.
+    """
+    return task_queries
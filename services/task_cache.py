@@ -0,0 +1,513 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import (
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from configs import settings
+from services.compression import compress
+
+
+class TaskCacheEntry(NamedTuple):
+    """
+    Запись кэша: готовый JSON выборки, ее ETag, время последнего
+    изменения и идентификаторы задач, вошедших в выборку.
+    """
+
+    payload: bytes
+    etag: str
+    last_modified: Optional[datetime]
+    task_ids: FrozenSet[int]
+
+
+CacheLoader = Callable[[], Awaitable[TaskCacheEntry]]
+
+
+class TaskCacheBackend(ABC):
+    """
+    Хранилище записей кэша выборок задач.
+
+    Ключ записи - владелец и нормализованный период
+    "владелец:гггг-мм-дд:гггг-мм-дд".
+    """
+
+    evictions: int = 0
+
+    @abstractmethod
+    async def get(
+        self, key: str
+    ) -> Optional[TaskCacheEntry]: ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, entry: TaskCacheEntry
+    ) -> None: ...
+
+    @abstractmethod
+    async def keys(self) -> List[str]: ...
+
+    @abstractmethod
+    async def contains_task(
+        self, key: str, task_id: int
+    ) -> bool: ...
+
+    @abstractmethod
+    async def delete(
+        self, keys: Collection[str]
+    ) -> None: ...
+
+    @abstractmethod
+    async def get_encoded(
+        self, key: str, etag: str, encoding: str
+    ) -> Optional[bytes]:
+        """
+        Сжатый JSON записи key с ETag etag (None, если запись
+        заменена или еще не сжималась в encoding).
+        """
+
+    @abstractmethod
+    async def set_encoded(
+        self,
+        key: str,
+        etag: str,
+        encoding: str,
+        data: bytes,
+    ) -> None: ...
+
+
+class MemoryCacheBackend(TaskCacheBackend):
+    """
+    Ограниченный LRU-кэш в памяти процесса с временем жизни записей.
+    """
+
+    # ключ -> (срок жизни, запись, {кодировка: сжатый JSON})
+    __entries: "OrderedDict[str, Tuple[float, TaskCacheEntry, Dict[str, bytes]]]"
+
+    def __init__(
+        self, max_entries: int, ttl: float
+    ) -> None:
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__entries = OrderedDict()
+        self.evictions = 0
+
+    async def get(
+        self, key: str
+    ) -> Optional[TaskCacheEntry]:
+        item = self.__entries.get(key)
+        if item is None:
+            return None
+
+        expires_at, entry, _ = item
+        if expires_at < time.monotonic():
+            del self.__entries[key]
+            self.evictions += 1
+            return None
+
+        self.__entries.move_to_end(key)
+        return entry
+
+    async def set(
+        self, key: str, entry: TaskCacheEntry
+    ) -> None:
+        self.__entries[key] = (
+            time.monotonic() + self.__ttl,
+            entry,
+            {},
+        )
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    async def keys(self) -> List[str]:
+        return list(self.__entries)
+
+    async def contains_task(
+        self, key: str, task_id: int
+    ) -> bool:
+        item = self.__entries.get(key)
+        return (
+            item is not None and task_id in item[1].task_ids
+        )
+
+    async def delete(self, keys: Collection[str]) -> None:
+        for key in keys:
+            self.__entries.pop(key, None)
+
+    async def get_encoded(
+        self, key: str, etag: str, encoding: str
+    ) -> Optional[bytes]:
+        item = self.__entries.get(key)
+        if item is None or item[1].etag != etag:
+            return None
+        return item[2].get(encoding)
+
+    async def set_encoded(
+        self,
+        key: str,
+        etag: str,
+        encoding: str,
+        data: bytes,
+    ) -> None:
+        item = self.__entries.get(key)
+        if item is not None and item[1].etag == etag:
+            item[2][encoding] = data
+
+
+class RedisCacheBackend(TaskCacheBackend):
+    """
+    Кэш во внешнем процессе Redis, общий для всех воркеров.
+
+    Требует установленного пакета redis (pip install redis).
+    """
+
+    def __init__(self, url: str, ttl: float) -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "Для кэша в Redis требуется пакет 'redis'"
+            ) from e
+
+        self.__redis = redis.from_url(url)
+        self.__ttl = ttl
+        self.__prefix = f"{settings.app_title}:tasks"
+        self.evictions = 0
+
+    async def get(
+        self, key: str
+    ) -> Optional[TaskCacheEntry]:
+        fields = await self.__redis.hgetall(
+            f"{self.__prefix}:{key}"
+        )
+        if b"payload" not in fields:
+            # Запись истекла по TTL: убираем ее из реестра.
+            await self.__redis.srem(
+                f"{self.__prefix}:keys", key
+            )
+            return None
+
+        last_modified = fields.get(b"last_modified")
+        return TaskCacheEntry(
+            payload=fields[b"payload"],
+            etag=fields[b"etag"].decode(),
+            last_modified=(
+                datetime.fromisoformat(
+                    last_modified.decode()
+                )
+                if last_modified
+                else None
+            ),
+            # Состав выборки хранится отдельным множеством
+            # и проверяется через contains_task.
+            task_ids=frozenset(),
+        )
+
+    async def set(
+        self, key: str, entry: TaskCacheEntry
+    ) -> None:
+        ttl = int(self.__ttl) or 1
+        fields = {
+            "payload": entry.payload,
+            "etag": entry.etag,
+        }
+        if entry.last_modified is not None:
+            fields["last_modified"] = (
+                entry.last_modified.isoformat()
+            )
+        async with self.__redis.pipeline() as pipeline:
+            pipeline.delete(
+                f"{self.__prefix}:{key}",
+                f"{self.__prefix}:{key}:ids",
+            )
+            pipeline.hset(
+                f"{self.__prefix}:{key}", mapping=fields
+            )
+            pipeline.expire(f"{self.__prefix}:{key}", ttl)
+            if entry.task_ids:
+                pipeline.sadd(
+                    f"{self.__prefix}:{key}:ids",
+                    *entry.task_ids,
+                )
+                pipeline.expire(
+                    f"{self.__prefix}:{key}:ids", ttl
+                )
+            pipeline.sadd(f"{self.__prefix}:keys", key)
+            await pipeline.execute()
+
+    async def keys(self) -> List[str]:
+        members = await self.__redis.smembers(
+            f"{self.__prefix}:keys"
+        )
+        return [member.decode() for member in members]
+
+    async def contains_task(
+        self, key: str, task_id: int
+    ) -> bool:
+        return bool(
+            await self.__redis.sismember(
+                f"{self.__prefix}:{key}:ids", task_id
+            )
+        )
+
+    async def delete(self, keys: Collection[str]) -> None:
+        if not keys:
+            return
+        async with self.__redis.pipeline() as pipeline:
+            for key in keys:
+                pipeline.delete(
+                    f"{self.__prefix}:{key}",
+                    f"{self.__prefix}:{key}:ids",
+                )
+            pipeline.srem(f"{self.__prefix}:keys", *keys)
+            await pipeline.execute()
+
+    async def get_encoded(
+        self, key: str, etag: str, encoding: str
+    ) -> Optional[bytes]:
+        # Сжатый JSON хранится в хэше записи под ETag: замена
+        # записи (set) удаляет хэш целиком.
+        return await self.__redis.hget(
+            f"{self.__prefix}:{key}", f"{encoding}:{etag}"
+        )
+
+    async def set_encoded(
+        self,
+        key: str,
+        etag: str,
+        encoding: str,
+        data: bytes,
+    ) -> None:
+        # Если запись уже сброшена, hset создает хэш без payload:
+        # get его не читает, а nx задает ему TTL, не продлевая
+        # TTL действующей записи.
+        async with self.__redis.pipeline() as pipeline:
+            pipeline.hset(
+                f"{self.__prefix}:{key}",
+                f"{encoding}:{etag}",
+                data,
+            )
+            pipeline.expire(
+                f"{self.__prefix}:{key}",
+                int(self.__ttl) or 1,
+                nx=True,
+            )
+            await pipeline.execute()
+
+
+class TaskCache:
+    """
+    Кэш сериализованных выборок задач владельца по периоду.
+
+    Запись сбрасывается, если в ее период попадает due_date
+    измененной задачи или если измененная задача в нее входила
+    (это покрывает прежнюю due_date при обновлении).
+    """
+
+    hits: int
+    misses: int
+    invalidations: int
+
+    def __init__(
+        self, backend: Optional[TaskCacheBackend]
+    ) -> None:
+        self.__backend = backend
+        # Счетчик изменений: запись, загруженная до изменения,
+        # не должна попасть в кэш после его сброса.
+        self.__generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_load(
+        self,
+        owner_id: int,
+        start_date: date,
+        end_date: date,
+        load: CacheLoader,
+    ) -> TaskCacheEntry:
+        if self.__backend is None:
+            return await load()
+
+        key = make_key(owner_id, start_date, end_date)
+        entry = await self.__backend.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        generation = self.__generation
+        entry = await load()
+        if generation == self.__generation:
+            await self.__backend.set(key, entry)
+        return entry
+
+    @property
+    def generation(self) -> int:
+        """
+        Номер поколения данных: увеличивается при каждом
+        изменении задач.
+        """
+        return self.__generation
+
+    async def peek(
+        self,
+        owner_id: int,
+        start_date: date,
+        end_date: date,
+    ) -> Optional[TaskCacheEntry]:
+        """
+        Получить запись без загрузки и без учета в счетчиках.
+        """
+        if self.__backend is None:
+            return None
+        return await self.__backend.get(
+            make_key(owner_id, start_date, end_date)
+        )
+
+    async def invalidate(
+        self,
+        owner_id: int,
+        task_ids: Collection[int],
+        due_dates: Collection[date],
+    ) -> None:
+        """
+        Сбросить записи владельца owner_id, затронутые изменением
+        его задач task_ids с датами due_dates.
+        """
+        self.__generation += 1
+        if self.__backend is None:
+            return
+
+        stale = []
+        for key in await self.__backend.keys():
+            key_owner_id, start_date, end_date = parse_key(
+                key
+            )
+            if key_owner_id != owner_id:
+                continue
+            if any(
+                start_date <= due_date <= end_date
+                for due_date in due_dates
+            ):
+                stale.append(key)
+                continue
+            for task_id in task_ids:
+                if await self.__backend.contains_task(
+                    key, task_id
+                ):
+                    stale.append(key)
+                    break
+
+        await self.__backend.delete(stale)
+        self.invalidations += len(stale)
+
+    async def get_encoded(
+        self,
+        owner_id: int,
+        start_date: date,
+        end_date: date,
+        entry: TaskCacheEntry,
+        encoding: str,
+    ) -> bytes:
+        """
+        JSON записи entry, сжатый в encoding. Сжатые байты
+        хранятся рядом с записью кэша, и попадания не сжимают JSON
+        заново.
+        """
+        if self.__backend is None:
+            return compress(entry.payload, encoding)
+
+        key = make_key(owner_id, start_date, end_date)
+        data = await self.__backend.get_encoded(
+            key, entry.etag, encoding
+        )
+        if data is None:
+            data = compress(entry.payload, encoding)
+            await self.__backend.set_encoded(
+                key, entry.etag, encoding, data
+            )
+        return data
+
+    async def invalidate_all(self) -> None:
+        """
+        Сбросить все записи кэша.
+        """
+        self.__generation += 1
+        if self.__backend is None:
+            return
+
+        keys = await self.__backend.keys()
+        await self.__backend.delete(keys)
+        self.invalidations += len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": (
+                self.__backend.evictions
+                if self.__backend
+                else 0
+            ),
+            "invalidations": self.invalidations,
+        }
+
+
+def make_key(
+    owner_id: int, start_date: date, end_date: date
+) -> str:
+    return (
+        f"{owner_id}:{start_date.isoformat()}"
+        f":{end_date.isoformat()}"
+    )
+
+
+def parse_key(key: str) -> Tuple[int, date, date]:
+    owner_id_str, start_date_str, end_date_str = key.split(
+        ":"
+    )
+    return (
+        int(owner_id_str),
+        date.fromisoformat(start_date_str),
+        date.fromisoformat(end_date_str),
+    )
+
+
+def create_task_cache() -> TaskCache:
+    if settings.tasks_cache_backend == "memory":
+        return TaskCache(
+            MemoryCacheBackend(
+                settings.tasks_cache_max_entries,
+                settings.tasks_cache_ttl,
+            )
+        )
+    if settings.tasks_cache_backend == "redis":
+        return TaskCache(
+            RedisCacheBackend(
+                settings.tasks_cache_redis_url,
+                settings.tasks_cache_ttl,
+            )
+        )
+    return TaskCache(None)
+
+
+task_cache = create_task_cache()
+
+
+def get_task_cache() -> TaskCache:
+    """
+    Получить общий для процесса кэш выборок задач.
+    """
+    return task_cache
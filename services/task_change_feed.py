@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta, timezone
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from sqlalchemy import Row, delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from configs import settings
+from configs.database import session_local
+from models.task_change_model import TaskChange
+from services.task_cache import TaskCache, get_task_cache
+
+logger = logging.getLogger(__name__)
+
+
+class TaskChangeListener(ABC):
+    """
+    Состояние процесса, обновляемое по ленте изменений задач.
+    """
+
+    @abstractmethod
+    async def apply_changes(
+        self, changes: Sequence[Row]
+    ) -> None:
+        """
+        Применить записи ленты (seq, task_id, owner_id,
+        due_date). Запись может прийти повторно.
+        """
+
+    @abstractmethod
+    async def reset(self) -> None:
+        """
+        Часть ленты могла быть пропущена: построить состояние
+        заново.
+        """
+
+
+class TaskChangeFeed:
+    """
+    Чтение ленты task_change, в которую все воркеры пишут
+    изменения задач в их транзакциях.
+
+    sync читает записи после последней прочитанной (не чаще
+    sync_interval), сбрасывает затронутые ими записи кэша выборок
+    процесса и передает их слушателям. Так кэш в памяти одного
+    воркера не отдает задачи, измененные другим воркером.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        task_cache: TaskCache,
+        sync_interval: float = settings.tasks_change_feed_sync_interval,
+        retention: float = settings.tasks_change_feed_retention,
+        gap_timeout: float = settings.tasks_change_feed_gap_timeout,
+    ) -> None:
+        self.__session_maker = session_maker
+        self.__task_cache = task_cache
+        self.__sync_interval = sync_interval
+        self.__retention = retention
+        self.__gap_timeout = gap_timeout
+        self.__listeners: List[TaskChangeListener] = []
+        # Последняя прочитанная запись ленты; None - чтение не
+        # начато (start).
+        self.__last_seq: Optional[int] = None
+        self.__synced_at = 0.0
+        self.__pruned_at = 0.0
+        self.__gap_since: Optional[float] = None
+        # Конкурентные запросы ждут одно чтение ленты, начатое
+        # после их прихода.
+        self.__requested = 0
+        self.__completed = 0
+        self.__sync: Optional[asyncio.Future] = None
+
+    def add_listener(
+        self, listener: TaskChangeListener
+    ) -> None:
+        self.__listeners.append(listener)
+
+    async def start(self) -> None:
+        """
+        Начать чтение с конца ленты. Вызывается до загрузки
+        состояния слушателей: изменения, попавшие между start и
+        загрузкой, будут применены повторно.
+        """
+        self.__last_seq = await self.__read_last_seq()
+        self.__synced_at = time.monotonic()
+        self.__gap_since = None
+
+    async def sync(self, force: bool = False) -> None:
+        """
+        Применить записи ленты, если с прошлого чтения прошло не
+        меньше sync_interval либо force (после изменения задач
+        этим воркером).
+        """
+        if self.__last_seq is None:
+            return
+        if (
+            not force
+            and self.__sync_interval
+            and time.monotonic() - self.__synced_at
+            < self.__sync_interval
+        ):
+            return
+        self.__requested += 1
+        target = self.__requested
+        while self.__completed < target:
+            if self.__sync is None:
+                self.__sync = asyncio.ensure_future(
+                    self.__run_sync()
+                )
+            await asyncio.shield(self.__sync)
+
+    async def __run_sync(self) -> None:
+        target = self.__requested
+        try:
+            if (
+                time.monotonic() - self.__synced_at
+                > self.__retention / 2
+            ):
+                # Часть непрочитанной ленты могла быть уже
+                # удалена.
+                await self.__reset()
+            else:
+                await self.__apply()
+            self.__completed = max(self.__completed, target)
+        finally:
+            self.__sync = None
+
+    async def __apply(self) -> None:
+        async with self.__session_maker() as session:
+            changes = (
+                await session.execute(
+                    select(
+                        TaskChange.seq,
+                        TaskChange.task_id,
+                        TaskChange.owner_id,
+                        TaskChange.due_date,
+                    )
+                    .where(TaskChange.seq > self.__last_seq)
+                    .order_by(TaskChange.seq)
+                )
+            ).all()
+        now = time.monotonic()
+        if now - self.__pruned_at > self.__retention / 10:
+            await self.__prune()
+            self.__pruned_at = now
+        self.__advance(change.seq for change in changes)
+        self.__synced_at = now
+        if not changes:
+            return
+
+        # Слушатели обновляются до сброса кэша: иначе запрос,
+        # не ждущий чтения ленты, закэширует прежнее состояние.
+        for listener in self.__listeners:
+            await listener.apply_changes(changes)
+        stale: Dict[int, Tuple[Set[int], Set[date]]] = {}
+        for change in changes:
+            task_ids, due_dates = stale.setdefault(
+                change.owner_id, (set(), set())
+            )
+            task_ids.add(change.task_id)
+            due_dates.add(change.due_date)
+        for owner_id, (
+            task_ids,
+            due_dates,
+        ) in stale.items():
+            await self.__task_cache.invalidate(
+                owner_id, task_ids, due_dates
+            )
+
+    async def __reset(self) -> None:
+        logger.warning(
+            "Лента task_change не читалась %.0f с: состояние"
+            " процесса загружается заново",
+            time.monotonic() - self.__synced_at,
+        )
+        await self.start()
+        for listener in self.__listeners:
+            await listener.reset()
+        await self.__task_cache.invalidate_all()
+
+    def __advance(self, seqs: Iterable[int]) -> None:
+        """
+        Сдвинуть последнюю прочитанную запись ленты до первого
+        пропуска в номерах. PostgreSQL выдает номера до фиксации
+        транзакций, поэтому записи после пропуска читаются
+        повторно, пока пропуск не заполнится или не истечет
+        gap_timeout (номер отката транзакции не заполнится никогда).
+        """
+        for seq in seqs:
+            if seq == self.__last_seq + 1:
+                self.__last_seq = seq
+                self.__gap_since = None
+                continue
+            now = time.monotonic()
+            if self.__gap_since is None:
+                self.__gap_since = now
+            if now - self.__gap_since < self.__gap_timeout:
+                return
+            self.__last_seq = seq
+            self.__gap_since = None
+
+    async def __read_last_seq(self) -> int:
+        async with self.__session_maker() as session:
+            return await session.scalar(
+                select(
+                    func.coalesce(
+                        func.max(TaskChange.seq), 0
+                    )
+                )
+            )
+
+    async def __prune(self) -> None:
+        async with self.__session_maker.begin() as session:
+            await session.execute(
+                delete(TaskChange).where(
+                    TaskChange.changed_at
+                    < datetime.now(timezone.utc)
+                    - timedelta(seconds=self.__retention)
+                )
+            )
+
+
+task_change_feed: Optional[TaskChangeFeed] = None
+
+
+def create_task_change_feed() -> TaskChangeFeed:
+    """
+    Создать чтение ленты процесса; запускается в lifespan
+    приложения.
+    """
+    global task_change_feed
+    task_change_feed = TaskChangeFeed(
+        session_local, get_task_cache()
+    )
+    return task_change_feed
+
+
+def get_task_change_feed() -> Optional[TaskChangeFeed]:
+    """
+    Чтение ленты изменений задач (None, если лента выключена).
+    """
+    return task_change_feed
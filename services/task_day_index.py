@@ -0,0 +1,317 @@
+import asyncio
+import logging
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import (
+    Collection,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from configs import settings
+from configs.database import session_local
+from models.task_model import Task
+from monitoring.metrics import registry
+from services.task_change_feed import (
+    TaskChangeListener,
+    get_task_change_feed,
+)
+
+logger = logging.getLogger(__name__)
+
+day_index_bytes = registry.gauge(
+    "todo_api_day_index_bytes",
+    "Оценка памяти индекса задач по дням, байт.",
+)
+day_index_lookups = registry.counter(
+    "todo_api_day_index_lookups_total",
+    "Выборки по периоду: из индекса по дням (hit) либо из БД"
+    " (miss).",
+    ("result",),
+)
+
+
+class TaskRow(NamedTuple):
+    """
+    Задача в индексе: колонки выборки по периоду
+    (repositories.task_repository.task_columns и updated_at).
+    """
+
+    id: int
+    title: str
+    description: Optional[str]
+    due_date: date
+    updated_at: datetime
+
+
+# Колонки задачи в индексе и ее владелец
+index_columns = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.due_date,
+    Task.updated_at,
+    Task.owner_id,
+)
+
+# Задачи дня: владелец -> {id: задача}
+DayBucket = Dict[int, Dict[int, TaskRow]]
+
+
+def row_size(row: TaskRow) -> int:
+    """
+    Оценка памяти задачи в индексе: кортеж, строки и записи
+    словарей дня и task_days.
+    """
+    return (
+        sys.getsizeof(row)
+        + sys.getsizeof(row.title)
+        + sys.getsizeof(row.description)
+        + 200
+    )
+
+
+class TaskDayIndex(TaskChangeListener):
+    """
+    Задачи окна дней вокруг сегодняшнего, сгруппированные по дням
+    и владельцам. Выборка дня или недели внутри окна собирается
+    из готовых списков без запроса задач к БД.
+
+    Индекс обновляется по ленте изменений задач
+    (services/task_change_feed.py): задачи из записей ленты
+    перечитываются из БД.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        window_days: int = settings.tasks_day_index_window_days,
+        max_bytes: int = settings.tasks_day_index_max_bytes,
+    ) -> None:
+        self.__session_maker = session_maker
+        self.__window_days = window_days
+        self.__max_bytes = max_bytes
+        self.__days: Dict[date, DayBucket] = {}
+        self.__day_bytes: Dict[date, int] = {}
+        # id задачи -> (день, владелец) для переноса и удаления
+        self.__task_days: Dict[int, Tuple[date, int]] = {}
+        self.__bytes = 0
+        # Окно загруженных дней [start; end]; None - индекс не
+        # загружен.
+        self.__window: Optional[Tuple[date, date]] = None
+        # Индекс загружается: выборки идут в БД, а изменения
+        # из ленты откладываются до конца загрузки.
+        self.__ready = False
+        self.__changed: Set[int] = set()
+        self.__today: Optional[date] = None
+        self.__warm: Optional[asyncio.Task] = None
+
+    @property
+    def window(self) -> Optional[Tuple[date, date]]:
+        return self.__window
+
+    async def warm(self) -> None:
+        """
+        Загрузить окно дней заново одним проходом по task.
+        """
+        today = date.today()
+        start = today - timedelta(days=self.__window_days)
+        end = today + timedelta(days=self.__window_days)
+        started = time.perf_counter()
+
+        self.__ready = False
+        self.__changed = set()
+        async with self.__session_maker() as session:
+            result = await session.stream(
+                select(*index_columns)
+                .where(
+                    Task.due_date >= start,
+                    Task.due_date <= end,
+                )
+                .execution_options(
+                    yield_per=settings.tasks_stream_batch_size
+                )
+            )
+            self.__clear()
+            self.__window = (start, end)
+            async for row in result:
+                self.__add(row[-1], TaskRow(*row[:-1]))
+                self.__shrink()
+
+        # Задачи, измененные во время загрузки, могли попасть в
+        # нее в прежнем виде.
+        while self.__changed:
+            changed, self.__changed = self.__changed, set()
+            await self.__reload(changed)
+
+        self.__ready = True
+        self.__today = today
+        self.__update_bytes()
+        logger.info(
+            "Индекс задач по дням: %s..%s, %d задач, %d байт"
+            " за %.2f с",
+            *self.__window,
+            len(self.__task_days),
+            self.__bytes,
+            time.perf_counter() - started,
+        )
+
+    def get_rows(
+        self,
+        owner_id: int,
+        start_date: date,
+        end_date: date,
+    ) -> Optional[List[TaskRow]]:
+        """
+        Задачи владельца за период в порядке (due_date, id) либо
+        None, если период выходит за окно индекса. Перед выборкой
+        читается лента изменений (TaskChangeFeed.sync).
+        """
+        if self.__ready and self.__today != date.today():
+            # Окно сдвигается на новый день в фоне.
+            self.__ready = False
+            self.__warm = asyncio.create_task(self.warm())
+        window = self.__window
+        if (
+            not self.__ready
+            or start_date < window[0]
+            or end_date > window[1]
+        ):
+            day_index_lookups.inc(1, "miss")
+            return None
+
+        day_index_lookups.inc(1, "hit")
+        rows: List[TaskRow] = []
+        day = start_date
+        while day <= end_date:
+            tasks = self.__days.get(day, {}).get(owner_id)
+            if tasks:
+                rows.extend(sorted(tasks.values()))
+            day += timedelta(days=1)
+        return rows
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tasks": len(self.__task_days),
+            "bytes": self.__bytes,
+        }
+
+    async def apply_changes(
+        self, changes: Sequence[Row]
+    ) -> None:
+        task_ids = {change.task_id for change in changes}
+        if not self.__ready:
+            self.__changed |= task_ids
+            return
+        await self.__reload(task_ids)
+
+    async def reset(self) -> None:
+        await self.warm()
+
+    async def __reload(
+        self, task_ids: Collection[int]
+    ) -> None:
+        async with self.__session_maker() as session:
+            rows = (
+                await session.execute(
+                    select(*index_columns).where(
+                        Task.id.in_(task_ids)
+                    )
+                )
+            ).all()
+        for task_id in task_ids:
+            self.__remove(task_id)
+        for row in rows:
+            self.__add(row[-1], TaskRow(*row[:-1]))
+        self.__shrink()
+        self.__update_bytes()
+
+    def __add(self, owner_id: int, row: TaskRow) -> None:
+        window = self.__window
+        if not window[0] <= row.due_date <= window[1]:
+            return
+        self.__days.setdefault(row.due_date, {}).setdefault(
+            owner_id, {}
+        )[row.id] = row
+        self.__task_days[row.id] = (row.due_date, owner_id)
+        size = row_size(row)
+        self.__day_bytes[row.due_date] = (
+            self.__day_bytes.get(row.due_date, 0) + size
+        )
+        self.__bytes += size
+
+    def __remove(self, task_id: int) -> None:
+        location = self.__task_days.pop(task_id, None)
+        if location is None:
+            return
+        day, owner_id = location
+        tasks = self.__days[day][owner_id]
+        size = row_size(tasks.pop(task_id))
+        if not tasks:
+            del self.__days[day][owner_id]
+        self.__day_bytes[day] -= size
+        self.__bytes -= size
+
+    def __shrink(self) -> None:
+        """
+        Сужать окно с дальнего от сегодня края, пока индекс не
+        уложится в max_bytes.
+        """
+        while self.__bytes > self.__max_bytes:
+            start, end = self.__window
+            if start > end:
+                break
+            today = date.today()
+            if end - today >= today - start:
+                day, self.__window = end, (
+                    start,
+                    end - timedelta(days=1),
+                )
+            else:
+                day, self.__window = start, (
+                    start + timedelta(days=1),
+                    end,
+                )
+            for tasks in self.__days.pop(day, {}).values():
+                for task_id in tasks:
+                    del self.__task_days[task_id]
+            self.__bytes -= self.__day_bytes.pop(day, 0)
+
+    def __clear(self) -> None:
+        self.__days = {}
+        self.__day_bytes = {}
+        self.__task_days = {}
+        self.__bytes = 0
+
+    def __update_bytes(self) -> None:
+        day_index_bytes.set(self.__bytes)
+
+
+task_day_index: Optional[TaskDayIndex] = None
+
+
+def create_task_day_index() -> TaskDayIndex:
+    """
+    Создать индекс процесса и подписать его на ленту изменений;
+    загружается в lifespan приложения после TaskChangeFeed.start.
+    """
+    global task_day_index
+    task_day_index = TaskDayIndex(session_local)
+    get_task_change_feed().add_listener(task_day_index)
+    return task_day_index
+
+
+def get_task_day_index() -> Optional[TaskDayIndex]:
+    """
+    Индекс задач по дням (None, если он выключен).
+    """
+    return task_day_index
@@ -1,103 +1,614 @@
-from datetime import date, timedelta
-from typing import List, Optional
+import base64
+import binascii
+import hashlib
+import re
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache, partial
+from typing import (
+    AsyncIterator,
+    Collection,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from dateutil import parser, tz
+import orjson
 from fastapi import Depends
+from sqlalchemy import Row
 
+from configs import settings
+from configs.owner import get_owner_id
 from models.task_model import Task
 from repositories.task_repository import TaskRepository
 from schemas.pydantic.task_schema import (
+    TaskBatchPutRequestSchema,
+    TaskBatchResultSchema,
     TaskPostRequestSchema,
     TaskPutRequestSchema,
 )
+from services.single_flight import (
+    SingleFlight,
+    get_task_queries,
+)
+from services.task_cache import (
+    TaskCache,
+    TaskCacheEntry,
+    get_task_cache,
+    make_key,
+)
+from services.task_change_feed import (
+    TaskChangeFeed,
+    get_task_change_feed,
+)
+from services.task_day_index import (
+    TaskDayIndex,
+    get_task_day_index,
+)
+
+# Интервал сводки количества задач
+Granularity = Literal["day", "week", "month"]
+
+
+class InvalidCursorException(Exception):
+    def __init__(self, cursor: str):
+        self.cursor = cursor
+        self.message = f"Некорректный курсор: '{cursor}'"
+        super().__init__(self.message)
 
 
 class TaskService:
     __task_repository: TaskRepository
+    __task_cache: TaskCache
+    __task_queries: SingleFlight
+    __owner_id: int
+    __task_change_feed: Optional[TaskChangeFeed]
+    __task_day_index: Optional[TaskDayIndex]
 
     def __init__(
-        self, task_repository: TaskRepository = Depends()
+        self,
+        task_repository: TaskRepository = Depends(),
+        task_cache: TaskCache = Depends(get_task_cache),
+        task_queries: SingleFlight = Depends(
+            get_task_queries
+        ),
+        owner_id: int = Depends(get_owner_id),
+        task_change_feed: Optional[
+            TaskChangeFeed
+        ] = Depends(get_task_change_feed),
+        task_day_index: Optional[TaskDayIndex] = Depends(
+            get_task_day_index
+        ),
     ) -> None:
         self.__task_repository = task_repository
+        self.__task_cache = task_cache
+        self.__task_queries = task_queries
+        # Совпадает с владельцем репозитория: зависимость
+        # вычисляется один раз на запрос.
+        self.__owner_id = owner_id
+        self.__task_change_feed = task_change_feed
+        self.__task_day_index = task_day_index
+
+    async def __sync_changes(self) -> None:
+        if self.__task_change_feed is not None:
+            await self.__task_change_feed.sync()
+
+    def __invalidate(
+        self,
+        task_ids: Collection[int],
+        due_dates: Collection[date],
+    ) -> None:
+        # Сброс после commit: иначе конкурентный запрос успеет
+        # закэшировать выборку без еще не зафиксированных изменений.
+        self.__task_repository.after_commit(
+            partial(
+                self.__task_cache.invalidate,
+                self.__owner_id,
+                task_ids,
+                due_dates,
+            )
+        )
+        if self.__task_change_feed is not None:
+            # Изменение уже в ленте task_change: она читается
+            # сразу, не дожидаясь sync_interval.
+            self.__task_repository.after_commit(
+                partial(self.__task_change_feed.sync, True)
+            )
 
-    def create(
+    async def create(
         self, task_content: TaskPostRequestSchema
     ) -> Task:
-        return self.__task_repository.create(
+        task = await self.__task_repository.create(
             Task(
                 title=task_content.title,
                 description=task_content.description,
                 due_date=task_content.due_date,
             )
         )
+        self.__invalidate([], [task.due_date])
+        return task
+
+    async def create_many(
+        self, tasks_content: List[TaskPostRequestSchema]
+    ) -> List[Task]:
+        tasks = await self.__task_repository.create_many(
+            [
+                Task(
+                    title=task_content.title,
+                    description=task_content.description,
+                    due_date=task_content.due_date,
+                )
+                for task_content in tasks_content
+            ]
+        )
+        self.__invalidate(
+            [], {task.due_date for task in tasks}
+        )
+        return tasks
 
-    def update(
+    async def update(
         self,
         task_id: int,
         task_content: TaskPutRequestSchema,
+        versions: Optional[Collection[int]] = None,
     ) -> Task:
-        return self.__task_repository.update(
+        task = await self.__task_repository.update(
             Task(
                 id=task_id,
                 title=task_content.title,
                 description=task_content.description,
                 due_date=task_content.due_date,
+            ),
+            versions,
+        )
+        # Выборки с прежней due_date содержат задачу task_id.
+        self.__invalidate([task.id], [task.due_date])
+        return task
+
+    async def update_many(
+        self, tasks_content: List[TaskBatchPutRequestSchema]
+    ) -> List[TaskBatchResultSchema]:
+        updated = await self.__task_repository.update_many(
+            [
+                Task(
+                    id=task_content.id,
+                    title=task_content.title,
+                    description=task_content.description,
+                    due_date=task_content.due_date,
+                )
+                for task_content in tasks_content
+            ]
+        )
+        self.__invalidate(
+            updated,
+            {
+                task_content.due_date
+                for task_content in tasks_content
+                if task_content.id in updated
+            },
+        )
+        return [
+            TaskBatchResultSchema(
+                id=task_content.id,
+                status=(
+                    "updated"
+                    if task_content.id in updated
+                    else "not_found"
+                ),
             )
+            for task_content in tasks_content
+        ]
+
+    async def delete(
+        self,
+        task_id: int,
+        versions: Optional[Collection[int]] = None,
+    ) -> Task:
+        task = await self.__task_repository.delete(
+            task_id, versions
+        )
+        self.__invalidate([task.id], [task.due_date])
+        return task
+
+    async def delete_many(
+        self, task_ids: List[int]
+    ) -> List[TaskBatchResultSchema]:
+        deleted = await self.__task_repository.delete_many(
+            task_ids
         )
+        self.__invalidate(deleted, [])
+        return [
+            TaskBatchResultSchema(
+                id=task_id,
+                status=(
+                    "deleted"
+                    if task_id in deleted
+                    else "not_found"
+                ),
+            )
+            for task_id in task_ids
+        ]
 
-    def delete(self, task_id: int) -> Task:
-        return self.__task_repository.delete(task_id)
+    async def get_tasks_entry(
+        self, start_date: date, end_date: date
+    ) -> TaskCacheEntry:
+        """
+        Получить задачи периода в виде готового JSON-ответа
+        с ETag через кэш выборок.
+
+        Конкурентные запросы одного периода выполняют одну
+        загрузку. Поколение кэша в ключе не дает запросу,
+        пришедшему после изменения задач, получить результат
+        загрузки, начатой до него.
+
+        Запросы клиента, недавно выполнявшего запись, читают
+        основную БД в обход кэша и общих загрузок: их могла
+        заполнить отстающая реплика.
+        """
+        # Изменения других воркеров сбрасывают записи кэша.
+        await self.__sync_changes()
+        if self.__task_repository.reads_own_writes():
+            return await self.__load_tasks_entry(
+                start_date, end_date
+            )
+        return await self.__task_queries.run(
+            f"{make_key(self.__owner_id, start_date, end_date)}"
+            f"@{self.__task_cache.generation}",
+            lambda: self.__task_cache.get_or_load(
+                self.__owner_id,
+                start_date,
+                end_date,
+                lambda: self.__load_tasks_entry(
+                    start_date, end_date, shared=True
+                ),
+            ),
+        )
 
-    async def get_tasks_by_period(
+    async def get_tasks_encoded(
         self,
-        start_date_str: Optional[str],
-        end_date_str: Optional[str],
-    ) -> List[Task]:
-        start_date = parse_date(start_date_str)
-        end_date = parse_date(end_date_str)
-        validate_dates(start_date, end_date)
+        start_date: date,
+        end_date: date,
+        entry: TaskCacheEntry,
+        encoding: str,
+    ) -> bytes:
+        """
+        JSON выборки entry, сжатый в encoding, через кэш выборок.
+        """
+        return await self.__task_cache.get_encoded(
+            self.__owner_id,
+            start_date,
+            end_date,
+            entry,
+            encoding,
+        )
+
+    async def get_tasks_etag(
+        self, start_date: date, end_date: date
+    ) -> str:
+        """
+        Получить ETag выборки за период, не загружая задачи:
+        из кэша, из индекса по дням либо агрегатным запросом по
+        индексу due_date.
+        """
+        await self.__sync_changes()
+        entry = (
+            await self.__task_cache.peek(
+                self.__owner_id, start_date, end_date
+            )
+            if not self.__task_repository.reads_own_writes()
+            else None
+        )
+        if entry is not None:
+            return entry.etag
+
+        rows = (
+            self.__task_day_index.get_rows(
+                self.__owner_id, start_date, end_date
+            )
+            if self.__task_day_index is not None
+            else None
+        )
+        if rows is not None:
+            count, id_sum, last_modified = (
+                len(rows),
+                sum(row.id for row in rows),
+                max(
+                    (row.updated_at for row in rows),
+                    default=None,
+                ),
+            )
+        else:
+            count, id_sum, last_modified = (
+                await self.__task_repository.get_version_by_period(
+                    start_date, end_date
+                )
+            )
+        return make_etag(
+            start_date,
+            end_date,
+            count,
+            id_sum,
+            last_modified,
+        )
 
-        return self.__task_repository.get_by_period(
+    async def __load_tasks_entry(
+        self,
+        start_date: date,
+        end_date: date,
+        shared: bool = False,
+    ) -> TaskCacheEntry:
+        # Лента уже прочитана в get_tasks_entry. Общая загрузка
+        # (shared) не использует сессию запроса, который ее начал:
+        # его отмена не прерывает загрузку для остальных.
+        rows = (
+            self.__task_day_index.get_rows(
+                self.__owner_id, start_date, end_date
+            )
+            if self.__task_day_index is not None
+            else None
+        )
+        if rows is None:
+            rows = await self.__task_repository.get_rows_by_period(
+                start_date, end_date, shared
+            )
+        last_modified = max(
+            (row.updated_at for row in rows), default=None
+        )
+        return TaskCacheEntry(
+            # Строки кодируются напрямую, минуя сущности ORM
+            # и валидацию TaskResponseSchema.
+            payload=orjson.dumps(
+                [
+                    {
+                        "id": row.id,
+                        "title": row.title,
+                        "description": row.description,
+                        "due_date": row.due_date,
+                    }
+                    for row in rows
+                ]
+            ),
+            etag=make_etag(
+                start_date,
+                end_date,
+                len(rows),
+                sum(row.id for row in rows),
+                last_modified,
+            ),
+            last_modified=last_modified,
+            task_ids=frozenset(row.id for row in rows),
+        )
+
+    async def get_tasks_summary(
+        self,
+        start_date: date,
+        end_date: date,
+        granularity: Granularity,
+    ) -> Dict[date, int]:
+        """
+        Получить количество задач периода по дням, неделям или
+        месяцам: {первый день интервала: количество}. Недели
+        начинаются с понедельника; интервалы без задач опускаются.
+        """
+        rows = await self.__task_repository.count_by_day(
             start_date, end_date
         )
+        # Дни сворачиваются в недели и месяцы на стороне сервиса:
+        # GROUP BY по due_date переносим между SQLite и PostgreSQL.
+        summary: Dict[date, int] = {}
+        for due_date, count in rows:
+            bucket = get_bucket_start(due_date, granularity)
+            summary[bucket] = summary.get(bucket, 0) + count
+        return summary
 
-    async def get_tasks_by_date(
-        self, date_str: Optional[str]
-    ) -> List[Task]:
-        if date_str is None:
-            date_str = date.today().isoformat()
-        target_date = parse_date(date_str)
+    async def get_tasks_page(
+        self,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        cursor: Optional[str],
+    ) -> Tuple[Sequence[Row], Optional[str]]:
+        """
+        Получить страницу строк задач периода и курсор следующей
+        страницы (None, если страница последняя).
+        """
+        after = decode_cursor(cursor) if cursor else None
+        # Запрашивается на одну задачу больше, чтобы узнать,
+        # есть ли следующая страница.
+        tasks = (
+            await self.__task_repository.get_page_by_period(
+                start_date, end_date, limit + 1, after
+            )
+        )
+        if len(tasks) <= limit:
+            return tasks, None
 
-        tasks = self.__task_repository.get_by_period(
-            target_date, target_date
+        tasks = tasks[:limit]
+        return tasks, encode_cursor(tasks[-1])
+
+    async def search_tasks(
+        self,
+        query: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        limit: int,
+        cursor: Optional[str],
+    ) -> Tuple[Sequence[Row], Optional[str]]:
+        """
+        Найти задачи по тексту: страница строк в порядке
+        релевантности и курсор следующей страницы (None, если
+        страница последняя).
+        """
+        after = (
+            decode_search_cursor(cursor) if cursor else None
         )
-        return tasks
+        tasks = await self.__task_repository.search(
+            query, start_date, end_date, limit + 1, after
+        )
+        if len(tasks) <= limit:
+            return tasks, None
 
-    async def get_tasks_for_week(
-        self, date_str: Optional[str]
-    ) -> List[Task]:
-        if date_str is None:
-            date_str = date.today().isoformat()
-        start_date = parse_date(date_str)
-        end_date = start_date + timedelta(days=6)
+        tasks = tasks[:limit]
+        return tasks, encode_search_cursor(tasks[-1])
 
-        return await self.get_tasks_by_period(
-            start_date.isoformat(), end_date.isoformat()
+    def stream_tasks(
+        self, start_date: date, end_date: date
+    ) -> AsyncIterator[Row]:
+        return self.__task_repository.stream_by_period(
+            start_date, end_date
         )
 
 
-def parse_date(date_str: str) -> date:
+def get_period(
+    start_date_str: Optional[str],
+    end_date_str: Optional[str],
+) -> Tuple[date, date]:
+    start_date = parse_date(start_date_str)
+    end_date = parse_date(end_date_str)
+    validate_dates(start_date, end_date)
+    return start_date, end_date
+
+
+def get_date_period(
+    date_str: Optional[str],
+) -> Tuple[date, date]:
+    if date_str is None:
+        date_str = date.today().isoformat()
+    target_date = parse_date(date_str)
+    return target_date, target_date
+
+
+def get_week_period(
+    date_str: Optional[str],
+) -> Tuple[date, date]:
+    start_date, _ = get_date_period(date_str)
+    return start_date, start_date + timedelta(days=6)
+
+
+def get_bucket_start(
+    value: date, granularity: Granularity
+) -> date:
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
+
+def make_etag(
+    start_date: date,
+    end_date: date,
+    count: int,
+    id_sum: int,
+    last_modified: Optional[datetime],
+) -> str:
+    """
+    Слабый ETag выборки: меняется при добавлении, удалении
+    и изменении любой задачи периода.
+    """
+    if last_modified is not None:
+        last_modified = to_utc(last_modified)
+    version = (
+        f"{start_date}:{end_date}:{count}:{id_sum}:"
+        f"{last_modified.isoformat() if last_modified else ''}"
+    )
+    digest = hashlib.blake2b(
+        version.encode(), digest_size=12
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def make_task_etag(version: int) -> str:
+    """
+    Сильный ETag задачи по ее версии (Task.version).
+    """
+    return f'"{version}"'
+
+
+def to_utc(value: datetime) -> datetime:
+    """
+    Привести время к UTC: SQLite возвращает его без часового пояса.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def encode_cursor(task: Union[Task, Row]) -> str:
+    raw = f"{task.due_date.isoformat()}:{task.id}".encode()
+    return (
+        base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    )
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
     try:
-        parsed_datetime = parser.parse(date_str)
-        if parsed_datetime.tzinfo is None:
-            parsed_datetime = parsed_datetime.replace(
-                tzinfo=tz.UTC
-            )
-        return parsed_datetime.date()
-    except ValueError as e:
-        raise ValueError(
-            f"Некорректный формат даты: {date_str}"
-        ) from e
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode()
+        due_date_str, task_id_str = raw.split(":")
+        return date.fromisoformat(due_date_str), int(
+            task_id_str
+        )
+    except (
+        binascii.Error,
+        UnicodeDecodeError,
+        ValueError,
+    ) as e:
+        raise InvalidCursorException(cursor) from e
+
+
+def encode_search_cursor(row: Row) -> str:
+    # repr восстанавливает float без потери точности.
+    raw = f"{row.score!r}:{row.id}".encode()
+    return (
+        base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    )
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode()
+        score_str, task_id_str = raw.split(":")
+        return float(score_str), int(task_id_str)
+    except (
+        binascii.Error,
+        UnicodeDecodeError,
+        ValueError,
+    ) as e:
+        raise InvalidCursorException(cursor) from e
+
+
+@lru_cache(maxsize=settings.date_parse_cache_size)
+def parse_date(date_str: str) -> date:
+    """
+    Разобрать дату в формате ISO 8601 (гггг-мм-дд) либо в одном из
+    форматов settings.date_extra_formats. Результаты запоминаются:
+    панели опрашивают сервис по одним и тем же датам.
+    """
+    # С Python 3.11 fromisoformat принимает и базовый (20240101),
+    # и недельный (2024-W01-1) форматы, поэтому сначала сверяем
+    # строку с гггг-мм-дд.
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", date_str):
+        try:
+            return date.fromisoformat(date_str)
+        except ValueError:
+            pass
+
+    for date_format in settings.date_extra_formats:
+        try:
+            return datetime.strptime(
+                date_str, date_format
+            ).date()
+        except ValueError:
+            continue
+
+    raise ValueError(
+        f"Некорректный формат даты: {date_str}"
+    )
 
 
 def validate_dates(start_date: date, end_date: date):
@@ -0,0 +1,769 @@
+import asyncio
+import fcntl
+import itertools
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date
+from typing import (
+    BinaryIO,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import orjson
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from configs import settings
+from configs.database import session_local
+from models.task_model import Task
+from models.task_write_ticket_model import TaskWriteTicket
+from monitoring.metrics import registry
+from repositories.task_repository import TaskRepository
+from schemas.pydantic.task_schema import (
+    TaskPostRequestSchema,
+)
+from services.task_cache import TaskCache, get_task_cache
+from services.task_change_feed import (
+    TaskChangeFeed,
+    get_task_change_feed,
+)
+
+logger = logging.getLogger(__name__)
+
+write_behind_depth = registry.gauge(
+    "todo_api_write_behind_pending",
+    "Задачи в очереди отложенной записи.",
+)
+write_behind_enqueued = registry.counter(
+    "todo_api_write_behind_enqueued_total",
+    "Задачи, принятые в очередь отложенной записи.",
+)
+write_behind_rejected = registry.counter(
+    "todo_api_write_behind_rejected_total",
+    "Задачи, отклоненные из-за переполнения очереди.",
+)
+write_behind_failures = registry.counter(
+    "todo_api_write_behind_failures_total",
+    "Ошибки записи пакета в БД (пакет повторяется).",
+)
+write_behind_batch_size = registry.histogram(
+    "todo_api_write_behind_batch_size",
+    "Количество задач в пакете отложенной записи.",
+    buckets=(1, 5, 10, 50, 100, 250, 500, 1000, 5000),
+)
+write_behind_flush_duration = registry.histogram(
+    "todo_api_write_behind_flush_seconds",
+    "Длительность записи пакета в БД.",
+)
+
+
+class TaskWriteQueueFullException(Exception):
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.message = (
+            "Очередь записи переполнена"
+            f" ({max_pending} задач), повторите запрос позже"
+        )
+        super().__init__(self.message)
+
+
+class PendingTask(NamedTuple):
+    """
+    Задача в очереди: квитанция, выданная клиенту, владелец
+    и содержимое.
+    """
+
+    ticket: str
+    owner_id: int
+    title: str
+    description: Optional[str]
+    due_date: date
+
+    def to_json(self) -> Dict:
+        return {
+            "id": None,
+            "ticket": self.ticket,
+            "title": self.title,
+            "description": self.description,
+            "due_date": self.due_date,
+        }
+
+
+journal_name = re.compile(r"journal-\d+\.jsonl")
+
+
+def lock_journal(path: str) -> Optional[BinaryIO]:
+    """
+    Открыть журнал path под исключительной блокировкой (None, если
+    его занял другой процесс).
+    """
+    file = open(path, "a+b")
+    try:
+        fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        file.close()
+        return None
+    return file
+
+
+class TaskJournal:
+    """
+    Журнал очереди: файл JSON-строк "add" (задача принята) и
+    "done" (задача записана в БД), дописываемый в конец.
+
+    Каждый процесс захватывает свободный журнал каталога
+    (flock), поэтому журналы воркеров не пересекаются. Журналы
+    завершившихся процессов подхватываются при следующем запуске
+    (claim_orphans).
+    """
+
+    def __init__(
+        self, directory: str, path: Optional[str] = None
+    ) -> None:
+        """
+        Захватить журнал path либо первый свободный журнал
+        каталога directory. Журнал path, занятый другим процессом, -
+        BlockingIOError.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        if path is None:
+            for number in itertools.count():
+                path = os.path.join(
+                    directory, f"journal-{number}.jsonl"
+                )
+                file = lock_journal(path)
+                if file is not None:
+                    break
+        else:
+            file = lock_journal(path)
+            if file is None:
+                raise BlockingIOError(path)
+        self.path = os.path.abspath(path)
+        self.__file = file
+        # Номера записей: дописанной последней и последней,
+        # сброшенной на диск.
+        self.__written = 0
+        self.__synced = 0
+        self.__sync: Optional[asyncio.Future] = None
+
+    def replay(self) -> List[PendingTask]:
+        """
+        Задачи, принятые, но не записанные в БД, в порядке приема.
+        """
+        self.__file.seek(0)
+        pending: "OrderedDict[str, PendingTask]" = (
+            OrderedDict()
+        )
+        for line in self.__file:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # Строка, оборванная сбоем при записи
+                continue
+            if record["op"] == "add":
+                task = PendingTask(
+                    ticket=record["ticket"],
+                    owner_id=record["owner_id"],
+                    title=record["title"],
+                    description=record["description"],
+                    due_date=date.fromisoformat(
+                        record["due_date"]
+                    ),
+                )
+                pending[task.ticket] = task
+            else:
+                for ticket in record["tickets"]:
+                    pending.pop(ticket, None)
+        return list(pending.values())
+
+    def add(self, task: PendingTask) -> int:
+        """
+        Дописать задачу в журнал (без сброса на диск). Возвращает
+        номер записи для sync.
+        """
+        return self.__write({"op": "add", **task._asdict()})
+
+    def done(self, tickets: List[str]) -> None:
+        # Сброс не нужен: потерянная запись "done" восстанавливается
+        # по таблице task_write_ticket.
+        self.__write({"op": "done", "tickets": tickets})
+
+    async def sync(self, number: int) -> None:
+        """
+        Дождаться сброса на диск записи number. Записи,
+        накопившиеся за время fsync, сбрасываются следующим
+        fsync одним вызовом.
+        """
+        while self.__synced < number:
+            if self.__sync is None:
+                self.__sync = asyncio.ensure_future(
+                    self.__fsync()
+                )
+            await asyncio.shield(self.__sync)
+
+    async def truncate(self) -> None:
+        """
+        Очистить журнал и дождаться сброса очистки на диск: после
+        этого квитанции его задач больше не нужны для повтора.
+        Вызывается, когда очередь пуста.
+        """
+        self.__file.truncate(0)
+        self.__file.flush()
+        target = self.__written
+        await asyncio.to_thread(
+            os.fsync, self.__file.fileno()
+        )
+        self.__synced = max(self.__synced, target)
+
+    def claim_orphans(self) -> List["TaskJournal"]:
+        """
+        Захватить журналы каталога, не занятые другими процессами,
+        в том числе с номерами больше числа воркеров после его
+        уменьшения.
+        """
+        orphans = []
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.abspath(
+                os.path.join(self.directory, name)
+            )
+            if (
+                path == self.path
+                or not journal_name.fullmatch(name)
+            ):
+                continue
+            try:
+                orphans.append(
+                    TaskJournal(self.directory, path)
+                )
+            except BlockingIOError:
+                continue
+        return orphans
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __write(self, record: Dict) -> int:
+        self.__file.write(
+            orjson.dumps(
+                record, option=orjson.OPT_APPEND_NEWLINE
+            )
+        )
+        self.__file.flush()
+        self.__written += 1
+        return self.__written
+
+    async def __fsync(self) -> None:
+        target = self.__written
+        try:
+            await asyncio.to_thread(
+                os.fsync, self.__file.fileno()
+            )
+            self.__synced = max(self.__synced, target)
+        finally:
+            self.__sync = None
+
+
+class TaskWriteQueue:
+    """
+    Очередь отложенной записи задач.
+
+    enqueue регистрирует квитанцию в task_write_ticket, сохраняет
+    задачу в журнал и сразу возвращает квитанцию; фоновый
+    обработчик записывает задачи в БД пакетами по batch_size или по
+    истечении flush_interval. Задачи из журнала, не записанные до
+    остановки процесса, записываются при следующем start.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        journal: TaskJournal,
+        task_cache: TaskCache,
+        batch_size: int = settings.write_behind_batch_size,
+        flush_interval: float = settings.write_behind_flush_interval,
+        max_pending: int = settings.write_behind_max_pending,
+        retry_interval: float = settings.write_behind_retry_interval,
+        tickets_kept: int = settings.write_behind_tickets_kept,
+        task_change_feed: Optional[TaskChangeFeed] = None,
+    ) -> None:
+        self.__session_maker = session_maker
+        self.__journal = journal
+        self.__task_cache = task_cache
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__max_pending = max_pending
+        self.__retry_interval = retry_interval
+        self.__tickets_kept = tickets_kept
+        self.__task_change_feed = task_change_feed
+        self.__pending: "OrderedDict[str, PendingTask]" = (
+            OrderedDict()
+        )
+        # Квитанции, ждущие вставки в task_write_ticket, и
+        # выполняющаяся вставка. Вставка и запись пакета не
+        # выполняются одновременно (tickets_lock): иначе обе
+        # вставили бы одну квитанцию.
+        self.__unregistered: (
+            "OrderedDict[str, PendingTask]"
+        ) = OrderedDict()
+        self.__registering: Optional[asyncio.Future] = None
+        self.__tickets_lock = asyncio.Lock()
+        self.__ready = asyncio.Event()
+        self.__worker: Optional[asyncio.Task] = None
+        self.__release_tickets = False
+
+    async def start(self) -> None:
+        orphans = self.__journal.claim_orphans()
+        replayed: "OrderedDict[str, PendingTask]" = (
+            OrderedDict()
+        )
+        for journal in [self.__journal, *orphans]:
+            for task in journal.replay():
+                replayed.setdefault(task.ticket, task)
+        if replayed or orphans:
+            await self.__restore(replayed, orphans)
+            logger.info(
+                "Журналы %s: %d задач к записи",
+                ", ".join(
+                    journal.path
+                    for journal in [
+                        self.__journal,
+                        *orphans,
+                    ]
+                ),
+                len(self.__pending),
+            )
+        self.__update_depth()
+        self.__worker = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        """
+        Записать оставшиеся задачи и остановить обработчик. Если
+        БД недоступна, задачи остаются в журнале до следующего
+        запуска.
+        """
+        if self.__worker is not None:
+            self.__worker.cancel()
+            try:
+                await self.__worker
+            except asyncio.CancelledError:
+                pass
+            self.__worker = None
+        try:
+            while self.__pending:
+                await self.flush()
+            if self.__registering is not None:
+                await self.__registering
+        except Exception:
+            logger.exception(
+                "Задачи очереди оставлены в журнале %s",
+                self.__journal.path,
+            )
+        self.__journal.close()
+
+    async def enqueue(
+        self, owner_id: int, task: TaskPostRequestSchema
+    ) -> PendingTask:
+        if len(self.__pending) >= self.__max_pending:
+            write_behind_rejected.inc()
+            raise TaskWriteQueueFullException(
+                self.__max_pending
+            )
+
+        pending = PendingTask(
+            ticket=uuid.uuid4().hex,
+            owner_id=owner_id,
+            title=task.title,
+            description=task.description,
+            due_date=task.due_date,
+        )
+        number = self.__journal.add(pending)
+        # Квитанция вставляется в фоне, не задерживая ответ:
+        # статус по Location отдает любой воркер, как только она
+        # вставлена.
+        self.__register(pending)
+        self.__pending[pending.ticket] = pending
+        self.__update_depth()
+        write_behind_enqueued.inc()
+        self.__ready.set()
+        # Ответ 202 - только после сохранения задачи на диске.
+        await self.__journal.sync(number)
+        return pending
+
+    def get_pending(
+        self,
+        owner_id: int,
+        start_date: date,
+        end_date: date,
+    ) -> List[PendingTask]:
+        """
+        Еще не записанные задачи владельца за период из очереди
+        этого процесса.
+        """
+        return [
+            task
+            for task in self.__pending.values()
+            if task.owner_id == owner_id
+            and start_date <= task.due_date <= end_date
+        ]
+
+    async def get_status(
+        self, owner_id: int, ticket: str
+    ) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Состояние квитанции владельца ("pending" или "created") и
+        id записанной задачи; (None, None), если квитанция не
+        найдена. Квитанции читаются из БД: их выдают все воркеры.
+        Задачи своей очереди отвечают без запроса к БД: квитанция
+        могла быть еще не вставлена.
+        """
+        task = self.__pending.get(ticket)
+        if task is not None and task.owner_id == owner_id:
+            return "pending", None
+        async with self.__session_maker() as session:
+            row = (
+                await session.execute(
+                    select(
+                        TaskWriteTicket.status,
+                        TaskWriteTicket.task_id,
+                    ).where(
+                        TaskWriteTicket.ticket == ticket,
+                        TaskWriteTicket.owner_id
+                        == owner_id,
+                    )
+                )
+            ).one_or_none()
+        if row is None:
+            return None, None
+        return row.status, row.task_id
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self.__pending),
+            "max_pending": self.__max_pending,
+        }
+
+    async def flush(self) -> int:
+        """
+        Записать в БД одним пакетом до batch_size задач из начала
+        очереди. Возвращает количество записанных задач.
+        """
+        batch = list(
+            itertools.islice(
+                self.__pending.values(), self.__batch_size
+            )
+        )
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        by_owner: Dict[int, List[PendingTask]] = {}
+        for task in batch:
+            by_owner.setdefault(task.owner_id, []).append(
+                task
+            )
+
+        async with self.__tickets_lock, self.__session_maker() as session:
+            async with session.begin():
+                if self.__release_tickets:
+                    await self.__release(session)
+                created = []
+                for owner_id, tasks in by_owner.items():
+                    rows = await TaskRepository(
+                        session, owner_id
+                    ).create_many(
+                        [
+                            Task(
+                                title=task.title,
+                                description=task.description,
+                                due_date=task.due_date,
+                            )
+                            for task in tasks
+                        ]
+                    )
+                    created.extend(zip(tasks, rows))
+                tickets = [
+                    {
+                        "ticket": task.ticket,
+                        "status": "created",
+                        "task_id": row.id,
+                    }
+                    for task, row in created
+                ]
+                # Квитанции, которые фоновая вставка не успела
+                # (или не смогла) вставить, вставляются с задачами.
+                unregistered = [
+                    {**self.__make_ticket(task), **ticket}
+                    for (task, _), ticket in zip(
+                        created, tickets
+                    )
+                    if task.ticket in self.__unregistered
+                ]
+                if unregistered:
+                    await session.execute(
+                        insert(TaskWriteTicket),
+                        unregistered,
+                    )
+                registered = [
+                    ticket
+                    for ticket in tickets
+                    if ticket["ticket"]
+                    not in self.__unregistered
+                ]
+                if registered:
+                    await session.execute(
+                        update(TaskWriteTicket), registered
+                    )
+        self.__release_tickets = False
+        for task in batch:
+            self.__unregistered.pop(task.ticket, None)
+
+        for task, _ in created:
+            del self.__pending[task.ticket]
+
+        if self.__pending:
+            self.__journal.done(
+                [task.ticket for task in batch]
+            )
+        else:
+            # Квитанции освобождаются следующим пакетом, только
+            # когда очистка журнала уже на диске: иначе после сбоя
+            # журнал повторил бы задачи без квитанций.
+            await self.__journal.truncate()
+            self.__release_tickets = True
+        self.__update_depth()
+
+        for owner_id, tasks in by_owner.items():
+            await self.__task_cache.invalidate(
+                owner_id,
+                [],
+                {task.due_date for task in tasks},
+            )
+        if self.__task_change_feed is not None:
+            # Записанные задачи уходят из очереди и должны сразу
+            # появиться в индексе по дням.
+            await self.__task_change_feed.sync(force=True)
+        write_behind_batch_size.observe(len(batch))
+        write_behind_flush_duration.observe(
+            time.perf_counter() - started
+        )
+        return len(batch)
+
+    async def __run(self) -> None:
+        while True:
+            await self.__ready.wait()
+            if len(self.__pending) < self.__batch_size:
+                # Пакет набирается не дольше flush_interval.
+                await asyncio.sleep(self.__flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                write_behind_failures.inc()
+                logger.exception(
+                    "Ошибка записи пакета отложенной записи"
+                )
+                await asyncio.sleep(self.__retry_interval)
+            if not self.__pending:
+                self.__ready.clear()
+
+    async def __restore(
+        self,
+        replayed: "OrderedDict[str, PendingTask]",
+        orphans: List[TaskJournal],
+    ) -> None:
+        """
+        Поставить в очередь задачи журналов, не записанные в БД.
+        Задачи журналов orphans переносятся в свой журнал, а сами
+        они очищаются.
+        """
+        async with self.__session_maker() as session:
+            result = await session.execute(
+                select(
+                    TaskWriteTicket.ticket,
+                    TaskWriteTicket.status,
+                ).where(
+                    TaskWriteTicket.ticket.in_(
+                        list(replayed)
+                    )
+                )
+            )
+            statuses = dict(result.all())
+        # Задачи, записанные до сбоя, уже отмечены "created".
+        for task in replayed.values():
+            if statuses.get(task.ticket) != "created":
+                self.__pending[task.ticket] = task
+
+        own = {
+            task.ticket for task in self.__journal.replay()
+        }
+        number = 0
+        for task in self.__pending.values():
+            if task.ticket not in own:
+                number = self.__journal.add(task)
+        await self.__journal.sync(number)
+        for orphan in orphans:
+            await orphan.truncate()
+            orphan.close()
+
+        paths = [journal.path for journal in orphans]
+        async with self.__session_maker() as session:
+            async with session.begin():
+                # Квитанции задач очереди переходят к своему
+                # журналу, в том числе квитанции задач, принятых
+                # до их вставки в task_write_ticket.
+                await session.execute(
+                    delete(TaskWriteTicket).where(
+                        TaskWriteTicket.status == "pending",
+                        or_(
+                            TaskWriteTicket.journal.in_(
+                                [
+                                    self.__journal.path,
+                                    *paths,
+                                ]
+                            ),
+                            TaskWriteTicket.ticket.in_(
+                                list(self.__pending)
+                            ),
+                        ),
+                    )
+                )
+                if self.__pending:
+                    await session.execute(
+                        insert(TaskWriteTicket),
+                        [
+                            self.__make_ticket(task)
+                            for task in self.__pending.values()
+                        ],
+                    )
+                await session.execute(
+                    update(TaskWriteTicket)
+                    .where(
+                        TaskWriteTicket.journal.in_(paths),
+                        TaskWriteTicket.status == "created",
+                    )
+                    .values(journal=None)
+                )
+
+    def __register(self, task: PendingTask) -> None:
+        """
+        Вставить квитанцию task в task_write_ticket в фоне.
+        Квитанции, накопившиеся за время вставки, вставляются
+        следующей транзакцией одним INSERT.
+        """
+        self.__unregistered[task.ticket] = task
+        if self.__registering is None:
+            self.__registering = asyncio.ensure_future(
+                self.__register_all()
+            )
+
+    async def __register_all(self) -> None:
+        try:
+            while self.__unregistered:
+                async with self.__tickets_lock:
+                    batch = list(
+                        self.__unregistered.values()
+                    )
+                    if not batch:
+                        break
+                    async with self.__session_maker() as session:
+                        async with session.begin():
+                            await session.execute(
+                                insert(TaskWriteTicket),
+                                [
+                                    self.__make_ticket(task)
+                                    for task in batch
+                                ],
+                            )
+                    for task in batch:
+                        del self.__unregistered[task.ticket]
+        except Exception:
+            # Квитанции остаются в unregistered и вставляются
+            # при записи их пакета.
+            logger.exception(
+                "Ошибка вставки квитанций отложенной записи"
+            )
+        finally:
+            self.__registering = None
+
+    def __make_ticket(self, task: PendingTask) -> Dict:
+        return {
+            "ticket": task.ticket,
+            "owner_id": task.owner_id,
+            "status": "pending",
+            "journal": self.__journal.path,
+        }
+
+    async def __release(
+        self, session: AsyncSession
+    ) -> None:
+        # Журнал очищен: квитанции записанных из него задач больше
+        # не нужны для повтора и хранятся для
+        # GET /v1/tasks/pending/{ticket}, не больше tickets_kept.
+        await session.execute(
+            update(TaskWriteTicket)
+            .where(
+                TaskWriteTicket.journal
+                == self.__journal.path,
+                TaskWriteTicket.status == "created",
+            )
+            .values(journal=None)
+        )
+        newest_dropped = await session.scalar(
+            select(TaskWriteTicket.task_id)
+            .where(
+                TaskWriteTicket.journal.is_(None),
+                TaskWriteTicket.task_id.is_not(None),
+            )
+            .order_by(TaskWriteTicket.task_id.desc())
+            .offset(self.__tickets_kept)
+            .limit(1)
+        )
+        if newest_dropped is not None:
+            await session.execute(
+                delete(TaskWriteTicket).where(
+                    TaskWriteTicket.journal.is_(None),
+                    or_(
+                        TaskWriteTicket.task_id
+                        <= newest_dropped,
+                        TaskWriteTicket.task_id.is_(None),
+                    ),
+                )
+            )
+
+    def __update_depth(self) -> None:
+        write_behind_depth.set(len(self.__pending))
+
+
+task_write_queue: Optional[TaskWriteQueue] = None
+
+
+def create_task_write_queue() -> TaskWriteQueue:
+    """
+    Создать очередь процесса; запускается в lifespan приложения.
+    """
+    global task_write_queue
+    task_write_queue = TaskWriteQueue(
+        session_local,
+        TaskJournal(settings.write_behind_journal_dir),
+        get_task_cache(),
+        task_change_feed=get_task_change_feed(),
+    )
+    return task_write_queue
+
+
+def get_task_write_queue() -> Optional[TaskWriteQueue]:
+    """
+    Очередь отложенной записи (None, если она выключена).
+    """
+    return task_write_queue